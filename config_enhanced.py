@@ -7,6 +7,7 @@ config_enhanced.py - Enhanced configuration for JARVIS-like capabilities
 import os
 import sys
 import json
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -15,8 +16,15 @@ BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
 LOGS_DIR = BASE_DIR / "logs"
 MEMORY_FILE = DATA_DIR / "memory.json"
+MEMORY_JOURNAL_FILE = DATA_DIR / "memory.journal"  # write-ahead journal for MEMORY_FILE
 AUTOMATIONS_FILE = DATA_DIR / "automations.json"
-ACTIVITY_LOG_FILE = DATA_DIR / "activity_log.json"
+ACTIVITY_LOG_FILE = DATA_DIR / "activity_log.json"  # legacy array (utils.logger), folded in on first use
+ACTIVITY_LOG_DIR = DATA_DIR / "activity_log"  # append-only JSON-Lines segments
+RESPONSE_CACHE_FILE = DATA_DIR / "response_cache.sqlite3"
+FILE_INDEX_FILE = DATA_DIR / "file_index.sqlite3"
+BACKUP_DIR = DATA_DIR / "backups"  # compress_folder archives + incremental manifests
+SCHEDULE_FILE = DATA_DIR / "schedule.json"  # pending scheduled jobs, restored on startup
+TRACE_DIR = DATA_DIR / "traces"  # Chrome trace-event exports from trace_report
 
 # --- Environment / API Keys --------------------------------------------------
 load_dotenv(BASE_DIR / ".env")
@@ -29,15 +37,29 @@ AI_PROVIDER = os.getenv("AI_PROVIDER", "gemini")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")      # Google Gemini (FREE tier)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")     # OpenAI GPT (paid)
 ELEVENLABS_KEY = os.getenv("ELEVENLABS_API_KEY", "") # Premium voice (optional)
+ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")  # Voice used with TTS_ENGINE="elevenlabs"
 
 # --- Wake Word ---------------------------------------------------------------
 WAKE_WORDS = ["hey disha", "hey d i s h a", "disha", "jarvis"]
+WAKE_WORD_PRONUNCIATIONS = {  # ARPAbet for the keyword spotter (words not in its dictionary)
+    "disha": "D IH SH AH",
+    "jarvis": "JH AA R V IH S",
+}
+WAKE_KWS_THRESHOLD = 1e-20  # pocketsphinx keyword threshold (lower = more sensitive)
 
 # --- Voice Input -------------------------------------------------------------
 RECOGNITION_LANGUAGE = "en-IN"  # en-US, en-IN, hi-IN, bn-IN
 AMBIENT_TIMEOUT = 2  # seconds of silence before ambient phase ends
 PHRASE_TIMEOUT = 8  # max seconds to wait for phrase after wake
 PHRASE_TIME_LIMIT = 10  # hard cap on one utterance (seconds)
+VOICE_FRONTEND = "streaming"  # "streaming" (VAD + wake-word gate) | "classic" (VoiceInput)
+VAD_SAMPLE_RATE = 16000  # Microphone sample rate for the streaming front end
+VAD_FRAME_MS = 30  # Frame length for voice activity detection (10, 20 or 30)
+VAD_ENERGY_RATIO = 3.0  # Speech must be this many times louder than the noise floor
+VAD_MIN_ENERGY = 300  # Absolute RMS floor for speech
+VAD_END_SILENCE_MS = 700  # Silence that ends an utterance
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", "")  # Local streaming recognizer (partial transcripts)
+SPECULATIVE_PARSING = True  # Parse partial transcripts before the user stops speaking
 
 # --- Voice Output (Enhanced) -------------------------------------------------
 TTS_ENGINE = "pyttsx3"  # "pyttsx3" | "elevenlabs"
@@ -49,6 +71,25 @@ TTS_VOICE_INDEX = 1  # 0 = male, 1 = female (OS-dependent)
 TTS_ENHANCED_MODE = True  # Use enhanced voice processing
 TTS_ADD_PAUSES = True  # Add natural pauses in speech
 TTS_EXPAND_ABBREVIATIONS = True  # Expand abbreviations for clarity
+SPEECH_QUEUE_ENABLED = True  # Priority speech queue (preemption, coalescing, barge-in)
+SPEECH_STALE_AFTER = 6  # seconds before queued narration is dropped unspoken
+
+# Rendered-speech cache (fixed phrases play from disk instead of re-synthesizing)
+TTS_CACHE_ENABLED = True  # Needs sounddevice + soundfile for playback
+TTS_CACHE_DIR = DATA_DIR / "tts_cache"  # One audio file per (engine, voice, rate, sentence)
+TTS_CACHE_MAX_MB = 50  # Least recently played phrases are evicted above this
+TTS_CACHE_PROMOTE = False  # Also cache repeated non-listed sentences (AI replies included) on disk
+TTS_CACHE_PROMOTE_AFTER = 2  # With TTS_CACHE_PROMOTE: cache a sentence after it has been spoken this often
+TTS_CACHE_PHRASES = [  # Pre-rendered at install time: python -m core.tts_cache --prerender
+    "Action cancelled.",
+    "I encountered an issue:",
+    "I encountered an unexpected error. Please try again.",
+    "Emergency shutdown initiated.",
+    "Emergency protocols disengaged. I'm operational again.",
+    "DISHA systems shutting down. Goodbye, Subhra.",
+    "Good morning, Subhra. Would you like me to run your morning routine?",
+    "It's getting late. Should I dim the screen and prepare for evening mode?",
+]
 
 # --- AI Brain (Enhanced) -----------------------------------------------------
 OPENAI_MODEL = "gpt-4o-mini"  # or "gpt-4" for maximum capability
@@ -56,10 +97,41 @@ AI_MAX_TOKENS = 1024
 AI_TEMPERATURE = 0.7  # Slightly higher for more natural responses
 
 # Enhanced AI settings
-AI_CONVERSATION_MEMORY = 10  # Number of past exchanges to remember
+AI_CONVERSATION_MEMORY = 10  # Exchanges MultiAIBrain keeps itself (turn count)
+AI_CONTEXT_TOKENS = 1500  # Token budget for recent turns in each prompt
+AI_CONTEXT_MAX_TURNS = 64  # Ring capacity; older turns fold into the summary
+AI_CONTEXT_SUMMARY_TOKENS = 200  # Cap on the rolling summary of folded turns
+AI_STREAMING = True  # Speak replies sentence by sentence while they stream in (needs AI_POOL_ENABLED)
+
+# Provider connection pool (keep-alive sessions, warm-up, hedged requests)
+AI_POOL_ENABLED = True  # Talk to Gemini / OpenAI over pooled HTTP sessions
+GEMINI_MODEL = "gemini-1.5-flash"
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")  # or a local stand-in
+AI_REQUEST_TIMEOUT = 20  # seconds per provider request
+AI_HEDGE_ENABLED = True  # With both keys: ask the second provider if the first is past its p95
+AI_HEDGE_MIN_DELAY = 0.8  # Never hedge sooner than this (seconds)
+AI_KEEPALIVE_INTERVAL = 45  # Ping an idle provider connection this often (seconds)
+AI_KEEPALIVE_WINDOW = 1800  # ...but only this long after the last request
+
+# Provider routing (per-request choice by observed latency / errors)
+AI_ROUTER_EWMA_ALPHA = 0.2  # Weight of the newest sample in latency / error averages
+AI_BREAKER_FAILURES = 3  # Consecutive failures that open a provider's circuit
+AI_BREAKER_COOLDOWN = 30  # Seconds before a tripped provider is tried again (doubles per trip)
+AI_QUOTA_COOLDOWN = 600  # Seconds to skip a provider after a quota error without Retry-After
+AI_STRUCTURED_OUTPUT = True  # Offer registered actions as provider tools (function calling)
 AI_PROACTIVE_SUGGESTIONS = True  # Enable proactive assistance
 AI_WEB_SEARCH_ENABLED = True  # Enable internet search capabilities
 AI_CONTEXT_AWARENESS = True  # Enhanced context tracking
+AI_LOCAL_INTENTS = True  # Answer common commands locally, skipping the LLM
+AI_LOCAL_INTENT_THRESHOLD = 0.85  # Below this confidence, ask the AI provider
+
+# Response cache (in-memory LRU + on-disk store)
+AI_CACHE_ENABLED = True
+AI_CACHE_MAX_ENTRIES = 256  # In-memory LRU size
+AI_CACHE_DISK_MAX_ENTRIES = 5000  # Rows kept in RESPONSE_CACHE_FILE
+AI_CACHE_ACTION_TTL = 12 * 3600  # Seconds an action result stays valid
+AI_CACHE_CONVERSATION_TTL = 600  # Seconds a conversational reply stays valid
 
 # JARVIS-like personality
 AI_SYSTEM_PROMPT = (
@@ -90,6 +162,12 @@ AI_SYSTEM_PROMPT = (
     "Always remember: You're not just following commands - you're an intelligent partner."
 )
 
+# Used instead when actions are offered as tools (AI_STRUCTURED_OUTPUT)
+AI_TOOLS_SYSTEM_PROMPT = AI_SYSTEM_PROMPT.replace(
+    "For system actions, use: {\"action\":\"<name>\",\"params\":{...},\"explanation\":\"<context>\"}\n",
+    "For system actions, call the matching tool; give a short spoken context in its explanation.\n",
+)
+
 # --- Security ----------------------------------------------------------------
 SECURITY_PIN = "1234"  # Change this!
 DANGEROUS_ACTIONS = [
@@ -150,6 +228,13 @@ APP_MAP = {
 
 # --- File Management ---------------------------------------------------------
 JUNK_EXTENSIONS = {".tmp", ".log", ".bak", "~", ".swp", ".swo", ".dmp"}
+DOWNLOADS_DIR = Path.home() / "Downloads"
+JUNK_CLEAN_TEMP_DIR = False  # Also let clean_junk sweep the system temp folder (opt-in)
+JUNK_SCAN_DIRS = [DOWNLOADS_DIR] + (  # folders clean_junk sweeps
+    [Path(tempfile.gettempdir())] if JUNK_CLEAN_TEMP_DIR else []
+)
+FILE_OPS_WORKERS = 8  # Thread pool size for moves / deletes
+FILE_OPS_BACKGROUND_THRESHOLD = 200  # Jobs larger than this run in the background
 SEARCH_ROOTS = [
     Path.home(),
     Path.home() / "Documents",
@@ -157,6 +242,12 @@ SEARCH_ROOTS = [
     Path.home() / "Desktop",
     Path.home() / "Pictures",
 ]
+FILE_INDEX_ENABLED = True  # Answer find_file from a background-built index
+FILE_INDEX_REFRESH_INTERVAL = 600  # Seconds between incremental refreshes
+FILE_INDEX_MAX_DEPTH = 8  # Folder depth indexed below each search root
+BACKUP_INCREMENTAL = True  # Only archive files changed since the last backup
+BACKUP_WORKERS = 0  # Compression threads (0 = one per CPU core)
+BACKUP_PROGRESS_STEP = 25  # Announce progress every N percent
 ORGANIZE_RULES = {
     ".pdf": "PDFs",
     ".doc": "Documents",
@@ -193,6 +284,8 @@ ORGANIZE_RULES = {
 }
 
 # --- Automation (Enhanced) ---------------------------------------------------
+ROUTINE_WORKERS = 4  # Independent routine steps run this many at a time
+ROUTINE_STEP_TIMEOUT = 30  # Seconds before a routine step is given up on
 DEFAULT_AUTOMATIONS = {
     "good morning": [
         {"action": "wifi_toggle", "params": {"state": True}},
@@ -254,6 +347,22 @@ PROACTIVE_MORNING_TIME = "09:00"  # Morning routine suggestion
 PROACTIVE_EVENING_TIME = "20:00"  # Evening mode suggestion
 PROACTIVE_WORK_START = "09:00"  # Work start time
 PROACTIVE_WORK_END = "18:00"  # Work end time
+SCHEDULER_MISSED_GRACE = 300  # Seconds a job missed while DISHA was off may still run late
+
+# --- Startup -----------------------------------------------------------------
+STARTUP_INIT_WORKERS = 4  # Subsystems initialized in parallel at launch
+STARTUP_REPORT = True  # Print per-phase startup timings once DISHA is listening
+TRACE_ENABLED = True  # Record per-stage spans for every turn
+TRACE_CAPACITY = 16384  # Spans kept in the ring buffer
+
+# --- Memory Persistence ------------------------------------------------------
+MEMORY_FLUSH_INTERVAL = 2.0  # Seconds between journal flushes (max data lost on crash)
+MEMORY_SNAPSHOT_EVERY = 200  # Journal entries before folding into memory.json
+MEMORY_LAST_COMMANDS = 50  # Recent commands kept in memory
+
+# --- Activity Log ------------------------------------------------------------
+ACTIVITY_LOG_SEGMENT_ENTRIES = 5000  # Lines per segment before rotating
+ACTIVITY_LOG_MAX_SEGMENTS = 20  # Sealed segments kept (older ones are dropped)
 
 # --- Initialize Data Files ---------------------------------------------------
 def _init_data():
@@ -285,6 +394,7 @@ def _init_data():
     
     if not ACTIVITY_LOG_FILE.exists():
         ACTIVITY_LOG_FILE.write_text("[]")
+    ACTIVITY_LOG_DIR.mkdir(exist_ok=True)
 
 
 _init_data()
@@ -0,0 +1,172 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/action_registry.py - Decorator-based action table for dispatch()
+
+Handlers are registered once at import time, so routing an action name is a
+single dict lookup instead of a walk down a chain of ``if action == ...``.
+Every handler also carries its own call / failure counters and a latency
+histogram that can be dumped on demand.
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+# Upper bounds (milliseconds) of the latency histogram buckets.
+# The last bucket catches everything slower.
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class ActionSpec:
+    """One registered action: handler, parameter defaults and metrics."""
+
+    __slots__ = (
+        "name", "handler", "defaults", "dangerous", "gated", "span",
+        "calls", "failures", "errors", "total_ms", "max_ms", "histogram",
+    )
+
+    def __init__(self, name: str, handler: Callable, defaults: dict,
+                 dangerous: bool, gated: bool):
+        self.name = name
+        self.handler = handler
+        self.defaults = defaults
+        self.dangerous = dangerous
+        self.gated = gated          # goes through request_permission()
+        self.span = f"action.{name}"    # tracer span name
+        self.calls = 0
+        self.failures = 0           # handler returned ok == False
+        self.errors = 0             # handler raised
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    @property
+    def needs_params(self) -> bool:
+        """True if a default is an empty slot ("" or []) the caller must fill."""
+        return any(v == "" or v == [] for v in self.defaults.values())
+
+    def record(self, elapsed_ms: float, ok: bool, raised: bool = False):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        self.histogram[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        if raised:
+            self.errors += 1
+        elif not ok:
+            self.failures += 1
+
+    def percentile(self, pct: float) -> float:
+        """Approximate percentile (bucket upper bound) in milliseconds."""
+        if not self.calls:
+            return 0.0
+        target = self.calls * pct / 100.0
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target:
+                if i < len(LATENCY_BUCKETS_MS):
+                    return float(LATENCY_BUCKETS_MS[i])
+                return self.max_ms
+        return self.max_ms
+
+
+class ActionRegistry:
+    """Maps action names to handlers. Build one per entry point."""
+
+    def __init__(self, dangerous_actions: Iterable[str] = (), tracer=None):
+        self._actions: dict[str, ActionSpec] = {}
+        self._dangerous = set(dangerous_actions)
+        self._tracer = tracer       # optional core.tracing.Tracer
+        self._lock = threading.Lock()   # metrics are updated from worker threads too
+
+    def action(self, name: str, gated: bool = True, **defaults):
+        """
+        Decorator registering ``fn(params) -> (ok, msg)`` under ``name``.
+
+        Keyword arguments are the parameter defaults; the handler receives
+        ``params`` with these defaults already filled in.
+        Pass ``gated=False`` for control actions that must bypass the
+        permission prompt (emergency stop, quit, undo).
+        """
+        def decorator(fn: Callable) -> Callable:
+            if name in self._actions:
+                raise ValueError(f"Action '{name}' is already registered.")
+            self._actions[name] = ActionSpec(
+                name, fn, defaults, name in self._dangerous, gated
+            )
+            return fn
+        return decorator
+
+    def get(self, name: str) -> Optional[ActionSpec]:
+        return self._actions.get(name)
+
+    def names(self) -> list[str]:
+        return list(self._actions)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._actions
+
+    def call(self, spec: ActionSpec, params: dict) -> tuple[bool, str]:
+        """Run a handler with defaults applied, recording its metrics."""
+        merged = {**spec.defaults, **(params or {})}
+        token = self._tracer.begin(spec.span) if self._tracer else None
+        start = time.perf_counter()
+        try:
+            ok, msg = spec.handler(merged)
+        except Exception:
+            with self._lock:
+                spec.record((time.perf_counter() - start) * 1000.0, False, raised=True)
+            raise
+        finally:
+            if token is not None:
+                self._tracer.end(token)
+        with self._lock:
+            spec.record((time.perf_counter() - start) * 1000.0, ok)
+        return ok, msg
+
+    # --- Metrics --------------------------------------------------------------
+    def metrics(self) -> dict:
+        """Snapshot of per-action metrics for actions that have been called."""
+        with self._lock:
+            return {
+                spec.name: {
+                    "calls": spec.calls,
+                    "failures": spec.failures,
+                    "errors": spec.errors,
+                    "avg_ms": round(spec.total_ms / spec.calls, 2),
+                    "p50_ms": spec.percentile(50),
+                    "p95_ms": spec.percentile(95),
+                    "max_ms": round(spec.max_ms, 2),
+                    "histogram": dict(zip(
+                        [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + ["slower"],
+                        spec.histogram,
+                    )),
+                }
+                for spec in self._actions.values()
+                if spec.calls
+            }
+
+    def format_metrics(self) -> str:
+        """Human-readable metrics table, slowest actions first."""
+        stats = self.metrics()
+        if not stats:
+            return "No actions have been run yet."
+        lines = [f"  {'action':<22}{'calls':>7}{'fail':>6}{'err':>5}"
+                 f"{'avg ms':>10}{'p50':>8}{'p95':>8}{'max ms':>10}"]
+        for name, s in sorted(stats.items(), key=lambda kv: -kv[1]["avg_ms"]):
+            lines.append(
+                f"  {name:<22}{s['calls']:>7}{s['failures']:>6}{s['errors']:>5}"
+                f"{s['avg_ms']:>10.1f}{s['p50_ms']:>8.0f}{s['p95_ms']:>8.0f}"
+                f"{s['max_ms']:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def reset_metrics(self):
+        with self._lock:
+            for spec in self._actions.values():
+                spec.calls = spec.failures = spec.errors = 0
+                spec.total_ms = spec.max_ms = 0.0
+                spec.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
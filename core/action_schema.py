@@ -0,0 +1,526 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/action_schema.py - Action schema from the registry, tool calls and reply repair
+
+The system prompt used to ask the model to type
+{"action": ..., "params": ..., "explanation": ...} inline, so every reply
+was sniffed for a leading "{" and handed to json.loads(); a missing brace,
+a trailing comma or a Python-style True turned an action into a spoken
+wall of JSON.
+
+ActionSchema builds one tool per registered action, straight from the
+ActionRegistry defaults:
+
+    ""   -> required string      True/False -> boolean
+    None -> nullable string      1 / 1.5    -> number
+    []   -> required array       {}         -> object
+
+A None default says nothing about the type, so a few parameter names
+(``temp``, ``volume``, ...) are known to be numbers. Every tool also
+takes an optional ``explanation``. multi_step is not offered as a tool:
+several function calls in one reply are folded into a multi_step. The pooled clients
+send these as OpenAI ``tools`` / Gemini ``functionDeclarations``, so an
+action comes back as a structured function call and the reply type is
+known from the response shape. Conversation stays plain text, which keeps
+sentence-by-sentence streaming.
+
+When a reply still carries JSON in its text (the legacy prompt, or a model
+ignoring its tools), ActionParser reads it in one pass as chunks arrive and
+repairs it locally instead of asking the provider again: code fences,
+single quotes, bare words, Python literals, raw newlines in strings,
+missing or trailing commas, and a reply cut off mid-object are all fixed.
+Parameters are then coerced to the types the schema says.
+
+Repair table + parse benchmark:
+    python -m core.action_schema
+"""
+
+import json
+import re
+from typing import Any, Optional
+
+_LITERALS = {"true": "true", "false": "false", "null": "null",
+             "True": "true", "False": "false", "None": "null"}
+_WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.+-")
+_CLOSERS = {"{": "}", "[": "]"}
+_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_TRUE_WORDS = {"true", "yes", "on", "1"}
+# Type of a None-default parameter, by name (anything else is a string)
+_NULLABLE_TYPES = {"temp": "number", "temperature": "number", "level": "number",
+                   "volume": "number", "percent": "number", "count": "number",
+                   "minutes": "number", "seconds": "number", "delay": "number"}
+# Registered, but built from several calls rather than called as a tool
+_NOT_TOOLS = {"multi_step"}
+# Runs of string content that need no attention, per quote character
+_PLAIN_RUN = {'"': re.compile(r'[^"\\\n\r\t]+'), "'": re.compile(r"[^'\"\\\n\r\t]+")}
+
+
+class ActionParser:
+    """
+    Single-pass, repairing reader for one JSON object in a reply.
+
+    feed() takes chunks as they stream in and emits normalised JSON as it
+    goes; ``done`` turns True as soon as the top-level object closes, and
+    anything after it (a closing code fence, chatter) is ignored. finish()
+    closes whatever a truncated reply left open and returns the object.
+    """
+
+    def __init__(self):
+        self._out: list[str] = []
+        self._stack: list[str] = []
+        self._quote: Optional[str] = None
+        self._escape = False
+        self._word = ""
+        self._value_end = False         # last token completed a value
+        self._key_start: Optional[int] = None   # where a dangling object key begins
+        self.started = False
+        self.done = False
+        self.repairs = 0
+
+    def feed(self, chunk: str):
+        i, n = 0, len(chunk)
+        while i < n and not self.done:
+            if not self.started:
+                i = chunk.find("{", i)      # skips fences, "json" tags and leading chatter
+                if i < 0:
+                    return
+                self.started = True
+                self._stack.append("{")
+                self._out.append("{")
+                i += 1
+                continue
+            ch = chunk[i]
+            if self._quote:
+                if not self._escape:
+                    m = _PLAIN_RUN[self._quote].match(chunk, i)
+                    if m:
+                        self._out.append(m.group())
+                        i = m.end()
+                        continue
+                self._in_string(ch)
+            elif ch in _WORD_CHARS:
+                if not self._word:
+                    self._begin_token()
+                self._word += ch
+            elif ch in " \t" and self._word and self._out[-1] == ":":
+                self._word += ch            # bare multi-word value: {app: google chrome}
+            else:
+                self._flush_word(ch)
+                self._structural(ch)
+            i += 1
+
+    def _in_string(self, ch: str):
+        out = self._out
+        if self._escape:
+            # \' is only valid inside the single quotes being replaced
+            out.append("'" if ch == "'" and self._quote == "'" else "\\" + ch)
+            self._escape = False
+        elif ch == "\\":
+            self._escape = True         # written with the next character
+        elif ch == self._quote:
+            out.append('"')
+            self._quote = None
+            self._value_end = True
+        elif ch == '"':                 # inside a single-quoted string
+            out.append('\\"')
+        elif ch in _ESCAPES:
+            out.append(_ESCAPES[ch])
+            self.repairs += 1
+        else:
+            out.append(ch)
+
+    def _structural(self, ch: str):
+        out = self._out
+        if ch in " \t\r\n":
+            return
+        if ch in "\"'":
+            self._begin_token()
+            if ch == "'":
+                self.repairs += 1
+            self._quote = ch
+            out.append('"')
+        elif ch in "{[":
+            self._begin_token()
+            self._stack.append(ch)
+            out.append(ch)
+            self._value_end = False
+        elif ch in "}]":
+            if not self._stack:
+                return
+            self._drop_dangling()
+            opener = self._stack.pop()
+            if ch != _CLOSERS[opener]:
+                self.repairs += 1
+            out.append(_CLOSERS[opener])
+            self._value_end = True
+            if not self._stack:
+                self.done = True
+        elif ch == ",":
+            if self._value_end:
+                out.append(",")
+            else:
+                self.repairs += 1
+            self._value_end = False
+        elif ch == ":":
+            out.append(":")
+            self._key_start = None
+            self._value_end = False
+        else:
+            self.repairs += 1           # stray character outside any string
+
+    def _begin_token(self):
+        """A key or value starts: supply a missing comma, note key positions."""
+        out = self._out
+        in_object = self._stack and self._stack[-1] == "{"
+        if in_object and out[-1] != ":":
+            self._key_start = len(out)
+        if self._value_end:
+            out.append(",")
+            self.repairs += 1
+            self._value_end = False
+
+    def _flush_word(self, next_ch: str = ""):
+        word, self._word = self._word.strip(), ""
+        if not word:
+            return
+        if next_ch == ":" and " " in word:
+            # {action: open_app params: ...}: the last word is the next key
+            word, key = word.rsplit(None, 1)
+            self._emit_word(word)
+            self._begin_token()
+            word = key
+        self._emit_word(word)
+
+    def _emit_word(self, word: str):
+        if word in _LITERALS:
+            if _LITERALS[word] != word:
+                self.repairs += 1
+            self._out.append(_LITERALS[word])
+        else:
+            try:
+                float(word)
+                self._out.append(word)
+            except ValueError:
+                self._out.append(json.dumps(word))   # bare key or string value
+                self.repairs += 1
+        self._value_end = True
+
+    def _drop_dangling(self):
+        """Remove a key with no value ({"a": 1, "b"}) and a trailing comma."""
+        out = self._out
+        if self._key_start is not None and self._stack[-1] == "{":
+            del out[self._key_start:]
+            self.repairs += 1
+        self._key_start = None
+        if out[-1] == ",":
+            out.pop()
+            self.repairs += 1
+        elif out[-1] == ":":
+            out.append("null")
+            self.repairs += 1
+
+    def finish(self) -> Optional[Any]:
+        """The parsed object, closing anything a cut-off reply left open."""
+        if not self.started:
+            return None
+        if not self.done:
+            if self._quote:
+                self._out.append('"')
+                self._quote = None
+                self._value_end = True
+            self._flush_word()
+            while self._stack:
+                self._drop_dangling()
+                self._out.append(_CLOSERS[self._stack.pop()])
+                self._value_end = True
+            self.done = True
+            self.repairs += 1
+        try:
+            return json.loads("".join(self._out))
+        except ValueError:
+            return None
+
+
+def _param_schema(default, name: str = "") -> dict:
+    if isinstance(default, bool):
+        return {"type": "boolean"}
+    if isinstance(default, (int, float)):
+        return {"type": "number"}
+    if default is None:
+        return {"type": [_NULLABLE_TYPES.get(name, "string"), "null"]}
+    if isinstance(default, list):
+        item = _param_schema(default[0]) if default else {"type": "object"}
+        return {"type": "array", "items": item}
+    if isinstance(default, dict):
+        return {"type": "object"}
+    return {"type": "string"}
+
+
+def _for_gemini(schema: dict) -> dict:
+    """Gemini's OpenAPI subset: no type lists, "nullable" instead."""
+    out = dict(schema)
+    if isinstance(out.get("type"), list):
+        types = [t for t in out["type"] if t != "null"]
+        out["type"] = types[0]
+        out["nullable"] = True
+    if "items" in out:
+        out["items"] = _for_gemini(out["items"])
+    if "properties" in out:
+        out["properties"] = {k: _for_gemini(v) for k, v in out["properties"].items()}
+    return out
+
+
+class ActionSchema:
+    """Tool definitions, call decoding and reply parsing for one ActionRegistry."""
+
+    def __init__(self, registry):
+        self.defaults: dict[str, dict] = {}
+        self.tools: dict[str, dict] = {}        # name -> JSON schema function
+        for name in registry.names():
+            spec = registry.get(name)
+            self.defaults[name] = spec.defaults
+            if name in _NOT_TOOLS:
+                continue
+            properties = {k: _param_schema(v, k) for k, v in spec.defaults.items()}
+            properties["explanation"] = {
+                "type": "string",
+                "description": "Optional short sentence spoken before the action runs.",
+            }
+            doc = (spec.handler.__doc__ or "").strip().splitlines()
+            self.tools[name] = {
+                "name": name,
+                "description": doc[0] if doc else name.replace("_", " ").capitalize() + ".",
+                "parameters": {
+                    "type": "object",
+                    "properties": properties,
+                    "required": [k for k, v in spec.defaults.items() if v == "" or v == []],
+                },
+            }
+        self._openai = [{"type": "function", "function": tool} for tool in self.tools.values()]
+        self._gemini = [{"functionDeclarations": [
+            {**tool, "parameters": _for_gemini(tool["parameters"])} for tool in self.tools.values()
+        ]}]
+        self.stats = {"tool_calls": 0, "json_replies": 0, "repaired": 0, "unparseable": 0}
+
+    # --- Provider payloads ----------------------------------------------------
+    def openai_tools(self) -> list[dict]:
+        return self._openai
+
+    def gemini_tools(self) -> list[dict]:
+        return self._gemini
+
+    # --- Decoding -------------------------------------------------------------
+    def coerce(self, action: str, params: dict) -> dict:
+        """Bring parameter values to the types the action's defaults declare."""
+        defaults = self.defaults.get(action)
+        if not defaults:
+            return params
+        out = dict(params)
+        for key, value in params.items():
+            if key not in defaults or value is None:
+                continue
+            default = defaults[key]
+            try:
+                if default is None and _NULLABLE_TYPES.get(key) == "number" \
+                        and isinstance(value, str):
+                    out[key] = float(value) if "." in value else int(value)
+                elif isinstance(default, bool) and not isinstance(value, bool):
+                    out[key] = str(value).strip().lower() in _TRUE_WORDS
+                elif isinstance(default, (int, float)) and not isinstance(default, bool) \
+                        and isinstance(value, str):
+                    out[key] = float(value) if "." in value else int(value)
+                elif isinstance(default, str) and not isinstance(value, str):
+                    out[key] = str(value)
+                elif isinstance(default, list) and not isinstance(value, list):
+                    out[key] = [value]
+            except ValueError:
+                pass
+        return out
+
+    def _action(self, name: str, args) -> dict:
+        if isinstance(args, str):
+            parser = ActionParser()
+            parser.feed(args if args.strip() else "{}")
+            parsed = parser.finish()
+            if parser.repairs:
+                self.stats["repaired"] += 1
+            args = parsed if isinstance(parsed, dict) else {}
+        params = dict(args or {})
+        explanation = params.pop("explanation", "") or ""
+        return {"type": "action", "action": name,
+                "params": self.coerce(name, params), "explanation": explanation}
+
+    def from_calls(self, calls: list[tuple[str, Any]]) -> dict:
+        """Function call(s) -> result; several at once become a multi_step."""
+        self.stats["tool_calls"] += 1
+        results = [self._action(name, args) for name, args in calls]
+        if len(results) == 1 or "multi_step" not in self.defaults:
+            return results[0]
+        steps = [{"action": r["action"], "params": r["params"]} for r in results]
+        return {"type": "action", "action": "multi_step", "params": {"steps": steps},
+                "explanation": next((r["explanation"] for r in results if r["explanation"]), "")}
+
+    def from_parsed(self, data, text: str, parser: ActionParser) -> dict:
+        """An ActionParser result -> brain result dict."""
+        if parser.started:
+            self.stats["json_replies"] += 1
+            if data is None:
+                self.stats["unparseable"] += 1
+            elif parser.repairs:
+                self.stats["repaired"] += 1
+        return result_from(data, text, self)
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f"  [SCHEMA] {len(self.tools)} action tools; {s['tool_calls']} tool calls, "
+                f"{s['json_replies']} JSON-in-text replies ({s['repaired']} repaired, "
+                f"{s['unparseable']} unparseable)")
+
+
+def result_from(data, text: str, schema: ActionSchema = None) -> dict:
+    """Parsed reply object (or None) -> brain result dict."""
+    if isinstance(data, dict):
+        action = data.get("action")
+        if isinstance(action, str) and action:
+            params = data.get("params")
+            if not isinstance(params, dict):
+                # {"action": "open_app", "app": "chrome"}: params written flat
+                params = {k: v for k, v in data.items()
+                          if k not in ("action", "params", "explanation")}
+            explanation = data.get("explanation") or ""
+            if schema is not None:
+                params = schema.coerce(action, params)
+            return {"type": "action", "action": action, "params": params,
+                    "explanation": explanation if isinstance(explanation, str) else ""}
+        for key in ("reply", "response", "message", "text"):
+            if isinstance(data.get(key), str):
+                return {"type": "conversation", "reply": data[key].strip()}
+    return {"type": "conversation", "reply": text.strip()}
+
+
+def parse_reply(text: str, schema: ActionSchema = None) -> dict:
+    """Reply text -> brain result dict (inline action JSON or conversation)."""
+    stripped = text.strip()
+    if not (stripped.startswith("{") or stripped.startswith("```")):
+        return {"type": "conversation", "reply": stripped}
+    parser = ActionParser()
+    parser.feed(stripped)
+    data = parser.finish()
+    if schema is not None:
+        return schema.from_parsed(data, stripped, parser)
+    return result_from(data, stripped)
+
+
+# ===========================================================================
+# REPAIR TABLE + BENCHMARK
+# ===========================================================================
+CASES = [
+    # (reply text, expected action or None for conversation, expected params)
+    ('{"action": "open_app", "params": {"app": "chrome"}, "explanation": "Opening Chrome."}',
+     "open_app", {"app": "chrome"}),
+    ('```json\n{"action": "set_volume", "params": {"direction": "down"}}\n```',
+     "set_volume", {"direction": "down"}),
+    ('{"action": "open_app", "params": {"app": "spotify"},}', "open_app", {"app": "spotify"}),
+    ("{'action': 'search_google', 'params': {'query': \"rust's borrow checker\"}}",
+     "search_google", {"query": "rust's borrow checker"}),
+    ('{"action": "wifi_toggle", "params": {"state": False}}', "wifi_toggle", {"state": False}),
+    ('{"action": "wifi_toggle", "params": {"state": "off"}}', "wifi_toggle", {"state": False}),
+    ('{action: open_app, params: {app: notepad}}', "open_app", {"app": "notepad"}),
+    ('{action: open_app, params: {app: google chrome}}', "open_app", {"app": "google chrome"}),
+    ("{'action': 'search_google', 'params': {'query': 'it\\'s raining'}}",
+     "search_google", {"query": "it's raining"}),
+    ('{"action": "open_app" "params": {"app": "chrome"}}', "open_app", {"app": "chrome"}),
+    ('{"action": "write_note", "params": {"text": "line one\nline two"}}',
+     "write_note", {"text": "line one\nline two"}),
+    ('{"action": "search_google", "params": {"query": "weather in pu',
+     "search_google", {"query": "weather in pu"}),
+    ('{"action": "open_app", "params": {"app": "chrome"}, "expl', "open_app", {"app": "chrome"}),
+    ('{"action": "open_app", "app": "vlc"}', "open_app", {"app": "vlc"}),
+    ('{"action": "smart_home_ac", "params": {"action": "on", "temp": null}}',
+     "smart_home_ac", {"action": "on", "temp": None}),
+    ('{"action": "smart_home_ac", "params": {"action": "on", "temp": "22"}}',
+     "smart_home_ac", {"action": "on", "temp": 22}),
+    ('{"reply": "Good morning! How can I help?"}', None, None),
+    ("Sure, I can help with that.", None, None),
+]
+
+
+if __name__ == "__main__":
+    import time
+
+    from core.action_registry import ActionRegistry
+
+    registry = ActionRegistry()
+    for name, defaults in (("open_app", {"app": ""}), ("set_volume", {"direction": "up"}),
+                           ("search_google", {"query": ""}), ("wifi_toggle", {"state": True}),
+                           ("write_note", {"type": "note", "text": "", "title": None, "time": None}),
+                           ("smart_home_ac", {"action": "on", "temp": None}),
+                           ("multi_step", {"steps": []})):
+        registry.action(name, **defaults)(lambda params: (True, ""))
+    schema = ActionSchema(registry)
+
+    def old_parse(text):
+        """The previous shape: strip fences, json.loads, else speak it."""
+        body = text.strip().strip("`")
+        if body.startswith("json"):
+            body = body[4:]
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return {"type": "conversation", "reply": text.strip()}
+        if isinstance(data, dict) and data.get("action"):
+            return {"type": "action", "action": data["action"], "params": data.get("params") or {}}
+        return {"type": "conversation", "reply": text.strip()}
+
+    failures = old_ok = 0
+    for text, action, params in CASES:
+        got = parse_reply(text, schema)
+        if action is None:
+            ok = got["type"] == "conversation" and not got["reply"].startswith("{")
+        else:
+            ok = got.get("action") == action and got.get("params") == params
+        old = old_parse(text)
+        old_ok += (old.get("action") == action and old.get("params") == params) if action \
+            else old["type"] == "conversation" and not old["reply"].startswith("{")
+        failures += not ok
+        shown = f"{got['action']} {got['params']}" if got["type"] == "action" else repr(got["reply"][:30])
+        print(f"  {'ok  ' if ok else 'FAIL'} {text[:46]!r:<50} -> {shown}")
+    print(f"\n  repairing parser: {len(CASES) - failures}/{len(CASES)} correct; "
+          f"old json.loads path: {old_ok}/{len(CASES)} "
+          f"(each miss was a spoken JSON blob or a retry round trip)")
+
+    calls = [("open_app", '{"app": "chrome", "explanation": "Opening Chrome."}'),
+             ("set_volume", {"direction": "down"})]
+    print(f"  two tool calls -> {schema.from_calls(calls)['action']}; "
+          f"{len(json.dumps(schema.openai_tools()))} bytes of tool schema for {len(schema.tools)} actions")
+
+    reply = ('{"action": "write_note", "params": {"type": "note", "text": "'
+             + "remember the milk " * 20 + '", "title": "Shopping"}, "explanation": "Noting that down."}')
+    chunks = [reply[i:i + 4] for i in range(0, len(reply), 4)]     # ~token-sized pieces
+    rounds = 5000
+    spent = tail = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        body = "".join(chunks)
+        mark = time.perf_counter()
+        old_parse(body)
+        done = time.perf_counter()
+        spent += done - start
+        tail += done - mark
+    print(f"  join + json.loads : {spent / rounds * 1e6:6.1f} us CPU, {tail / rounds * 1e6:6.1f} us "
+          f"after the last chunk ({len(reply)} chars in {len(chunks)} chunks)")
+    spent = tail = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        parser = ActionParser()
+        for chunk in chunks:
+            parser.feed(chunk)          # runs while the provider is still sending
+        mark = time.perf_counter()
+        result_from(parser.finish(), reply)
+        done = time.perf_counter()
+        spent += done - start
+        tail += done - mark
+    print(f"  incremental parser: {spent / rounds * 1e6:6.1f} us CPU, {tail / rounds * 1e6:6.1f} us "
+          f"after the last chunk (the CPU is spread over the stream; a retry costs a round trip)")
+    print(schema.summary())
@@ -0,0 +1,174 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/audio_ring.py - Preallocated PCM ring buffer with zero-copy readers
+
+The capture callback copies each microphone frame once, into a fixed slot
+of a preallocated bytearray. Everything downstream - VAD, keyword spotter,
+recognizer, an optional recorder - reads the same memory through
+memoryview slices (or NumPy views) addressed by frame sequence number.
+Nothing is copied again until a finished utterance is joined into the
+single bytes object the recognizer needs.
+
+A view stays valid until the writer wraps around to its slot, i.e. for
+``capacity`` frames (15 s by default); readers that fall further behind
+skip ahead and count the overrun.
+
+Benchmark (per-frame CPU and bytes copied, old copy path vs ring):
+    python -m core.audio_ring
+"""
+
+import threading
+import time
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class PCMRing:
+    """Circular buffer of fixed-size PCM frames, addressed by sequence number."""
+
+    def __init__(self, frame_bytes: int, capacity: int = 500):
+        self.frame_bytes = frame_bytes
+        self.capacity = capacity
+        self._buf = bytearray(frame_bytes * capacity)
+        self._view = memoryview(self._buf)
+        self.write_seq = 0                  # sequence number of the next frame
+        self.bytes_copied = 0               # writer copies + joined segments
+        self._cond = threading.Condition()
+
+    @property
+    def oldest(self) -> int:
+        return max(0, self.write_seq - self.capacity)
+
+    def write(self, data) -> int:
+        """Copy one frame into its slot. Short frames are zero-padded."""
+        seq = self.write_seq
+        start = (seq % self.capacity) * self.frame_bytes
+        n = min(len(data), self.frame_bytes)
+        self._view[start:start + n] = data[:n] if n < len(data) else data
+        if n < self.frame_bytes:
+            self._view[start + n:start + self.frame_bytes] = bytes(self.frame_bytes - n)
+        self.bytes_copied += self.frame_bytes
+        with self._cond:
+            self.write_seq = seq + 1
+            self._cond.notify_all()
+        return seq
+
+    def frame(self, seq: int) -> memoryview:
+        """Zero-copy view of one frame."""
+        if not self.oldest <= seq < self.write_seq:
+            raise IndexError(f"frame {seq} is not in the buffer")
+        start = (seq % self.capacity) * self.frame_bytes
+        return self._view[start:start + self.frame_bytes]
+
+    def samples(self, seq: int):
+        """int16 NumPy view of one frame (memoryview cast without NumPy)."""
+        view = self.frame(seq)
+        return np.frombuffer(view, dtype=np.int16) if np is not None else view.cast("h")
+
+    def views(self, start: int, end: int) -> list[memoryview]:
+        """Frames [start, end) as at most two contiguous views."""
+        start = max(start, self.oldest)
+        end = min(end, self.write_seq)
+        if start >= end:
+            return []
+        first, last = start % self.capacity, (end - 1) % self.capacity
+        fb = self.frame_bytes
+        if first <= last:
+            return [self._view[first * fb:(last + 1) * fb]]
+        return [self._view[first * fb:], self._view[:(last + 1) * fb]]
+
+    def read(self, start: int, end: int) -> bytes:
+        """Frames [start, end) joined into one bytes object - the only copy."""
+        data = b"".join(self.views(start, end))
+        self.bytes_copied += len(data)
+        return data
+
+    def wait(self, seq: int, timeout: float = None) -> bool:
+        """Block until frame ``seq`` has been written."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.write_seq > seq, timeout)
+
+    def cursor(self) -> "RingCursor":
+        return RingCursor(self)
+
+
+class RingCursor:
+    """One consumer's read position; each consumer keeps its own."""
+
+    def __init__(self, ring: PCMRing):
+        self.ring = ring
+        self.seq = ring.write_seq
+        self.dropped = 0
+
+    def next(self, timeout: float = None) -> Optional[int]:
+        """Sequence number of the next unread frame, or None on timeout."""
+        if not self.ring.wait(self.seq, timeout):
+            return None
+        oldest = self.ring.oldest
+        if self.seq < oldest:
+            self.dropped += oldest - self.seq
+            self.seq = oldest
+        seq = self.seq
+        self.seq += 1
+        return seq
+
+
+# ===========================================================================
+# BENCHMARK
+# ===========================================================================
+if __name__ == "__main__":
+    import random
+    import tracemalloc
+    from array import array
+    from collections import deque
+
+    from core.wake_word import EnergyVAD, WakeWordGate
+
+    rate, frame_ms = 16000, 30
+    n = rate * frame_ms // 1000
+    rng = random.Random(5)
+    source = [array("h", (int(rng.gauss(0, 3000 if (i // 33) % 10 == 3 else 120))
+                          for _ in range(n))).tobytes() for i in range(2000)]
+
+    def legacy(frames):
+        """The previous shape: bytes per frame, array() copy for RMS, copied segments."""
+        copied = 0
+        preroll, segment = deque(maxlen=10), []
+        for raw in frames:
+            frame = bytes(raw)                      # read() result
+            samples = array("h", frame)             # RMS input
+            copied += len(frame) * 2
+            rms = (sum(s * s for s in samples) / len(samples)) ** 0.5
+            preroll.append(bytes(frame))
+            segment.append(bytes(frame))
+            copied += len(frame) * 2
+            if rms > 900 and len(segment) > 80:
+                copied += sum(len(f) for f in segment)
+                b"".join(segment)
+                segment = []
+        return copied
+
+    def ring_path(frames):
+        ring = PCMRing(n * 2)
+        gate = WakeWordGate(EnergyVAD(rate, frame_ms), lambda pcm, kind: None, ring=ring)
+        for raw in frames:
+            gate.process(ring.write(raw))
+        return ring.bytes_copied
+
+    for name, fn in (("copying path", legacy), ("ring buffer ", ring_path)):
+        start = time.process_time()
+        copied = fn(source)
+        cpu = time.process_time() - start
+        tracemalloc.start()
+        fn(source)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        audio_s = len(source) * frame_ms / 1000
+        print(f"  {name}: {cpu / len(source) * 1e6:6.0f} us/frame, "
+              f"{copied / audio_s / 1024:7.1f} KiB copied per audio second, "
+              f"peak {peak / 1024:7.1f} KiB")
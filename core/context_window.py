@@ -0,0 +1,264 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/context_window.py - Token-budgeted conversation window with a rolling summary
+
+The conversation used to grow by one entry per add_user()/add_disha() and
+was trimmed by turn count (AI_CONVERSATION_MEMORY), so a few long replies
+inflated every prompt. ContextWindow keeps the recent exchanges in a
+fixed-capacity ring (a bounded deque) under a token budget:
+
+- each entry's token count, provider message dict and transcript line are
+  computed once, when the entry is added;
+- when the budget or the ring capacity is exceeded, the oldest entries are
+  folded into a rolling local summary (one short clause per turn, itself
+  capped in tokens) instead of being dropped silently;
+- messages() / transcript() reuse the cached per-entry pieces, and the
+  transcript is only rebuilt after a fold - appends just extend it.
+
+Prompt size therefore stays flat however long the session runs.
+
+Benchmark (prompt tokens and assembly time over a long session):
+    python -m core.context_window
+"""
+
+import re
+import time
+from collections import deque
+from typing import Callable, Optional
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s")
+_ROLES = {"user": "User", "assistant": "DISHA"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count via tiktoken when installed, else ~4 characters per token."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return max(1, (len(text) + 3) // 4)
+
+
+def _clause(role: str, text: str, max_words: int = 14) -> str:
+    """One summary clause for a folded turn: its first sentence, clipped."""
+    words = _SENTENCE_RE.split(text.strip(), 1)[0].split()
+    clipped = " ".join(words[:max_words]) + ("..." if len(words) > max_words else "")
+    return f"{_ROLES[role]}: {clipped}"
+
+
+class ContextWindow:
+    """Recent turns under a token budget; older turns live on as a summary."""
+
+    def __init__(self, budget_tokens: int = 1500, capacity: int = 64,
+                 summary_tokens: int = 200, count: Callable[[str], int] = estimate_tokens):
+        self.budget_tokens = budget_tokens
+        self.summary_tokens = summary_tokens
+        self._count = count
+        # (role, text, tokens, message dict, transcript line)
+        self._entries: deque = deque(maxlen=capacity)
+        self._tokens = 0
+        self._summary: deque = deque()             # (clause, tokens)
+        self._summary_total = 0
+        self._summary_message: Optional[dict] = None
+        self._transcript = ""
+        self._transcript_stale = False
+        self.folded = 0
+
+    # --- Writers --------------------------------------------------------------
+    def add(self, role: str, text: str):
+        text = text.strip()
+        if not text:
+            return
+        tokens = self._count(text)
+        line = f"{_ROLES[role]}: {text}"
+        while self._entries and (len(self._entries) == self._entries.maxlen
+                                 or self._tokens + tokens > self.budget_tokens):
+            self._fold()
+        self._entries.append((role, text, tokens, {"role": role, "content": text}, line))
+        self._tokens += tokens
+        if not self._transcript_stale:
+            self._transcript = f"{self._transcript}\n{line}" if self._transcript else line
+
+    def add_user(self, text: str):
+        self.add("user", text)
+
+    def add_disha(self, text: str):
+        self.add("assistant", text)
+
+    def clear(self):
+        self._entries.clear()
+        self._summary.clear()
+        self._tokens = self._summary_total = 0
+        self._summary_message = None
+        self._transcript = ""
+        self._transcript_stale = False
+
+    def _fold(self):
+        role, text, tokens, _, _ = self._entries.popleft()
+        self._tokens -= tokens
+        clause = _clause(role, text)
+        clause_tokens = self._count(clause)
+        self._summary.append((clause, clause_tokens))
+        self._summary_total += clause_tokens
+        while self._summary_total > self.summary_tokens and len(self._summary) > 1:
+            self._summary_total -= self._summary.popleft()[1]
+        self._summary_message = None
+        self._transcript_stale = True
+        self.folded += 1
+
+    # --- Readers --------------------------------------------------------------
+    @property
+    def summary(self) -> str:
+        return "; ".join(clause for clause, _ in self._summary)
+
+    @property
+    def tokens(self) -> int:
+        """Tokens in the recent turns plus the summary."""
+        return self._tokens + self._summary_total
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def messages(self) -> list[dict]:
+        """Chat-style messages: the summary (as a system note) then recent turns."""
+        out = []
+        if self._summary:
+            if self._summary_message is None:
+                self._summary_message = {
+                    "role": "system",
+                    "content": f"Earlier in this conversation: {self.summary}",
+                }
+            out.append(self._summary_message)
+        out.extend(entry[3] for entry in self._entries)
+        return out
+
+    def transcript(self) -> str:
+        """Plain-text form for single-prompt providers."""
+        if self._transcript_stale:
+            lines = [entry[4] for entry in self._entries]
+            if self._summary:
+                lines.insert(0, f"(Earlier: {self.summary})")
+            self._transcript = "\n".join(lines)
+            self._transcript_stale = False
+        return self._transcript
+
+    def report(self) -> str:
+        return (f"  [CTX] {len(self._entries)} recent turns, {self._tokens} + "
+                f"{self._summary_total} summary tokens (budget {self.budget_tokens}), "
+                f"{self.folded} folded")
+
+
+class BudgetedContext:
+    """
+    Puts a ContextWindow in front of a ContextManager: the conversation goes
+    to the window, and everything else stays with the wrapped manager, which
+    still sees each turn. With a PronounResolver, the last app / query / url
+    anchors are mirrored into it and resolve_pronouns() uses it.
+
+    Only PooledBrain reads messages() / transcript(). The legacy MultiAIBrain
+    still builds its prompt from the wrapped manager's history, so its
+    prompt size is not bounded by the window.
+    """
+
+    def __init__(self, inner, window: ContextWindow, resolver=None):
+        self._inner = inner
+        self.window = window
+        self.resolver = resolver
+
+    def __getattr__(self, attr):
+        return getattr(self._inner, attr)
+
+    def add_user(self, text: str):
+        self.window.add_user(text)
+        self._inner.add_user(text)
+
+    def add_disha(self, text: str):
+        self.window.add_disha(text)
+        self._inner.add_disha(text)
+
+    def messages(self) -> list[dict]:
+        return self.window.messages()
+
+    def transcript(self) -> str:
+        return self.window.transcript()
+
+    # --- Pronoun anchors ------------------------------------------------------
+    def set_last_app(self, app: str):
+        if self.resolver:
+            self.resolver.set_anchor("app", app)
+        self._inner.set_last_app(app)
+
+    def set_last_query(self, query: str):
+        if self.resolver:
+            self.resolver.set_anchor("query", query)
+        self._inner.set_last_query(query)
+
+    def set_last_url(self, url: str):
+        if self.resolver:
+            self.resolver.set_anchor("url", url)
+        self._inner.set_last_url(url)
+
+    def resolve_pronouns(self, text: str) -> str:
+        if self.resolver:
+            return self.resolver.resolve(text)
+        return self._inner.resolve_pronouns(text)
+
+
+# ===========================================================================
+# BENCHMARK
+# ===========================================================================
+if __name__ == "__main__":
+    import random
+
+    rng = random.Random(3)
+    words = ("open close volume weather search file meeting tomorrow the a of to "
+             "python chrome music note reminder project report brightness").split()
+
+    def sentence(n):
+        return " ".join(rng.choice(words) for _ in range(n)).capitalize() + "."
+
+    turns = [(sentence(rng.randint(3, 10)),
+              " ".join(sentence(rng.randint(6, 14)) for _ in range(rng.choice((1, 1, 2, 8)))))
+             for _ in range(3000)]
+
+    class Unbounded:
+        """Old shape: every exchange kept, prompt serialized from scratch."""
+
+        def __init__(self, last_n=None):
+            self.history = []
+            self.last_n = last_n
+
+        def add_user(self, text):
+            self.history.append(("User", text))
+
+        def add_disha(self, text):
+            self.history.append(("DISHA", text))
+
+        def transcript(self):
+            recent = self.history[-self.last_n * 2:] if self.last_n else self.history
+            return "\n".join(f"{who}: {text}" for who, text in recent)
+
+    for label, ctx in (("keep everything   ", Unbounded()),
+                       ("last 10 exchanges ", Unbounded(10)),
+                       ("token window      ", ContextWindow(1500))):
+        sizes = {}
+        peak = 0
+        spent = 0.0
+        for i, (user, reply) in enumerate(turns, 1):
+            ctx.add_user(user)
+            start = time.perf_counter()
+            prompt = ctx.transcript()
+            spent += time.perf_counter() - start
+            ctx.add_disha(reply)
+            tokens = estimate_tokens(prompt)
+            peak = max(peak, tokens)
+            if i in (100, 1000, 3000):
+                sizes[i] = tokens
+        print(f"  {label}: prompt tokens at turn 100/1000/3000 = "
+              f"{sizes[100]:>6} / {sizes[1000]:>6} / {sizes[3000]:>6} (peak {peak:>6})  "
+              f"assembly {spent / len(turns) * 1e6:7.1f} us/turn")
@@ -0,0 +1,220 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/input_mux.py - Single event-driven queue for keyboard + voice input
+
+One long-lived stdin reader thread and one voice pump thread feed a shared
+queue.Queue, so the main loop blocks on exactly one object and wakes as soon
+as either source produces text.
+
+The reader owns stdin. Anything else that needs a line from the keyboard
+(the permission yes/no and PIN prompts) goes through ask(), which hands the
+next line to the caller instead of queueing it as a new command - so a
+confirmation never turns into a turn of its own or fires barge-in.
+
+Benchmark (wake-to-dispatch latency, legacy 2 s polling vs multiplexer):
+    python -m core.input_mux
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+KEYBOARD = "keyboard"
+VOICE = "voice"
+
+
+class InputMultiplexer:
+    """Merge keyboard lines and recognised voice commands into one queue."""
+
+    def __init__(self, voice_in=None, prompt: str = "  > ",
+                 read_line: Callable[[str], str] = input,
+                 voice_poll: float = 0.5):
+        self._queue: "queue.Queue[tuple[str, str, float]]" = queue.Queue()
+        self._voice_in = voice_in
+        self._prompt = prompt
+        self._read_line = read_line
+        self._voice_poll = voice_poll
+        self._running = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._listeners: list[Callable[[str, str], None]] = []
+        self._answers: deque = deque()      # (thread id, one-slot queue) per ask() caller
+        self._lock = threading.Lock()
+
+    # --- Lifecycle ------------------------------------------------------------
+    def start(self):
+        """Start the reader threads (once; calling again is a no-op)."""
+        if self._running.is_set():
+            return
+        self._running.set()
+        self._spawn(self._keyboard_loop, "disha-stdin")
+        if self._voice_in is not None:
+            self._spawn(self._voice_loop, "disha-voice-pump")
+
+    def stop(self):
+        # The stdin thread stays blocked in input() until the next line; it is
+        # a daemon, so it never keeps the process alive.
+        self._running.clear()
+
+    def _spawn(self, target, name):
+        t = threading.Thread(target=target, name=name, daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    # --- Producers ------------------------------------------------------------
+    def _keyboard_loop(self):
+        while self._running.is_set():
+            try:
+                line = self._read_line("" if self._answers else self._prompt)
+            except (EOFError, KeyboardInterrupt):
+                with self._lock:
+                    while self._answers:
+                        self._answers.popleft()[1].put("")
+                self.put("quit", KEYBOARD)
+                return
+            with self._lock:
+                waiter = self._answers.popleft() if self._answers else None
+            if waiter is not None:
+                waiter[1].put(line)     # an answer to ask(), not a command
+            else:
+                self.put(line, KEYBOARD)
+
+    def ask(self, prompt: str = "", timeout: Optional[float] = None) -> str:
+        """
+        Read one keyboard line for a prompt (drop-in for input()).
+
+        Returns "" if ``timeout`` expires first.
+        """
+        if not self._running.is_set():
+            return self._read_line(prompt)
+        waiter = (threading.get_ident(), queue.Queue(maxsize=1))
+        with self._lock:
+            self._answers.append(waiter)
+        print(prompt, end="", flush=True)
+        try:
+            return waiter[1].get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                if waiter in self._answers:
+                    self._answers.remove(waiter)
+            return ""
+
+    def waiting(self) -> set:
+        """Ids of the threads currently blocked in ask()."""
+        with self._lock:
+            return {ident for ident, _ in self._answers}
+
+    def _voice_loop(self):
+        while self._running.is_set():
+            try:
+                text = self._voice_in.get_command(timeout=self._voice_poll)
+            except Exception:
+                time.sleep(self._voice_poll)
+                continue
+            if text:
+                self.put(text, VOICE)
+
+    def put(self, text: str, source: str = KEYBOARD):
+        """Inject input from any source (also used by tests and replays)."""
+        for listener in self._listeners:
+            listener(source, text)
+        self._queue.put((source, text, time.perf_counter()))
+
+    def add_listener(self, fn: Callable[[str, str], None]):
+        """Call ``fn(source, text)`` the instant input arrives (e.g. barge-in)."""
+        self._listeners.append(fn)
+
+    # --- Consumer -------------------------------------------------------------
+    def get(self, timeout: Optional[float] = None) -> Optional[tuple[str, str, float]]:
+        """
+        Block until input arrives or ``timeout`` expires.
+
+        Returns:
+            (source, text, arrived_at) tuple, or None on timeout.
+            ``arrived_at`` is a time.perf_counter() timestamp.
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+# ===========================================================================
+# BENCHMARK
+# ===========================================================================
+class _FakeVoice:
+    """Stand-in for VoiceInput's command queue."""
+
+    def __init__(self):
+        self.q = queue.Queue()
+        self.sent_at = {}
+
+    def say(self, text):
+        self.sent_at[text] = time.perf_counter()
+        self.q.put(text)
+
+    def has_command(self):
+        return not self.q.empty()
+
+    def get_command(self, timeout=0.1):
+        try:
+            return self.q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+def _blocked_stdin(prompt=""):
+    threading.Event().wait()    # nobody types: stdin blocks forever
+
+
+def _bench_legacy(voice, deadline):
+    """The old loop: poll the voice queue, else spawn a reader and join(2.0)."""
+    latencies = []
+    while time.perf_counter() < deadline:
+        if voice.has_command():
+            text = voice.get_command(timeout=0.1)
+            latencies.append(time.perf_counter() - voice.sent_at[text])
+        else:
+            t = threading.Thread(target=_blocked_stdin, daemon=True)
+            t.start()
+            t.join(timeout=2.0)
+    return latencies
+
+
+def _bench_mux(voice, deadline):
+    mux = InputMultiplexer(voice, read_line=_blocked_stdin)
+    mux.start()
+    latencies = []
+    while time.perf_counter() < deadline:
+        item = mux.get(timeout=0.25)
+        if item:
+            latencies.append(time.perf_counter() - voice.sent_at[item[1]])
+    mux.stop()
+    return latencies
+
+
+def benchmark(commands: int = 10, gap: float = 0.7):
+    import statistics
+
+    for label, loop in (("legacy poll", _bench_legacy), ("multiplexer", _bench_mux)):
+        voice = _FakeVoice()
+        deadline = time.perf_counter() + commands * gap + 2.5
+        threads_before = threading.active_count()
+
+        def feeder():
+            for i in range(commands):
+                time.sleep(gap)
+                voice.say(f"command {i}")
+
+        threading.Thread(target=feeder, daemon=True).start()
+        lat = [x * 1000 for x in loop(voice, deadline)]
+        leaked = threading.active_count() - threads_before
+        print(f"  {label:<12} n={len(lat):<3} "
+              f"p50={statistics.median(lat):8.1f} ms  max={max(lat):8.1f} ms  "
+              f"threads left behind={leaked}")
+
+
+if __name__ == "__main__":
+    benchmark()
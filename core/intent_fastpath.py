@@ -0,0 +1,294 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/intent_fastpath.py - Local intent classifier for common commands
+
+"open chrome", "volume up" or "start work" map straight onto dispatch()
+actions, so they are answered here in microseconds instead of a network
+round trip to the AI provider. The classifier is a token trie compiled at
+startup from the registered action names, the APP_MAP keys and the
+automation names, plus a small table of verb phrases with slot extraction.
+Anything it is not confident about falls through to MultiAIBrain.
+"""
+
+import re
+import time
+from collections import deque
+from typing import Iterable, Optional
+
+_END = "\0"     # trie terminal key
+
+# Leading / trailing filler that never changes the intent
+_LEADING_FILLER = (
+    ("hey", "disha"), ("disha",), ("jarvis",), ("please",),
+    ("can", "you"), ("could", "you"), ("would", "you"), ("will", "you"),
+)
+_TRAILING_FILLER = (("please",), ("for", "me"), ("now",))
+
+_ARTICLES = {"the", "my", "a"}
+
+# Verb phrase -> (slot kind, action)
+_VERBS = {
+    "open": ("app", "open_app"),
+    "open up": ("app", "open_app"),
+    "launch": ("app", "open_app"),
+    "start": ("app", "open_app"),
+    "run": ("app", "open_app"),
+    "close": ("app", "close_app"),
+    "quit": ("app", "close_app"),
+    "exit": ("app", "close_app"),
+    "kill": ("app", "close_app"),
+    "search for": ("query", "search_google"),
+    "search google for": ("query", "search_google"),
+    "google": ("query", "search_google"),
+    "look up": ("query", "search_google"),
+    "youtube": ("query", "play_youtube"),
+    "wikipedia": ("query", "search_wikipedia"),
+    "set volume to": ("level", "set_volume"),
+    "volume to": ("level", "set_volume"),
+    "set brightness to": ("level", "set_brightness"),
+    "brightness to": ("level", "set_brightness"),
+}
+
+# Fixed utterance -> (action, params)
+_FIXED = {
+    "volume up": ("set_volume", {"direction": "up"}),
+    "increase volume": ("set_volume", {"direction": "up"}),
+    "increase the volume": ("set_volume", {"direction": "up"}),
+    "turn up the volume": ("set_volume", {"direction": "up"}),
+    "turn the volume up": ("set_volume", {"direction": "up"}),
+    "louder": ("set_volume", {"direction": "up"}),
+    "volume down": ("set_volume", {"direction": "down"}),
+    "decrease volume": ("set_volume", {"direction": "down"}),
+    "decrease the volume": ("set_volume", {"direction": "down"}),
+    "turn down the volume": ("set_volume", {"direction": "down"}),
+    "turn the volume down": ("set_volume", {"direction": "down"}),
+    "quieter": ("set_volume", {"direction": "down"}),
+    "brightness up": ("set_brightness", {"direction": "up"}),
+    "increase brightness": ("set_brightness", {"direction": "up"}),
+    "increase the brightness": ("set_brightness", {"direction": "up"}),
+    "brighter": ("set_brightness", {"direction": "up"}),
+    "brightness down": ("set_brightness", {"direction": "down"}),
+    "decrease brightness": ("set_brightness", {"direction": "down"}),
+    "decrease the brightness": ("set_brightness", {"direction": "down"}),
+    "dim the screen": ("set_brightness", {"direction": "down"}),
+    "dimmer": ("set_brightness", {"direction": "down"}),
+    "turn on wifi": ("wifi_toggle", {"state": True}),
+    "turn wifi on": ("wifi_toggle", {"state": True}),
+    "wifi on": ("wifi_toggle", {"state": True}),
+    "enable wifi": ("wifi_toggle", {"state": True}),
+    "turn off wifi": ("wifi_toggle", {"state": False}),
+    "turn wifi off": ("wifi_toggle", {"state": False}),
+    "wifi off": ("wifi_toggle", {"state": False}),
+    "disable wifi": ("wifi_toggle", {"state": False}),
+    "turn on bluetooth": ("bluetooth_toggle", {"state": True}),
+    "turn bluetooth on": ("bluetooth_toggle", {"state": True}),
+    "bluetooth on": ("bluetooth_toggle", {"state": True}),
+    "enable bluetooth": ("bluetooth_toggle", {"state": True}),
+    "turn off bluetooth": ("bluetooth_toggle", {"state": False}),
+    "turn bluetooth off": ("bluetooth_toggle", {"state": False}),
+    "bluetooth off": ("bluetooth_toggle", {"state": False}),
+    "disable bluetooth": ("bluetooth_toggle", {"state": False}),
+    "take a screenshot": ("take_screenshot", {}),
+    "screenshot": ("take_screenshot", {}),
+    "stop": ("emergency_stop", {}),
+    "exit": ("quit", {}),
+    "goodbye": ("quit", {}),
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#.]+")
+_LEVEL_RE = re.compile(r"^(\d{1,3})(?: ?%| percent)?$")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-case word tokens; 'wi-fi' and 'wi fi' become 'wifi'."""
+    text = text.lower().replace("wi-fi", "wifi").replace("wi fi", "wifi")
+    return [t.strip(".") for t in _TOKEN_RE.findall(text) if t.strip(".")]
+
+
+class _Trie:
+    """Token trie: nested dicts keyed by token, payload under _END."""
+
+    def __init__(self):
+        self.root: dict = {}
+
+    def insert(self, phrase: str, payload):
+        node = self.root
+        for tok in tokenize(phrase):
+            node = node.setdefault(tok, {})
+        node.setdefault(_END, payload)      # first registration wins
+
+    def exact(self, tokens: list[str], start: int = 0):
+        """Payload if tokens[start:] is exactly one phrase, else None."""
+        node = self.root
+        for i in range(start, len(tokens)):
+            node = node.get(tokens[i])
+            if node is None:
+                return None
+        return node.get(_END)
+
+    def longest_prefix(self, tokens: list[str]):
+        """(payload, length) of the longest phrase that prefixes tokens."""
+        node, best = self.root, (None, 0)
+        for i, tok in enumerate(tokens):
+            node = node.get(tok)
+            if node is None:
+                break
+            if _END in node:
+                best = (node[_END], i + 1)
+        return best
+
+
+class LocalIntentMatcher:
+    """Compiled local classifier. Build once at startup, call match() per turn."""
+
+    def __init__(self, action_names: Iterable[str], app_names: Iterable[str],
+                 automation_names: Iterable[str], threshold: float = 0.85):
+        self.threshold = threshold
+
+        # Whole-utterance phrases (fixed phrases, automations, bare actions)
+        self._phrases = _Trie()
+        for phrase, (action, params) in _FIXED.items():
+            self._phrases.insert(phrase, (action, params, 1.0))
+        for name in automation_names:
+            self._phrases.insert(name, ("run_automation", {"name": name}, 0.95))
+        for name in action_names:
+            self._phrases.insert(name.replace("_", " "), (name, {}, 0.95))
+
+        self._apps = _Trie()
+        for app in app_names:
+            self._apps.insert(app, app)
+
+        self._automations = _Trie()
+        for name in automation_names:
+            self._automations.insert(name, name)
+
+        self._verbs = _Trie()
+        for phrase, payload in _VERBS.items():
+            self._verbs.insert(phrase, payload)
+
+        # Stats
+        self.local_hits = 0
+        self.fallbacks = 0
+        self._local_s: deque = deque(maxlen=2000)
+        self._remote_s: deque = deque(maxlen=2000)
+
+    # --- Matching ----------------------------------------------------------
+    def match(self, text: str) -> Optional[dict]:
+        """
+        Classify an utterance locally.
+
+        Returns:
+            A brain.process()-shaped action result, or None when the input
+            should go to the remote provider.
+        """
+        start = time.perf_counter()
+        intent = self._classify(tokenize(text))
+        elapsed = time.perf_counter() - start
+
+        if intent is None or intent[2] < self.threshold:
+            self.fallbacks += 1
+            return None
+
+        self.local_hits += 1
+        self._local_s.append(elapsed)
+        action, params, confidence = intent
+        return {
+            "type": "action",
+            "action": action,
+            "params": params,
+            "explanation": "",
+            "source": "local",
+            "confidence": confidence,
+        }
+
+    def _classify(self, tokens: list[str]):
+        tokens = self._strip_filler(tokens)
+        if not tokens:
+            return None
+
+        hit = self._phrases.exact(tokens)
+        if hit:
+            action, params, confidence = hit
+            return action, dict(params), confidence
+
+        verb, n = self._verbs.longest_prefix(tokens)
+        if verb is None:
+            return None
+        kind, action = verb
+        rest = tokens[n:]
+
+        if kind == "app":
+            while rest and rest[0] in _ARTICLES:
+                rest = rest[1:]
+            app = self._apps.exact(rest) if rest else None
+            if app:
+                return action, {"app": app}, 0.95
+            # "run focus mode", "start the good morning routine"
+            if action == "open_app":
+                if rest and rest[-1] in ("routine", "automation"):
+                    rest = rest[:-1]
+                name = self._automations.exact(rest) if rest else None
+                if name:
+                    return "run_automation", {"name": name}, 0.95
+            return None
+
+        if kind == "query":
+            if rest[-2:] == ["on", "youtube"]:
+                action, rest = "play_youtube", rest[:-2]
+            return (action, {"query": " ".join(rest)}, 0.9) if rest else None
+
+        if kind == "level":
+            m = _LEVEL_RE.match(" ".join(rest))
+            if m and 0 <= int(m.group(1)) <= 100:
+                return action, {"direction": f"to {int(m.group(1))}"}, 0.95
+            return None
+
+        return None
+
+    @staticmethod
+    def _strip_filler(tokens: list[str]) -> list[str]:
+        changed = True
+        while changed and tokens:
+            changed = False
+            for filler in _LEADING_FILLER:
+                if tuple(tokens[:len(filler)]) == filler:
+                    tokens, changed = tokens[len(filler):], True
+            for filler in _TRAILING_FILLER:
+                if len(tokens) > len(filler) and tuple(tokens[-len(filler):]) == filler:
+                    tokens, changed = tokens[:-len(filler)], True
+        # "play despacito on youtube" has no leading verb in _VERBS
+        if tokens[:1] == ["play"] and tokens[-2:] == ["on", "youtube"]:
+            tokens = ["youtube"] + tokens[1:-2]
+        return tokens
+
+    # --- Reporting ---------------------------------------------------------
+    def record_remote(self, seconds: float):
+        """Record the latency of a turn that went to the remote provider."""
+        self._remote_s.append(seconds)
+
+    @staticmethod
+    def _pct(samples, pct: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def report(self) -> str:
+        total = self.local_hits + self.fallbacks
+        if not total:
+            return "  Local intents: no requests yet."
+        lines = [
+            f"  Local intents: {self.local_hits}/{total} served locally "
+            f"({100.0 * self.local_hits / total:.0f}%)",
+            f"    local  p50={self._pct(self._local_s, 50) * 1e6:8.1f} us  "
+            f"p99={self._pct(self._local_s, 99) * 1e6:8.1f} us",
+        ]
+        if self._remote_s:
+            for pct in (50, 99):
+                saved = self._pct(self._remote_s, pct) - self._pct(self._local_s, pct)
+                lines.append(
+                    f"    p{pct} remote={self._pct(self._remote_s, pct) * 1000:8.1f} ms"
+                    f"  saved per local turn={saved * 1000:8.1f} ms"
+                )
+        return "\n".join(lines)
@@ -0,0 +1,194 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/pronouns.py - Precompiled, typed pronoun resolution
+
+resolve_pronouns() runs on every utterance before anything else. The
+resolver compiles every "verb + pronoun" rule into ONE alternation regex at
+startup, and each alternative is a named group that states which anchor it
+wants:
+
+    "close it"           -> app    -> "close spotify"
+    "search that again"  -> query  -> "search python heapq again"
+    "play it on youtube" -> query  -> "play python heapq on youtube"
+    "go there"           -> url    -> "go github.com"
+
+A cheap gate pattern (any possible object word) turns most utterances
+away before the big alternation runs; otherwise one scan finds every
+pronoun site, m.lastgroup names the anchor kind, and the anchor is a dict
+lookup. Utterances without a match come back unchanged, as the same object. A pronoun
+whose anchor is not set yet is left alone for the brain to handle.
+
+Correctness table + microbenchmark:
+    python -m core.pronouns
+"""
+
+import re
+from typing import Optional
+
+# Bare this/that is only a pronoun at the end or before a trailing word
+# ("open that again"); before anything else it is a determiner ("close
+# this tab", "find that file") and is left alone.
+_TRAILING = (r"again|please|now|then|too|instead|up|down|on|off|in|out|back|"
+             r"for|to|from|with|and|or|here|there|later|first|right|already")
+PRONOUNS = (r"(?:it|them|that\s+one|this\s+one|"
+            rf"(?:that|this)(?!\s+(?!(?:{_TRAILING})\b)[a-z]))")
+
+# Anchor kind -> (verbs whose bare pronoun object is that kind,
+#                 object phrases that name the kind whatever the verb).
+# Kinds are tried in this order, so "open it" is an app but "open that
+# link" is a url.
+RULES: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    "url": (
+        (r"go\s+back\s+to", r"go\s+to", r"go", r"visit", r"bookmark", r"navigate\s+to"),
+        (r"there", r"(?:that|this)\s+(?:link|site|website|page|url)"),
+    ),
+    "query": (
+        (r"search\s+(?:google\s+|youtube\s+)?for", r"search", r"google", r"look\s+up",
+         r"find", r"play", r"youtube", r"wikipedia", r"look", r"read\s+about"),
+        (r"(?:that|this)\s+(?:search|query|song|video)",),
+    ),
+    "app": (
+        (r"open", r"close", r"quit", r"exit", r"kill", r"launch", r"start", r"restart",
+         r"run", r"minimi[sz]e", r"maximi[sz]e", r"switch\s+to", r"focus", r"reopen"),
+        (r"(?:that|this)\s+(?:app|application|program|window)",),
+    ),
+}
+
+# A pronoun followed by a copula is a question about it, not an object
+_NOT_OBJECT = r"(?!\s*(?:is|was|'s)\b)"
+
+
+def _compile(rules: dict) -> re.Pattern:
+    """One alternation; group "<kind>_<n>" captures the verb and its space."""
+    all_verbs = "|".join(v for verbs, _ in rules.values() for v in verbs)
+    alternatives = []
+    for kind, (_, nouns) in rules.items():          # typed by the object phrase
+        for noun in nouns:
+            name = f"{kind}_{len(alternatives)}"
+            alternatives.append(rf"(?P<{name}>\b(?:{all_verbs})\s+){noun}\b")
+    for kind, (verbs, nouns) in rules.items():      # typed by the verb
+        objects = "|".join((PRONOUNS,) + tuple(n for n in nouns if "\\s" not in n))
+        name = f"{kind}_{len(alternatives)}"
+        alternatives.append(
+            rf"(?P<{name}>\b(?:{'|'.join(verbs)})\s+)(?:{objects})\b{_NOT_OBJECT}"
+        )
+    return re.compile("|".join(alternatives), re.IGNORECASE)
+
+
+def _compile_gate(rules: dict) -> re.Pattern:
+    """Matches any object a rule could rewrite; no match means nothing to do."""
+    objects = "|".join((PRONOUNS,) + tuple(n for _, nouns in rules.values() for n in nouns))
+    return re.compile(rf"\b(?:{objects})\b", re.IGNORECASE)
+
+
+class PronounResolver:
+    """Typed anchors + one compiled pattern; see the module docstring."""
+
+    def __init__(self, rules: dict = None):
+        self._gate = _compile_gate(rules or RULES)
+        self._pattern = _compile(rules or RULES)
+        self._kinds = {name: name.rsplit("_", 1)[0] for name in self._pattern.groupindex}
+        self.anchors: dict[str, str] = {}
+
+    def set_anchor(self, kind: str, value: Optional[str]):
+        if value:
+            self.anchors[kind] = value.strip()
+
+    def _replace(self, m: re.Match) -> str:
+        value = self.anchors.get(self._kinds[m.lastgroup])
+        if value is None:
+            return m.group(0)
+        return m.group(m.lastgroup) + value
+
+    def resolve(self, text: str) -> str:
+        if not self.anchors or not self._gate.search(text):
+            return text
+        return self._pattern.sub(self._replace, text)
+
+
+# ===========================================================================
+# CORRECTNESS TABLE + BENCHMARK
+# ===========================================================================
+CASES = [
+    # (anchors, utterance, expected)
+    ({"app": "spotify"}, "close it", "close spotify"),
+    ({"app": "spotify"}, "Close it please", "Close spotify please"),
+    ({"app": "spotify"}, "open that again", "open spotify again"),
+    ({"app": "spotify"}, "switch to that app", "switch to spotify"),
+    ({"app": "chrome"}, "minimize this window", "minimize chrome"),
+    ({"query": "python heapq"}, "search that again", "search python heapq again"),
+    ({"query": "python heapq"}, "play it on youtube", "play python heapq on youtube"),
+    ({"query": "python heapq"}, "look it up", "look python heapq up"),
+    ({"query": "python heapq"}, "search for it on wikipedia", "search for python heapq on wikipedia"),
+    ({"url": "github.com"}, "go there", "go github.com"),
+    ({"url": "github.com"}, "open that link", "open github.com"),
+    ({"url": "github.com"}, "bookmark this page", "bookmark github.com"),
+    ({"app": "spotify", "query": "lofi"}, "close it and play that", "close spotify and play lofi"),
+    ({"app": "spotify", "query": "lofi", "url": "github.com"},
+     "open it", "open spotify"),
+    ({"app": "spotify"}, "search it", "search it"),           # no query anchor yet
+    ({"app": "spotify"}, "what is that", "what is that"),
+    ({"app": "spotify"}, "open it is broken", "open it is broken"),
+    ({"app": "spotify"}, "tell me a joke", "tell me a joke"),
+    ({"app": "spotify"}, "italy opening hours", "italy opening hours"),
+    ({}, "close it", "close it"),
+    ({"app": "spotify"}, "open this folder", "open this folder"),
+    ({"app": "spotify"}, "close this tab", "close this tab"),
+    ({"query": "python heapq"}, "find that file", "find that file"),
+    ({"app": "spotify"}, "open the app store", "open the app store"),
+    ({"app": "spotify"}, "open that one", "open spotify"),
+    ({"query": "lofi"}, "play this on youtube", "play lofi on youtube"),
+]
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    failures = 0
+    for anchors, text, expected in CASES:
+        r = PronounResolver()
+        for kind, value in anchors.items():
+            r.set_anchor(kind, value)
+        got = r.resolve(text)
+        ok = got == expected
+        failures += not ok
+        print(f"  {'ok  ' if ok else 'FAIL'} {text!r:<34} -> {got!r}"
+              + ("" if ok else f"   (expected {expected!r})"))
+    print(f"\n  {len(CASES) - failures}/{len(CASES)} cases pass\n")
+
+    def naive(anchors: dict, text: str) -> str:
+        """The scan-per-rule shape: every rule re-searched on every utterance."""
+        for kind, (verbs, nouns) in RULES.items():
+            value = anchors.get(kind)
+            if not value:
+                continue
+            for noun in nouns:
+                text = re.sub(rf"(\b\w+\s+){noun}\b", lambda m: m.group(1) + value,
+                              text, flags=re.IGNORECASE)
+            for verb in verbs:
+                text = re.sub(rf"(\b{verb}\s+){PRONOUNS}\b{_NOT_OBJECT}",
+                              lambda m: m.group(1) + value, text, flags=re.IGNORECASE)
+        return text
+
+    rng = random.Random(11)
+    plain = ["what's the time", "tell me a joke", "volume up", "set brightness to 40",
+             "open chrome", "search google for python heapq", "take a screenshot",
+             "how is the weather in pune today", "remind me to call mom at six"]
+    pronoun = ["close it", "play it on youtube", "search that again", "go there",
+               "open that link", "switch to that app"]
+    corpus = [rng.choice(pronoun if rng.random() < 0.2 else plain) for _ in range(200_000)]
+    anchors = {"app": "spotify", "query": "python heapq", "url": "github.com"}
+    resolver = PronounResolver()
+    for kind, value in anchors.items():
+        resolver.set_anchor(kind, value)
+
+    for label, fn in (("per-rule scans", lambda t: naive(anchors, t)),
+                      ("compiled      ", resolver.resolve)):
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        elapsed = time.perf_counter() - start
+        print(f"  {label}: {elapsed / len(corpus) * 1e6:6.2f} us/utterance "
+              f"({len(corpus):,} utterances, 20% with pronouns)")
@@ -0,0 +1,542 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/provider_pool.py - Pooled, warmed and hedged AI provider clients
+
+The SDK clients open a fresh connection when the previous one has gone
+cold, so the first request after a pause pays DNS + TCP + TLS before the
+model even starts. Here each provider has one requests.Session, with a
+keep-alive connection pool, talking to its REST endpoint directly:
+
+- warm(): a cheap GET (the model/metadata endpoint) at startup opens the
+  connection before the first real request. While the session is in use
+  (AI_KEEPALIVE_WINDOW after the last request), an idle connection is
+  pinged every AI_KEEPALIVE_INTERVAL so it never goes cold.
+- Hedged requests ("auto" mode with both keys): if the first provider has
+  not answered (or, when streaming, sent its first token) by its own p95
+  latency, the same prompt goes to the second provider and whichever
+  answers first wins; the loser's response is dropped.
+- Base URLs are configurable, so the whole path can be exercised against
+  a local stand-in server (see the benchmark below).
+
+With an ActionSchema attached, every request offers the registered actions
+as provider tools, and function calls come back already decoded (see
+core.action_schema); plain text is conversation.
+
+PooledBrain has MultiAIBrain's interface (process, process_stream,
+get_provider). Providers are tried in the order core.provider_router
+picks from their observed health; when every one fails or is tripped,
+the fallback brain answers.
+
+Benchmark (local stand-in server, simulated handshake and tail latency):
+    python -m core.provider_pool
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.action_schema import ActionSchema, parse_reply
+from core.provider_router import ProviderRouter
+from core.speech_stream import StreamInterrupted
+
+
+class ProviderBusy(RuntimeError):
+    """The provider is half-open and its one trial request is already out."""
+
+
+def _claimed(client, fn, *args):
+    """Run ``fn`` only if the router lets a request go to ``client`` now."""
+    if client.health is not None and not client.health.claim():
+        raise ProviderBusy(f"{client.name} is half-open with a trial already in flight")
+    return fn(*args)
+
+
+class ProviderClient:
+    """One provider: a keep-alive session plus latency bookkeeping."""
+
+    name = ""
+
+    def __init__(self, api_key: str, model: str, base_url: str,
+                 timeout: float = 20.0, pool_size: int = 4):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(self._headers())
+        self.latencies: deque = deque(maxlen=200)      # complete(): whole reply
+        self.first_token: deque = deque(maxlen=200)    # stream(): first chunk
+        self.last_used = 0.0
+        self.requests = self.errors = 0
+        self.health = None      # ProviderHealth, attached by ProviderRouter
+        self.schema: Optional[ActionSchema] = None     # attached by PooledBrain
+
+    # --- Provider specifics ---------------------------------------------------
+    def _headers(self) -> dict:
+        return {}
+
+    def _warm_url(self) -> str:
+        raise NotImplementedError
+
+    def _request(self, system: str, messages: list[dict], max_tokens: int,
+                 temperature: float, stream: bool) -> tuple[str, dict]:
+        raise NotImplementedError
+
+    def _result(self, data: dict) -> dict:
+        """A whole response -> brain result dict."""
+        raise NotImplementedError
+
+    def _delta(self, data: dict, calls: dict) -> str:
+        """Text in one stream event; function-call pieces are collected in ``calls``."""
+        raise NotImplementedError
+
+    def _reply(self, text: str, calls: list) -> dict:
+        if calls and self.schema is not None:
+            return self.schema.from_calls(calls)
+        return parse_reply(text, self.schema)
+
+    # --- Calls ----------------------------------------------------------------
+    def complete(self, system: str, messages: list[dict],
+                 max_tokens: int = 1024, temperature: float = 0.7) -> dict:
+        url, payload = self._request(system, messages, max_tokens, temperature, stream=False)
+        start = time.perf_counter()
+        self.requests += 1
+        try:
+            resp = self.session.post(url, json=payload, timeout=self.timeout)
+            resp.raise_for_status()
+            result = self._result(resp.json())
+        except Exception as e:
+            self.errors += 1
+            if self.health:
+                self.health.failure(e)
+            raise
+        finally:
+            self.last_used = time.monotonic()
+        elapsed = time.perf_counter() - start
+        self.latencies.append(elapsed)
+        if self.health:
+            self.health.success(elapsed)
+        return result
+
+    def stream(self, system: str, messages: list[dict],
+               max_tokens: int = 1024, temperature: float = 0.7) -> Iterator[Union[str, dict]]:
+        """Text chunks as they arrive; a function call is yielded last, decoded."""
+        url, payload = self._request(system, messages, max_tokens, temperature, stream=True)
+        start = time.perf_counter()
+        self.requests += 1
+        try:
+            with self.session.post(url, json=payload, timeout=self.timeout, stream=True) as resp:
+                resp.raise_for_status()
+                resp.encoding = "utf-8"     # SSE is UTF-8 whatever the headers say
+                first = True
+                calls: dict = {}        # call index -> [name, arguments]
+                for line in resp.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = self._delta(json.loads(data), calls)
+                    if first and (chunk or calls):
+                        elapsed = time.perf_counter() - start
+                        self.first_token.append(elapsed)
+                        if self.health:
+                            self.health.success(elapsed)
+                        first = False
+                    if chunk:
+                        yield chunk
+                if calls:
+                    yield self._reply("", [tuple(calls[i]) for i in sorted(calls)])
+        except Exception as e:
+            self.errors += 1
+            if self.health:
+                self.health.failure(e)
+            raise
+        finally:
+            self.last_used = time.monotonic()
+
+    def warm(self) -> bool:
+        """Open (or refresh) a pooled connection with a cheap request."""
+        try:
+            self.session.get(self._warm_url(), timeout=5).close()
+            return True
+        except requests.RequestException:
+            return False
+        finally:
+            self.last_used = time.monotonic()
+
+    def p95(self, streaming: bool = False) -> Optional[float]:
+        samples = self.first_token if streaming else self.latencies
+        if len(samples) < 5:
+            return None
+        ordered = sorted(samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+class OpenAIClient(ProviderClient):
+    name = "openai"
+
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    def _warm_url(self) -> str:
+        return f"{self.base_url}/models/{self.model}"
+
+    def _request(self, system, messages, max_tokens, temperature, stream):
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "system", "content": system}] + messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": stream,
+        }
+        if self.schema is not None:
+            payload["tools"] = self.schema.openai_tools()
+        return f"{self.base_url}/chat/completions", payload
+
+    def _result(self, data: dict) -> dict:
+        message = data["choices"][0]["message"]
+        calls = [(c["function"]["name"], c["function"].get("arguments") or "")
+                 for c in message.get("tool_calls") or []]
+        return self._reply(message.get("content") or "", calls)
+
+    def _delta(self, data: dict, calls: dict) -> str:
+        choices = data.get("choices") or [{}]
+        delta = choices[0].get("delta", {})
+        for piece in delta.get("tool_calls") or []:
+            # Name first, then the arguments JSON a few characters at a time
+            call = calls.setdefault(piece.get("index", 0), ["", ""])
+            function = piece.get("function", {})
+            call[0] += function.get("name") or ""
+            call[1] += function.get("arguments") or ""
+        return delta.get("content") or ""
+
+
+class GeminiClient(ProviderClient):
+    name = "gemini"
+
+    def _headers(self) -> dict:
+        return {"x-goog-api-key": self.api_key}
+
+    def _warm_url(self) -> str:
+        return f"{self.base_url}/models/{self.model}"
+
+    def _request(self, system, messages, max_tokens, temperature, stream):
+        # Gemini has no system role inside contents: fold summaries into the instruction
+        notes = [m["content"] for m in messages if m["role"] == "system"]
+        contents = [
+            {"role": "model" if m["role"] == "assistant" else "user", "parts": [{"text": m["content"]}]}
+            for m in messages if m["role"] != "system"
+        ]
+        payload = {
+            "systemInstruction": {"parts": [{"text": "\n\n".join([system] + notes)}]},
+            "contents": contents,
+            "generationConfig": {"maxOutputTokens": max_tokens, "temperature": temperature},
+        }
+        if self.schema is not None:
+            payload["tools"] = self.schema.gemini_tools()
+        method = "streamGenerateContent?alt=sse" if stream else "generateContent"
+        return f"{self.base_url}/models/{self.model}:{method}", payload
+
+    def _delta(self, data: dict, calls: dict) -> str:
+        candidates = data.get("candidates") or [{}]
+        parts = candidates[0].get("content", {}).get("parts", [])
+        for part in parts:
+            if "functionCall" in part:      # Gemini sends each call whole
+                call = part["functionCall"]
+                calls[len(calls)] = [call.get("name", ""), call.get("args") or {}]
+        return "".join(p.get("text", "") for p in parts)
+
+    def _result(self, data: dict) -> dict:
+        calls: dict = {}
+        text = self._delta(data, calls)
+        return self._reply(text, [tuple(calls[i]) for i in sorted(calls)])
+
+
+class PooledBrain:
+    """MultiAIBrain-compatible brain over pooled provider clients."""
+
+    def __init__(self, context, clients: list[ProviderClient], fallback=None,
+                 system_prompt: str = "", max_tokens: int = 1024, temperature: float = 0.7,
+                 hedge: bool = True, hedge_min_delay: float = 0.8, hedge_default_delay: float = 2.5,
+                 keepalive_interval: float = 45.0, keepalive_window: float = 1800.0,
+                 router_options: dict = None, schema: ActionSchema = None):
+        self._context = context
+        self.clients = clients
+        self.schema = schema
+        for client in clients:
+            client.schema = schema
+        self.router = ProviderRouter(clients, **(router_options or {}))
+        self._fallback = fallback
+        self.system_prompt = system_prompt
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.hedge = hedge and len(clients) > 1
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_window = keepalive_window
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="disha-ai")
+        self._last_request = time.monotonic()
+        self._stop = threading.Event()
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "fallbacks": 0, "warmups": 0}
+
+    # --- Lifecycle ------------------------------------------------------------
+    def start(self):
+        """Warm every connection now and keep them warm in the background."""
+        threading.Thread(target=self._keepalive_loop, name="disha-ai-keepalive", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False)
+
+    def _keepalive_loop(self):
+        for client in self.clients:
+            self.stats["warmups"] += client.warm()
+        while not self._stop.wait(self.keepalive_interval / 3):
+            now = time.monotonic()
+            if now - self._last_request > self.keepalive_window:
+                continue        # nobody is talking to DISHA; let connections close
+            for client in self.clients:
+                if now - client.last_used >= self.keepalive_interval:
+                    self.stats["warmups"] += client.warm()
+
+    # --- Brain interface ------------------------------------------------------
+    def get_provider(self) -> str:
+        best = self.router.best()
+        if best == "offline" and self._fallback is not None:
+            return self._fallback.get_provider()
+        return best
+
+    def _prompt(self, text: str) -> list[dict]:
+        """Context window messages, with the latest user turn as resolved text."""
+        messages = self._context.messages() if hasattr(self._context, "messages") else []
+        if messages and messages[-1]["role"] == "user":
+            messages = messages[:-1]
+        return messages + [{"role": "user", "content": text}]
+
+    def process(self, text: str) -> dict:
+        self._last_request = time.monotonic()
+        self.stats["requests"] += 1
+        try:
+            return self._complete(self._prompt(text))
+        except Exception as e:
+            print(f"  [AI] Providers failed ({e}); using fallback.")
+            return self._fall_back(text)
+
+    def process_stream(self, text: str) -> Iterator[Union[str, dict]]:
+        """Tokens from whichever provider starts answering first."""
+        self._last_request = time.monotonic()
+        self.stats["requests"] += 1
+        winner = self._first_stream(self._prompt(text))
+        if winner is None:
+            yield self._fall_back(text)     # a whole result; StreamingSpeaker returns it
+            return
+        first, rest = winner
+        yield first
+        try:
+            yield from rest
+        except Exception as e:
+            # Half the reply is already spoken; restarting it would repeat
+            # it, so the streamer keeps what arrived and marks it partial
+            print(f"  [AI] Stream interrupted: {e}")
+            raise StreamInterrupted(str(e)) from e
+
+    def _first_stream(self, messages: list[dict]) -> Optional[tuple[Union[str, dict], Iterator]]:
+        """(first chunk, remaining chunks) from the first provider to answer."""
+        args = (self.system_prompt, messages, self.max_tokens, self.temperature)
+
+        def open_stream(client):
+            chunks = client.stream(*args)
+            return self._executor.submit(_claimed, client, next, chunks, None), chunks
+
+        order = self.router.order()
+        if not order:
+            return None
+        future, chunks = open_stream(order[0])
+        candidates, tried, hedge = {future: chunks}, 1, None
+        if self.hedge and len(order) > 1:
+            done, _ = wait([future], timeout=self._hedge_delay(order[0], streaming=True))
+            if not done:
+                self.stats["hedged"] += 1
+                hedge, chunks = open_stream(order[1])
+                candidates[hedge] = chunks
+                tried = 2
+        while candidates:
+            done, _ = wait(candidates, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunks = candidates.pop(future)
+                if future.exception() is None and future.result():
+                    for loser, loser_chunks in candidates.items():
+                        # Closing the generator drops its HTTP response
+                        loser.add_done_callback(lambda _, g=loser_chunks: g.close())
+                    if future is hedge:
+                        self.stats["hedge_wins"] += 1
+                    return future.result(), chunks
+                print(f"  [AI] Stream failed: {future.exception() or 'empty reply'}")
+            if not candidates and tried < len(order):
+                future, chunks = open_stream(order[tried])
+                candidates[future] = chunks
+                tried += 1
+        return None
+
+    def _fall_back(self, text: str) -> dict:
+        """The fallback's answer, tagged so it is never cached as a provider's."""
+        self.stats["fallbacks"] += 1
+        if self._fallback is not None:
+            result = dict(self._fallback.process(text))
+        else:
+            result = {"type": "conversation",
+                      "reply": "I'm having trouble reaching my AI providers right now."}
+        result["provider"] = "offline"
+        return result
+
+    def _hedge_delay(self, client: ProviderClient, streaming: bool = False) -> float:
+        p95 = client.p95(streaming)
+        return max(self.hedge_min_delay, p95) if p95 is not None else self.hedge_default_delay
+
+    def _complete(self, messages: list[dict]) -> dict:
+        order = self.router.order()
+        if not order:
+            raise RuntimeError("every provider is tripped")
+        args = (self.system_prompt, messages, self.max_tokens, self.temperature)
+        first = self._executor.submit(_claimed, order[0], order[0].complete, *args)
+        pending, hedge, tried, error = {first}, None, 1, None
+        if self.hedge and len(order) > 1:
+            done, _ = wait([first], timeout=self._hedge_delay(order[0]))
+            if not done:
+                # Primary is slower than usual: race the next provider
+                self.stats["hedged"] += 1
+                hedge = self._executor.submit(_claimed, order[1], order[1].complete, *args)
+                pending.add(hedge)
+                tried = 2
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self.stats["hedge_wins"] += 1
+                    return future.result()
+                error = future.exception()
+            if not pending and tried < len(order):      # fail over down the list
+                pending.add(self._executor.submit(_claimed, order[tried], order[tried].complete, *args))
+                tried += 1
+        raise error
+
+    def report(self) -> str:
+        s = self.stats
+        lines = [f"  [AI] {s['requests']} requests, {s['hedged']} hedged "
+                 f"({s['hedge_wins']} won by the hedge), {s['fallbacks']} fallbacks, "
+                 f"{s['warmups']} warm-up pings"]
+        lines.append(self.router.status())
+        if self.schema is not None:
+            lines.append(self.schema.summary())
+        return "\n".join(lines)
+
+
+def build_clients(gemini_key: str, openai_key: str, gemini_model: str, openai_model: str,
+                  gemini_url: str, openai_url: str, timeout: float) -> list[ProviderClient]:
+    """Clients in "auto" preference order: Gemini (free tier) first, then OpenAI."""
+    clients: list[ProviderClient] = []
+    if gemini_key:
+        clients.append(GeminiClient(gemini_key, gemini_model, gemini_url, timeout))
+    if openai_key:
+        clients.append(OpenAIClient(openai_key, openai_model, openai_url, timeout))
+    return clients
+
+
+# ===========================================================================
+# BENCHMARK - local stand-in server speaking the OpenAI chat protocol
+# ===========================================================================
+if __name__ == "__main__":
+    import random
+    import statistics
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    def stand_in(handshake_ms: float, latency_ms: float, tail_ms: float, tail_rate: float, seed: int):
+        """Server that charges handshake_ms per new connection, like a TLS setup."""
+        rng = random.Random(seed)
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                time.sleep(handshake_ms / 1000)
+                super().setup()
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body: dict):
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._send({"id": "stand-in"})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                slow = rng.random() < tail_rate
+                time.sleep((tail_ms if slow else latency_ms) / 1000)
+                self._send({"choices": [{"message": {"content": "Sure."}}]})
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, f"http://127.0.0.1:{server.server_port}/v1"
+
+    def pct(values, p):
+        ordered = sorted(values)
+        return ordered[int(p / 100 * (len(ordered) - 1))] * 1000
+
+    messages = [{"role": "user", "content": "hello"}]
+
+    # 1. Cold connection per request vs one pooled keep-alive session
+    server, url = stand_in(handshake_ms=80, latency_ms=120, tail_ms=120, tail_rate=0, seed=1)
+    for label, pooled in (("new connection each time", False), ("pooled keep-alive      ", True)):
+        client = OpenAIClient("key", "stand-in", url)
+        if pooled:
+            client.warm()
+        times = []
+        for _ in range(20):
+            if not pooled:
+                client.session.close()
+            start = time.perf_counter()
+            client.complete("", messages)
+            times.append(time.perf_counter() - start)
+        print(f"  {label}: p50 {pct(times, 50):6.0f} ms  p95 {pct(times, 95):6.0f} ms")
+    server.shutdown()
+
+    # 2. Heavy-tailed primary, with and without a hedge to a second provider
+    primary_srv, primary_url = stand_in(0, 100, 1500, 0.04, seed=2)
+    second_srv, second_url = stand_in(0, 140, 140, 0.0, seed=3)
+    for label, hedge in (("single provider", False), ("hedged at p95  ", True)):
+        clients = [OpenAIClient("key", "stand-in", primary_url), OpenAIClient("key", "stand-in", second_url)]
+        brain = PooledBrain(None, clients, hedge=hedge, hedge_min_delay=0.2)
+        for c in clients:
+            c.warm()
+        times = []
+        for _ in range(150):
+            start = time.perf_counter()
+            brain._complete(messages)
+            times.append(time.perf_counter() - start)
+        print(f"  {label}: p50 {pct(times, 50):6.0f} ms  p99 {pct(times, 99):6.0f} ms  "
+              f"mean {statistics.mean(times) * 1000:6.0f} ms  "
+              f"hedged {brain.stats['hedged']}, hedge wins {brain.stats['hedge_wins']}")
+        brain.stop()
+    primary_srv.shutdown()
+    second_srv.shutdown()
@@ -0,0 +1,247 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/provider_router.py - Route each AI request by observed provider health
+
+The provider used to be picked once at startup. The router keeps a
+ProviderHealth per client, which the client updates after every call:
+
+- EWMA latency (whole reply, or first token when streaming) and EWMA
+  error rate;
+- quota state: HTTP 429 / RESOURCE_EXHAUSTED takes the provider out until
+  its Retry-After (or AI_QUOTA_COOLDOWN) has passed;
+- a circuit breaker: AI_BREAKER_FAILURES consecutive failures open it for
+  AI_BREAKER_COOLDOWN seconds, doubling on each re-open (up to
+  ``max_cooldown``). After the cooldown the provider is half-open: one
+  trial request is let through (others skip it until the trial's result
+  arrives, or ``trial_timeout`` passes) and that result closes it again
+  or re-opens it.
+
+order() and best() only look. The trial is taken by claim(), which
+PooledBrain calls for a provider only when it actually sends it a
+request, so a provider that merely appears in an order stays available.
+
+order() returns the available providers, fastest expected first, and
+PooledBrain sends each request (and its hedge) down that list. An empty
+list means everything is tripped, and the brain answers from the offline
+patterns straight away instead of waiting on a timeout.
+
+Simulation (one provider degrades, then recovers):
+    python -m core.provider_router
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from typing import Optional
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+_SPOKEN = {"openai": "OpenAI", "gemini": "Gemini"}
+
+
+class ProviderHealth:
+    """Latency / error tracking and circuit breaker for one provider."""
+
+    def __init__(self, name: str, alpha: float = 0.2, failure_threshold: int = 3,
+                 cooldown: float = 30.0, quota_cooldown: float = 600.0,
+                 max_cooldown: float = 600.0, prior_latency: float = 1.5,
+                 trial_timeout: float = 30.0):
+        self.name = name
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.quota_cooldown = quota_cooldown
+        self.trial_timeout = trial_timeout
+        self.latency: Optional[float] = None      # EWMA seconds
+        self.prior_latency = prior_latency        # assumed until measured
+        self.error_rate = 0.0                     # EWMA of failures
+        self.state = CLOSED
+        self.open_until = 0.0
+        self.quota_until = 0.0
+        self.trial_until = 0.0                    # half-open trial in flight until then
+        self.trips = 0
+        self.consecutive_failures = 0
+        self.calls = self.failures = 0
+        self.last_error = ""
+        self._lock = threading.Lock()
+
+    def success(self, latency: float):
+        with self._lock:
+            self.calls += 1
+            self.latency = latency if self.latency is None else (
+                self.alpha * latency + (1 - self.alpha) * self.latency)
+            self.error_rate *= 1 - self.alpha
+            self.consecutive_failures = 0
+            self.state = CLOSED
+            self.trial_until = 0.0
+            self.trips = 0
+
+    def failure(self, exc: Exception):
+        now = time.monotonic()
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+        with self._lock:
+            self.calls += 1
+            self.failures += 1
+            self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+            self.consecutive_failures += 1
+            self.trial_until = 0.0
+            self.last_error = f"HTTP {status}" if status else type(exc).__name__
+            if status == 429 or "RESOURCE_EXHAUSTED" in str(getattr(response, "text", "")):
+                retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+                wait = float(retry_after) if retry_after.isdigit() else self.quota_cooldown
+                self.quota_until = now + wait
+                self.last_error = "quota exhausted"
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = OPEN
+                self.open_until = now + min(self.cooldown * 2 ** self.trips, self.max_cooldown)
+                self.trips += 1
+
+    def available(self, now: float = None) -> bool:
+        """True if a request could go to this provider now (read-only)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if now < self.quota_until:
+                return False
+            if self.state == OPEN:
+                return now >= self.open_until
+            return not (self.state == HALF_OPEN and now < self.trial_until)
+
+    def claim(self, now: float = None) -> bool:
+        """
+        Call right before a request is actually sent. Always succeeds while
+        closed; a provider past its cooldown goes half-open and admits one
+        trial until its result arrives (or ``trial_timeout`` passes).
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if now < self.quota_until:
+                return False
+            if self.state == OPEN:
+                if now < self.open_until:
+                    return False
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if now < self.trial_until:
+                    return False
+                self.trial_until = now + self.trial_timeout
+            return True
+
+    def expected_latency(self) -> float:
+        """Lower is better: EWMA latency inflated by the recent error rate."""
+        latency = self.latency if self.latency is not None else self.prior_latency
+        return latency * (1 + 4 * self.error_rate)
+
+    def describe(self, now: float = None) -> str:
+        now = time.monotonic() if now is None else now
+        if now < self.quota_until:
+            state = f"quota exhausted ({self.quota_until - now:.1f}s left)"
+        elif self.state == OPEN and now < self.open_until:
+            state = f"circuit open ({self.open_until - now:.1f}s left)"
+        elif self.state == HALF_OPEN and now < self.trial_until:
+            state = "half-open (trial in flight)"
+        elif self.state != CLOSED:
+            state = "half-open (awaiting trial)"
+        else:
+            state = self.state
+        latency = f"{self.latency * 1000:.0f} ms" if self.latency is not None else "n/a"
+        return (f"{self.name:<7} {state:<28} ewma {latency:>8}  errors {self.error_rate:5.1%}  "
+                f"{self.failures}/{self.calls} failed" + (f"  last: {self.last_error}" if self.failures else ""))
+
+
+class ProviderRouter:
+    """Orders clients by health; attaches a ProviderHealth to each."""
+
+    def __init__(self, clients: list, **health_options):
+        self.clients = clients
+        for client in clients:
+            client.health = ProviderHealth(client.name, **health_options)
+        self.picks: Counter = Counter()
+        self.decisions: deque = deque(maxlen=20)    # (time, [provider order])
+
+    def order(self) -> list:
+        now = time.monotonic()
+        ready = [c for c in self.clients if c.health.available(now)]
+        ready.sort(key=lambda c: c.health.expected_latency())
+        first = ready[0].name if ready else "offline"
+        self.picks[first] += 1
+        self.decisions.append((time.time(), [c.name for c in ready] or ["offline"]))
+        return ready
+
+    def best(self) -> str:
+        """Name of the provider the next request would go to (no side effects)."""
+        now = time.monotonic()
+        ready = [c for c in self.clients if c.health.available(now)]
+        return min(ready, key=lambda c: c.health.expected_latency()).name if ready else "offline"
+
+    def status(self) -> str:
+        lines = [f"    {c.health.describe()}" for c in self.clients]
+        picks = ", ".join(f"{name} {count}" for name, count in self.picks.most_common()) or "none yet"
+        lines.append(f"    first choice so far: {picks}")
+        if self.decisions:
+            when, order = self.decisions[-1]
+            lines.append(f"    last decision {time.strftime('%H:%M:%S', time.localtime(when))}: "
+                         + " > ".join(order))
+        return "\n".join(lines)
+
+    def summary(self) -> str:
+        """One spoken sentence."""
+        best = self.best()
+        if best == "offline":
+            return "All AI providers are unavailable, so I'm answering from offline patterns."
+        down = [c.name for c in self.clients if c.name != best and not c.health.available()]
+        latency = next(c for c in self.clients if c.name == best).health.latency
+        text = f"I'm routing requests to {_SPOKEN.get(best, best)}"
+        if latency is not None:
+            text += f" at about {latency * 1000:.0f} milliseconds"
+        text += "."
+        if down:
+            names = " and ".join(_SPOKEN.get(n, n) for n in down)
+            text += f" {names} {'is' if len(down) == 1 else 'are'} currently unavailable."
+        return text
+
+
+# ===========================================================================
+# SIMULATION
+# ===========================================================================
+if __name__ == "__main__":
+    import random
+
+    class _Client:
+        def __init__(self, name):
+            self.name = name
+            self.health = None
+
+    class _Fail(Exception):
+        def __init__(self, status=None):
+            super().__init__(status)
+            self.response = type("R", (), {"status_code": status, "headers": {}, "text": ""})() if status else None
+
+    rng = random.Random(4)
+    gemini, openai = _Client("gemini"), _Client("openai")
+    router = ProviderRouter([gemini, openai], cooldown=0.05, max_cooldown=0.2, trial_timeout=0.05)
+    # (phase, gemini latency, openai latency, gemini failure rate); None = down
+    phases = [("healthy", 0.6, 0.9, 0.0), ("gemini degrades", 2.5, 0.9, 0.3),
+              ("gemini down", None, 0.9, 0.0), ("both down", None, None, 0.0),
+              ("gemini recovers", 0.6, None, 0.0), ("openai recovers", 0.6, 0.9, 0.0)]
+    for label, g_lat, o_lat, g_fail in phases:
+        served = Counter()
+        for _ in range(150):
+            for client in router.order():      # fail over down the list
+                if not client.health.claim():
+                    continue
+                latency = g_lat if client is gemini else o_lat
+                if latency is None or (client is gemini and rng.random() < g_fail):
+                    client.health.failure(_Fail(503))
+                    continue
+                client.health.success(latency * rng.uniform(0.8, 1.2))
+                served[client.name] += 1
+                break
+            else:
+                served["offline"] += 1
+            time.sleep(0.002)
+        print(f"  {label:<16} served by: {dict(served)}")
+    print()
+    print(router.status())
+    print(f"\n  {router.summary()}")
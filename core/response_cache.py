@@ -0,0 +1,196 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/response_cache.py - Two-tier cache in front of the AI provider call
+
+Tier 1 is an in-memory LRU, tier 2 a small SQLite store under DATA_DIR so
+answers survive restarts. Keys combine the normalised utterance (always the
+pronoun-resolved text), the provider name and a hash of the system prompt,
+so changing either invalidates old entries automatically.
+
+Only turns whose meaning is in the text itself are cached. One-word turns
+and turns leaning on the conversation ("yes", "do it", "the other one",
+"what about there") are looked up and stored never, since the same words
+mean a different action in a different context.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+_PUNCT_RE = re.compile(r"[^\w\s+#']")
+_SPACE_RE = re.compile(r"\s+")
+# Words that make a turn depend on what was said before it
+_CONTEXTUAL = frozenset(
+    "yes yeah yep yup no nope nah sure ok okay it that this these those them they "
+    "there here again same instead another other else ahead continue one ones".split()
+)
+# Result keys that describe one turn, not the answer
+_TRANSIENT = frozenset({"spoken", "partial", "provider"})
+
+
+def normalize(text: str) -> str:
+    """Lower-case, drop punctuation and collapse whitespace."""
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", text.lower())).strip()
+
+
+def self_contained(text: str) -> bool:
+    """True if ``text`` (normalised) can be answered without the conversation."""
+    words = text.split()
+    return len(words) >= 2 and not _CONTEXTUAL.intersection(words)
+
+
+class ResponseCache:
+    """LRU + on-disk cache of brain.process() results."""
+
+    def __init__(self, db_path: Path, system_prompt: str,
+                 max_entries: int = 256, disk_max_entries: int = 5000,
+                 action_ttl: float = 12 * 3600, conversation_ttl: float = 600):
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self.action_ttl = action_ttl
+        self.conversation_ttl = conversation_ttl
+        self._prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
+        self._memory: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.skipped = 0        # context-dependent turns not stored
+
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, expires REAL, result TEXT)"
+        )
+        self._prune_disk()
+
+    def key(self, text: str, provider: str) -> str:
+        raw = f"{normalize(text)}\x1f{provider}\x1f{self._prompt_hash}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # --- Lookup ---------------------------------------------------------------
+    def get(self, text: str, provider: str) -> Optional[dict]:
+        """Cached result for ``text`` (already pronoun-resolved), or None."""
+        if not self_contained(normalize(text)):
+            return None
+        key = self.key(text, provider)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires, result = entry
+                if expires > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return dict(result)
+                del self._memory[key]
+                self.expired += 1
+
+            row = self._db.execute(
+                "SELECT expires, result FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and row[0] > now:
+                result = json.loads(row[1])
+                self._remember(key, row[0], result)
+                self.hits += 1
+                self.disk_hits += 1
+                return dict(result)
+            if row:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self.expired += 1
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, provider: str, result: dict):
+        """Store a result. Errors, offline answers and cut-off streams are never cached."""
+        kind = result.get("type")
+        if provider == "offline" or kind not in ("action", "conversation"):
+            return
+        if result.get("partial") or result.get("provider") == "offline":
+            return
+        if not self_contained(normalize(text)):
+            self.skipped += 1
+            return
+        ttl = self.action_ttl if kind == "action" else self.conversation_ttl
+        if ttl <= 0:
+            return
+        key = self.key(text, provider)
+        expires = time.time() + ttl
+        # Per-turn markers: "spoken" (streamed reply already voiced),
+        # "partial" (stream cut off), "provider" (who actually answered)
+        result = {k: v for k, v in result.items() if k not in _TRANSIENT}
+        with self._lock:
+            self._remember(key, expires, result)
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, expires, result) VALUES (?, ?, ?)",
+                (key, expires, json.dumps(result)),
+            )
+            self._db.commit()
+
+    def _remember(self, key: str, expires: float, result: dict):
+        self._memory[key] = (expires, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _prune_disk(self):
+        """Drop expired rows and keep the store under disk_max_entries."""
+        with self._lock:
+            cur = self._db.execute("DELETE FROM responses WHERE expires <= ?", (time.time(),))
+            self.expired += cur.rowcount
+            cur = self._db.execute(
+                "DELETE FROM responses WHERE key NOT IN ("
+                " SELECT key FROM responses ORDER BY expires DESC LIMIT ?)",
+                (self.disk_max_entries,),
+            )
+            self.evictions += cur.rowcount
+            self._db.commit()
+
+    # --- Reporting ------------------------------------------------------------
+    def disk_entries(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "skipped": self.skipped,
+            "memory_entries": len(self._memory),
+            "disk_entries": self.disk_entries(),
+        }
+
+    def summary(self) -> str:
+        s = self.stats()
+        return (
+            f"Response cache: {s['disk_entries']} stored, "
+            f"{s['hits']} hits ({s['disk_hits']} from disk), {s['misses']} misses, "
+            f"{s['evictions']} evicted, {s['expired']} expired, "
+            f"{s['skipped']} context-dependent turns skipped"
+        )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,237 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/routine_dag.py - Run automation routines as a dependency graph
+
+Routine steps used to run one after the other through dispatch(). Here each
+step may declare ``"id"`` and ``"after": [ids]``; when it doesn't, ordering
+is inferred from the action type:
+
+- power actions and anything in DANGEROUS_ACTIONS are barriers: they wait
+  for every earlier step and every later step waits for them (this also
+  keeps permission prompts from overlapping);
+- steps touching the same resource (the same app, volume, brightness) keep
+  their order;
+- file operations (organize, clean, delete, backup, download) share one
+  resource, so two of them never work on the same folder at once;
+- Wi-Fi / Bluetooth toggles order against the network steps around them.
+
+Everything else runs concurrently on a worker pool, so "start work" takes as
+long as its slowest step rather than the sum of all of them. A step's
+timeout does not run while it is waiting on a permission / PIN prompt.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+BARRIER_ACTIONS = {"sleep", "shutdown", "restart", "quit", "emergency_stop", "undo"}
+NETWORK_TOGGLES = {"wifi_toggle", "bluetooth_toggle"}
+NETWORK_ACTIONS = {
+    "open_url", "search_google", "play_youtube", "search_wikipedia", "open_news",
+    "download_file", "open_gmail", "open_whatsapp", "open_spotify",
+}
+FILE_ACTIONS = {
+    "organize_downloads", "clean_junk", "create_folder", "delete_file",
+    "compress_folder", "download_file",
+}
+
+
+def _resource(step: dict):
+    """Key of the shared thing a step changes, or None."""
+    action = step.get("action", "")
+    params = step.get("params") or {}
+    if action in FILE_ACTIONS:
+        return "files"
+    if action in ("open_app", "close_app"):
+        return ("app", str(params.get("app", "")).lower())
+    if action.startswith("smart_home_"):
+        return (action, str(params.get("room", "")).lower())
+    if action in ("set_volume", "set_brightness", "write_note"):
+        return action
+    return None
+
+
+def build_graph(steps: list[dict], barriers: Iterable[str] = ()) -> dict[str, set]:
+    """Map step id -> ids it depends on. Explicit ``after`` always wins."""
+    barriers = BARRIER_ACTIONS | set(barriers)
+    ids = [str(step.get("id", i)) for i, step in enumerate(steps)]
+    deps: dict[str, set] = {}
+    last_barrier = None
+    last_by_resource: dict = {}
+    network_steps: list[str] = []
+    last_toggle = None
+
+    for i, step in enumerate(steps):
+        sid = ids[i]
+        action = step.get("action", "")
+        if "after" in step:
+            # Only earlier steps, so a typo can't create a cycle
+            deps[sid] = {str(d) for d in step["after"]} & set(ids[:i])
+        elif action in barriers:
+            deps[sid] = set(ids[:i])
+        else:
+            d = set()
+            if last_barrier is not None:
+                d.add(last_barrier)
+            res = _resource(step)
+            if res is not None and res in last_by_resource:
+                d.add(last_by_resource[res])
+            if action in NETWORK_TOGGLES:
+                d.update(network_steps)
+                if last_toggle is not None:
+                    d.add(last_toggle)
+            elif action in NETWORK_ACTIONS and last_toggle is not None:
+                d.add(last_toggle)
+            deps[sid] = d
+
+        if action in barriers:
+            last_barrier = sid
+        res = _resource(step)
+        if res is not None:
+            last_by_resource[res] = sid
+        if action in NETWORK_TOGGLES:
+            last_toggle = sid
+        elif action in NETWORK_ACTIONS:
+            network_steps.append(sid)
+    return deps
+
+
+def run_routine(steps: list[dict], dispatch: Callable, name: str = "routine",
+                workers: int = 4, step_timeout: float = 30.0,
+                barriers: Iterable[str] = (),
+                prompting: Optional[Callable[[], set]] = None) -> tuple[bool, str]:
+    """
+    Execute routine steps concurrently, respecting their dependencies.
+
+    A step whose dependency failed or timed out is skipped. Timed-out steps
+    can't be killed, but nothing waits on them any more. ``prompting``
+    returns the ids of threads blocked on a user prompt; a step on one of
+    them gets a fresh ``step_timeout`` once the prompt is answered.
+
+    Returns:
+        (success, message) with an aggregated summary
+    """
+    if not steps:
+        return False, f"The {name} routine has no steps."
+
+    ids = [str(step.get("id", i)) for i, step in enumerate(steps)]
+    by_id = dict(zip(ids, steps))
+    deps = build_graph(steps, barriers)
+    status: dict[str, str] = {}
+    messages: dict[str, str] = {}
+    start = time.perf_counter()
+
+    threads: dict[str, int] = {}    # step id -> worker thread running it
+
+    def run(sid):
+        threads[sid] = threading.get_ident()
+        step = by_id[sid]
+        return dispatch(step.get("action", ""), step.get("params") or {})
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="disha-routine")
+    running: dict = {}      # future -> (sid, deadline)
+    started: set = set()
+    try:
+        while True:
+            for sid in ids:
+                if sid in started:
+                    continue
+                states = [status.get(d) for d in deps[sid]]
+                if any(s in ("failed", "timeout", "skipped") for s in states):
+                    status[sid] = "skipped"
+                    started.add(sid)
+                elif all(s == "ok" for s in states):
+                    running[pool.submit(run, sid)] = (sid, time.monotonic() + step_timeout)
+                    started.add(sid)
+            if not running:
+                break
+
+            next_deadline = min(deadline for _, deadline in running.values())
+            timeout = max(0.0, next_deadline - time.monotonic())
+            if prompting is not None:
+                timeout = min(timeout, 0.5)     # notice prompts opening and closing
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                sid, _ = running.pop(future)
+                try:
+                    ok, msg = future.result()
+                except Exception as e:
+                    ok, msg = False, str(e)
+                status[sid] = "ok" if ok else "failed"
+                messages[sid] = msg
+            now = time.monotonic()
+            waiting = prompting() if prompting is not None else ()
+            for future, (sid, deadline) in list(running.items()):
+                if threads.get(sid) in waiting:
+                    running[future] = (sid, now + step_timeout)
+                elif deadline <= now:
+                    running.pop(future)
+                    status[sid] = "timeout"
+                    messages[sid] = f"timed out after {step_timeout:g}s"
+    finally:
+        pool.shutdown(wait=False)
+
+    for sid in ids:
+        status.setdefault(sid, "skipped")
+    elapsed = time.perf_counter() - start
+    succeeded = sum(1 for s in status.values() if s == "ok")
+    for sid in ids:
+        print(f"  [DAG] {by_id[sid].get('action', '?'):<20} {status[sid]:<8} "
+              f"{messages.get(sid, '')}")
+
+    if succeeded == len(ids):
+        return True, f"{name.capitalize()} complete. All {succeeded} steps done in {elapsed:.1f} seconds."
+    problems = [
+        f"{by_id[sid].get('action', '?')} {status[sid]}"
+        for sid in ids if status[sid] != "ok"
+    ]
+    return succeeded > 0, (
+        f"{name.capitalize()} finished with {succeeded} of {len(ids)} steps done. "
+        f"Issues: {', '.join(problems)}."
+    )
+
+
+def load_routine(name: str, automations_file: Path, defaults: dict):
+    """Steps for a named routine: automations.json first, then built-ins."""
+    name = name.lower().strip()
+    try:
+        saved = json.loads(Path(automations_file).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        saved = {}
+    for table in (saved, defaults):
+        for key, steps in table.items():
+            if key.lower() == name:
+                return steps
+    return None
+
+
+# ===========================================================================
+# BENCHMARK
+# ===========================================================================
+if __name__ == "__main__":
+    import random
+
+    rng = random.Random(3)
+    routine = [
+        {"action": "open_app", "params": {"app": "chrome"}},
+        {"action": "open_app", "params": {"app": "vs code"}},
+        {"action": "open_app", "params": {"app": "spotify"}},
+        {"action": "set_brightness", "params": {"direction": "to 70"}},
+    ]
+
+    def fake_dispatch(action, params):
+        time.sleep(rng.uniform(0.3, 0.8))     # app launch / WMI call
+        return True, f"{action} done"
+
+    start = time.perf_counter()
+    for step in routine:
+        fake_dispatch(step["action"], step["params"])
+    serial = time.perf_counter() - start
+    start = time.perf_counter()
+    ok, msg = run_routine(routine, fake_dispatch, "start work")
+    print(f"  serial: {serial:.2f}s   graph: {time.perf_counter() - start:.2f}s")
+    print(f"  {msg}")
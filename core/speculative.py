@@ -0,0 +1,84 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/speculative.py - Parse partial transcripts before the user stops talking
+
+A streaming recognizer produces partial transcripts while the user is still
+speaking ("close", "close dis", "close discord"). Each new partial is run
+through pronoun resolution and the local intent matcher on the recognizer's
+thread, and the outcome is kept, keyed by the normalized text. When the
+final transcript arrives, handle_turn() takes the speculated result if the
+text matches exactly; anything else is discarded and the turn runs normally.
+
+Speculation is only valid for the context it was computed against, so the
+main loop calls invalidate() after every turn.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from core.response_cache import normalize
+
+
+class SpeculativeParser:
+    """Caches resolve + match results for partial transcripts."""
+
+    def __init__(self, resolve: Callable[[str], str],
+                 match: Callable[[str], Optional[dict]], max_pending: int = 8):
+        self._resolve = resolve
+        self._match = match
+        self._max_pending = max_pending
+        self._pending: OrderedDict = OrderedDict()  # normalized -> (resolved, result, generation)
+        self._generation = 0
+        self._last = ""
+        self._lock = threading.Lock()
+        self.stats = {"partials": 0, "hits": 0, "misses": 0, "saved_ms": 0.0}
+
+    def on_partial(self, text: str):
+        """Speculate on a partial transcript (called from the recognizer thread)."""
+        key = normalize(text)
+        if not key or key == self._last:
+            return
+        self._last = key
+        generation = self._generation
+        start = time.perf_counter()
+        try:
+            resolved = self._resolve(text)
+            result = self._match(resolved)
+        except Exception:
+            return      # speculation must never break recognition
+        elapsed = (time.perf_counter() - start) * 1000.0
+        with self._lock:
+            self.stats["partials"] += 1
+            self._pending[key] = (resolved, result, generation, elapsed)
+            while len(self._pending) > self._max_pending:
+                self._pending.popitem(last=False)
+
+    def on_final(self, text: str) -> Optional[tuple[str, Optional[dict]]]:
+        """(resolved, result) speculated for exactly this text, else None."""
+        key = normalize(text)
+        with self._lock:
+            entry = self._pending.get(key)
+            self._pending.clear()
+            self._last = ""
+            if entry is None or entry[2] != self._generation:
+                if self.stats["partials"]:
+                    self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            self.stats["saved_ms"] += entry[3]
+        return entry[0], (dict(entry[1]) if entry[1] else None)
+
+    def invalidate(self):
+        """Drop everything computed against the previous context."""
+        with self._lock:
+            self._generation += 1
+            self._pending.clear()
+            self._last = ""
+
+    def report(self) -> str:
+        s = self.stats
+        return (f"  [SPEC] {s['partials']} partials parsed, {s['hits']} finals served "
+                f"speculatively, {s['misses']} discarded, {s['saved_ms']:.1f} ms saved")
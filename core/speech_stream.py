@@ -0,0 +1,185 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/speech_stream.py - Stream provider tokens into speech sentence by sentence
+
+Instead of waiting for the whole reply, tokens are consumed as they arrive,
+cut at sentence boundaries and each finished sentence is handed to the voice
+output straight away. A structured function call in the stream (a result
+dict) ends the turn as an action; replies that turn out to be inline action
+JSON go through the repairing parser in core.action_schema as they arrive
+instead of being spoken.
+
+The token source is the brain's process_stream(). PooledBrain
+(core.provider_pool) provides one; the legacy MultiAIBrain only has
+process(), so with it every reply is still spoken whole. A source whose
+stream breaks off mid-reply raises StreamInterrupted; what arrived is
+still used, and the result is marked ``partial``.
+"""
+
+import re
+import time
+from collections import deque
+from typing import Callable, Iterable, Iterator, Union
+
+from core.action_schema import ActionParser, ActionSchema, result_from
+
+# Sentence end: . ! ? (optionally followed by closing quotes/brackets) then space
+_BOUNDARY_RE = re.compile(r"[.!?]+[\"')\]]*\s+|\n{1,}")
+_ABBREVIATIONS = {
+    "mr.", "mrs.", "ms.", "dr.", "prof.", "sr.", "jr.", "st.", "vs.",
+    "e.g.", "i.e.", "etc.", "approx.", "no.",
+}
+_MIN_SENTENCE_CHARS = 12    # don't speak fragments like "Sure." on their own
+
+
+class StreamInterrupted(Exception):
+    """Raised by a token source when its stream broke off mid-reply."""
+
+
+class SentenceSplitter:
+    """Incrementally split a token stream into speakable sentences."""
+
+    def __init__(self, min_chars: int = _MIN_SENTENCE_CHARS):
+        self._buffer = ""
+        self._min_chars = min_chars
+
+    def feed(self, chunk: str) -> Iterator[str]:
+        """Add a chunk; yield every sentence it completes."""
+        self._buffer += chunk
+        start = 0
+        for m in _BOUNDARY_RE.finditer(self._buffer):
+            candidate = self._buffer[start:m.end()].strip()
+            last_word = candidate.rsplit(None, 1)[-1].lower() if candidate else ""
+            if last_word in _ABBREVIATIONS or len(candidate) < self._min_chars:
+                continue
+            yield candidate
+            start = m.end()
+        self._buffer = self._buffer[start:]
+
+    def flush(self) -> Iterator[str]:
+        """Yield whatever is left once the stream ends."""
+        rest, self._buffer = self._buffer.strip(), ""
+        if rest:
+            yield rest
+
+
+class StreamingSpeaker:
+    """Turn a provider token stream into a brain.process()-shaped result."""
+
+    def __init__(self, speak_fn: Callable[[str], None], log: bool = True,
+                 schema: ActionSchema = None):
+        self._speak = speak_fn
+        self._log = log
+        self._schema = schema
+        self.ttfa: deque = deque(maxlen=500)    # seconds, spoken turns only
+
+    def run(self, tokens: Iterable[Union[str, dict]], started: float = None) -> dict:
+        """
+        Consume ``tokens``; speak conversation as it arrives.
+
+        Args:
+            tokens: Text chunks from the provider; a dict is a finished
+                result (a decoded function call) and ends the turn
+            started: time.perf_counter() when the request was sent
+
+        Returns:
+            Result dict. Conversational results carry ``spoken=True`` because
+            the reply has already been handed to the voice output; results
+            of an interrupted stream carry ``partial=True``.
+        """
+        started = started if started is not None else time.perf_counter()
+        it = iter(tokens)
+        head = ""
+        partial = False
+
+        # Decide the mode from the first non-blank characters
+        try:
+            for chunk in it:
+                if isinstance(chunk, dict):
+                    return chunk
+                head += chunk
+                if head.strip():
+                    break
+        except StreamInterrupted:
+            partial, it = True, iter(())
+            if not head.strip():
+                return {"type": "conversation", "partial": True,
+                        "reply": "Sorry, I lost the connection before I could answer."}
+        stripped = head.lstrip()
+        if stripped.startswith("{") or stripped.startswith("```"):
+            result = self._parse_action(head, it)
+            if partial:
+                result["partial"] = True
+            return result
+
+        splitter = SentenceSplitter()
+        parts = []
+        spoken = 0
+        try:
+            for chunk in _chain(head, it):
+                if isinstance(chunk, dict):
+                    for sentence in splitter.flush():   # narration before a function call
+                        self._say(sentence, started, first=not spoken)
+                        spoken += 1
+                    return chunk
+                parts.append(chunk)
+                for sentence in splitter.feed(chunk):
+                    self._say(sentence, started, first=not spoken)
+                    spoken += 1
+        except StreamInterrupted:
+            partial = True
+        for sentence in splitter.flush():
+            self._say(sentence, started, first=not spoken)
+            spoken += 1
+
+        result = {"type": "conversation", "reply": "".join(parts).strip(), "spoken": True}
+        if partial:
+            result["partial"] = True
+        return result
+
+    def _say(self, sentence: str, started: float, first: bool):
+        if first:
+            elapsed = time.perf_counter() - started
+            self.ttfa.append(elapsed)
+            if self._log:
+                print(f"  \033[90m[TTFA {elapsed:.2f}s]\033[0m")
+        self._speak(sentence)
+
+    def _parse_action(self, head: str, rest: Iterator) -> dict:
+        """Parse inline action JSON chunk by chunk; the stream is still drained."""
+        parser = ActionParser()
+        raw = [head]
+        parser.feed(head)
+        partial = False
+        try:
+            for chunk in rest:
+                if isinstance(chunk, dict):
+                    return chunk
+                raw.append(chunk)
+                parser.feed(chunk)
+        except StreamInterrupted:
+            partial = True
+        text = "".join(raw)
+        if self._schema is not None:
+            result = self._schema.from_parsed(parser.finish(), text, parser)
+        else:
+            result = result_from(parser.finish(), text)
+        if partial:
+            result["partial"] = True
+        return result
+
+    def report(self) -> str:
+        if not self.ttfa:
+            return "  Streaming speech: no streamed replies yet."
+        values = sorted(self.ttfa)
+        p50 = values[len(values) // 2]
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        return (f"  Streaming speech: {len(values)} replies, "
+                f"time-to-first-audio p50={p50:.2f}s p95={p95:.2f}s")
+
+
+def _chain(first: str, rest: Iterable[str]) -> Iterator[str]:
+    if first:
+        yield first
+    yield from rest
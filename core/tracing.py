@@ -0,0 +1,206 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/tracing.py - Lightweight span tracer for startup and per-turn latency
+
+Spans are written into preallocated parallel arrays used as a ring buffer,
+so tracing a stage costs two clock reads and a few slot stores - no span
+objects, no list growth, no locks (itertools.count() is atomic under the
+GIL). ``begin()`` returns a token that ``end()`` closes; once the ring wraps,
+a token whose slot was reused is ignored.
+
+Timestamps are time.perf_counter_ns(), the same clock as perf_counter(), so
+timestamps taken elsewhere (e.g. the input queue's arrival time) line up.
+
+Output:
+    summary()       p50 / p95 / p99 per span name
+    flame(turn)     indented text tree of one turn
+    export_chrome() Chrome trace-event JSON (chrome://tracing, Perfetto)
+"""
+
+import itertools
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Iterable
+
+_OPEN = -1
+
+
+class Tracer:
+    """Ring buffer of nested, thread-aware spans grouped into turns."""
+
+    def __init__(self, capacity: int = 16384, enabled: bool = True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.turn = 0                       # 0 = startup
+        self._seq = itertools.count()
+        self._depth = threading.local()
+        self._names = [None] * capacity
+        self._start = [0] * capacity
+        self._end = [0] * capacity
+        self._owner = [-1] * capacity       # sequence number that wrote the slot
+        self._turns = [0] * capacity
+        self._levels = [0] * capacity
+        self._threads = [0] * capacity
+
+    # --- Hot path -------------------------------------------------------------
+    def begin(self, name: str) -> int:
+        if not self.enabled:
+            return _OPEN
+        seq = next(self._seq)
+        slot = seq % self.capacity
+        local = self._depth
+        level = getattr(local, "n", 0)
+        local.n = level + 1
+        self._owner[slot] = seq
+        self._names[slot] = name
+        self._turns[slot] = self.turn
+        self._levels[slot] = level
+        self._threads[slot] = threading.get_ident()
+        self._end[slot] = 0
+        self._start[slot] = time.perf_counter_ns()
+        return seq
+
+    def end(self, token: int):
+        if token == _OPEN:
+            return
+        now = time.perf_counter_ns()
+        self._depth.n -= 1
+        slot = token % self.capacity
+        if self._owner[slot] == token:
+            self._end[slot] = now
+
+    def record(self, name: str, start_ns: int, end_ns: int = None, turn: int = None):
+        """Add an already-measured span (e.g. time an utterance sat in the queue)."""
+        if not self.enabled:
+            return
+        seq = next(self._seq)
+        slot = seq % self.capacity
+        self._owner[slot] = seq
+        self._names[slot] = name
+        self._turns[slot] = self.turn if turn is None else turn
+        self._levels[slot] = getattr(self._depth, "n", 0)
+        self._threads[slot] = threading.get_ident()
+        self._start[slot] = start_ns
+        self._end[slot] = end_ns if end_ns is not None else time.perf_counter_ns()
+
+    def traced(self, name: str):
+        """Decorator form of begin()/end() for handlers."""
+        def decorator(fn):
+            def wrapper(*args, **kwargs):
+                token = self.begin(name)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.end(token)
+            wrapper.__name__ = fn.__name__
+            wrapper.__doc__ = fn.__doc__
+            return wrapper
+        return decorator
+
+    def new_turn(self) -> int:
+        """Start a new turn; also repairs nesting left open by an exception."""
+        self._depth.n = 0
+        self.turn += 1
+        return self.turn
+
+    # --- Reading --------------------------------------------------------------
+    def spans(self, turn: int = None) -> list[tuple]:
+        """Closed spans, oldest first: (name, start_ns, end_ns, turn, level, thread)."""
+        out = []
+        for slot in range(self.capacity):
+            if self._owner[slot] < 0 or not self._end[slot]:
+                continue
+            if turn is not None and self._turns[slot] != turn:
+                continue
+            out.append((self._names[slot], self._start[slot], self._end[slot],
+                        self._turns[slot], self._levels[slot], self._threads[slot]))
+        out.sort(key=lambda s: (s[1], s[4]))
+        return out
+
+    def stats(self) -> dict[str, dict]:
+        durations: dict[str, list[float]] = {}
+        for name, start, end, *_ in self.spans():
+            durations.setdefault(name, []).append((end - start) / 1e6)
+        result = {}
+        for name, values in durations.items():
+            values.sort()
+            n = len(values)
+            result[name] = {
+                "count": n,
+                "p50": values[int(0.50 * (n - 1))],
+                "p95": values[int(0.95 * (n - 1))],
+                "p99": values[int(0.99 * (n - 1))],
+                "max": values[-1],
+            }
+        return result
+
+    def summary(self) -> str:
+        stats = self.stats()
+        if not stats:
+            return "  No spans recorded yet."
+        lines = [f"  {'span':<28}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for name, s in sorted(stats.items(), key=lambda kv: -kv[1]["p95"]):
+            lines.append(f"  {name:<28}{s['count']:>7}{s['p50']:>10.2f}{s['p95']:>10.2f}"
+                         f"{s['p99']:>10.2f}{s['max']:>10.2f}")
+        return "\n".join(lines)
+
+    def flame(self, turn: int = None) -> str:
+        """Indented timeline of one turn (the latest by default)."""
+        turn = self.turn if turn is None else turn
+        spans = self.spans(turn)
+        if not spans:
+            return f"  Turn {turn}: no spans."
+        origin = spans[0][1]
+        total = max(s[2] for s in spans) - origin or 1
+        lines = [f"  Turn {turn}: {total / 1e6:.1f} ms"]
+        for name, start, end, _, level, _ in spans:
+            left = int((start - origin) / total * 40)
+            width = max(1, int((end - start) / total * 40))
+            bar = " " * left + "#" * width
+            lines.append(f"  {bar:<41}|{'  ' * level}{name} {(end - start) / 1e6:.2f} ms")
+        return "\n".join(lines)
+
+    def export_chrome(self, path: Path, turns: Iterable[int] = None) -> Path:
+        """Write Chrome trace-event JSON ("X" complete events, microseconds)."""
+        wanted = set(turns) if turns is not None else None
+        events = [
+            {"name": name, "cat": "disha", "ph": "X", "pid": 1, "tid": thread,
+             "ts": start / 1000.0, "dur": (end - start) / 1000.0, "args": {"turn": turn}}
+            for name, start, end, turn, _, thread in self.spans()
+            if wanted is None or turn in wanted
+        ]
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}),
+                        encoding="utf-8")
+        return path
+
+
+# ===========================================================================
+# BENCHMARK
+# ===========================================================================
+if __name__ == "__main__":
+    import tracemalloc
+
+    tracer = Tracer(capacity=4096)
+    n = 200_000
+    start = time.perf_counter()
+    for _ in range(n):
+        tracer.end(tracer.begin("stage"))
+    per_span = (time.perf_counter() - start) / n * 1e9
+
+    # Fill the ring once under tracemalloc, then check a second pass retains nothing
+    tracemalloc.start()
+    for _ in range(10_000):
+        tracer.end(tracer.begin("stage"))
+    before = tracemalloc.take_snapshot()
+    for _ in range(10_000):
+        tracer.end(tracer.begin("stage"))
+    grown = sum(s.size_diff for s in tracemalloc.take_snapshot().compare_to(before, "filename")
+                if s.traceback[0].filename == __file__)
+    tracemalloc.stop()
+    print(f"  begin+end: {per_span:.0f} ns per span; retained growth over 10k spans: {grown} bytes")
+    print(tracer.summary())
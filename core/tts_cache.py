@@ -0,0 +1,334 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+core/tts_cache.py - Content-addressed cache of rendered speech
+
+Much of what DISHA says is fixed ("Action cancelled.", the emergency stop
+line, the shutdown line) or starts with a fixed prefix ("I encountered an
+issue: ..."). Each sentence is keyed by sha256(engine, voice, rate, text).
+Once rendered, it lives as an audio file under DATA_DIR/tts_cache and
+plays straight from disk instead of being synthesized again - which
+matters most for the network-bound ElevenLabs engine.
+
+- Known phrases are pre-rendered at install time (and topped up in the
+  background at startup).
+- With TTS_CACHE_PROMOTE on, any other sentence spoken
+  TTS_CACHE_PROMOTE_AFTER times is rendered in the background and served
+  from the cache afterwards. It is off by default because that includes
+  AI replies, which would then sit on disk.
+- The directory is an LRU capped at TTS_CACHE_MAX_MB (file mtime = last use).
+
+Pre-render:
+    python -m core.tts_cache --prerender
+"""
+
+import hashlib
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+try:
+    import sounddevice as sd
+    import soundfile as sf
+except (ImportError, OSError):
+    sd = sf = None
+
+try:
+    import pythoncom        # SAPI (pyttsx3 on Windows) needs COM on each thread
+except ImportError:
+    pythoncom = None
+
+_SEGMENT_RE = re.compile(r"(?<=[.!?:])\s+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def playback_available() -> bool:
+    return sd is not None
+
+
+def play_file(path: Path):
+    """Play an audio file and block until it finishes."""
+    data, rate = sf.read(str(path), dtype="float32")
+    sd.play(data, rate)
+    sd.wait()
+
+
+def segments(text: str) -> list[str]:
+    """Sentences, with "prefix:" split off so templated lines share audio."""
+    return [s for s in _SEGMENT_RE.split(text.strip()) if s]
+
+
+class PhraseCache:
+    """Audio files keyed by (renderer voice tag, text), evicted LRU by size."""
+
+    def __init__(self, cache_dir: Path, voice_tag: str,
+                 max_bytes: int = 50 * 1024 * 1024, promote_after: int = 2):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.voice_tag = voice_tag
+        self.max_bytes = max_bytes
+        self.promote_after = promote_after
+        self._lock = threading.Lock()
+        self._index: OrderedDict[str, tuple[Path, int]] = OrderedDict()
+        self._misses: dict[str, int] = {}
+        self.hits = self.misses = 0
+        self.total_bytes = 0
+        files = []
+        for path in self.cache_dir.glob("*/*.*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, path, st.st_size))
+        for _, path, size in sorted(files):
+            self._index[path.stem] = (path, size)
+            self.total_bytes += size
+
+    def key(self, text: str) -> str:
+        text = _SPACE_RE.sub(" ", text.strip())
+        return hashlib.sha256(f"{self.voice_tag}\n{text}".encode("utf-8")).hexdigest()
+
+    def lookup(self, text: str) -> Optional[Path]:
+        key = self.key(text)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+        try:
+            os.utime(entry[0])      # keeps LRU order across restarts
+        except OSError:
+            with self._lock:
+                self._index.pop(key, None)
+            return None
+        return entry[0]
+
+    def __contains__(self, text: str) -> bool:
+        with self._lock:
+            return self.key(text) in self._index
+
+    def should_render(self, text: str) -> bool:
+        """Count a miss; True once the sentence is popular enough to keep."""
+        if self.promote_after <= 0:
+            return False
+        key = self.key(text)
+        with self._lock:
+            if key in self._index:
+                return False
+            self._misses[key] = self._misses.get(key, 0) + 1
+            return self._misses[key] == self.promote_after
+
+    def store(self, text: str, data: bytes, ext: str) -> Path:
+        key = self.key(text)
+        path = self.cache_dir / key[:2] / f"{key}{ext}"
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_suffix(ext + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            old = self._index.pop(key, None)
+            if old:
+                self.total_bytes -= old[1]
+            self._index[key] = (path, len(data))
+            self.total_bytes += len(data)
+            self._misses.pop(key, None)
+            evict = []
+            while self.total_bytes > self.max_bytes and len(self._index) > 1:
+                _, (old_path, size) = self._index.popitem(last=False)
+                self.total_bytes -= size
+                evict.append(old_path)
+        for old_path in evict:
+            old_path.unlink(missing_ok=True)
+        return path
+
+    def summary(self) -> str:
+        return (f"TTS cache: {len(self._index)} phrases, {self.total_bytes / 1e6:.1f} MB, "
+                f"{self.hits} hits / {self.misses} misses this session.")
+
+
+# ===========================================================================
+# RENDERERS - text -> (audio bytes, extension); ``tag`` names the voice
+# ===========================================================================
+class Pyttsx3Renderer:
+    """Offline renderer; owns its own engine on the calling (render) thread."""
+
+    shares_engine = True        # same SAPI runtime as the live voice: never run both at once
+
+    def __init__(self, rate: int, voice_index: int, volume: float = 1.0):
+        self.rate = rate
+        self.voice_index = voice_index
+        self.volume = volume
+        self.tag = f"pyttsx3|{voice_index}|{rate}|{volume}"
+        self._engine = None
+
+    def __call__(self, text: str) -> tuple[bytes, str]:
+        if self._engine is None:
+            import pyttsx3
+
+            if pythoncom is not None:
+                pythoncom.CoInitialize()
+            # Not pyttsx3.init(): that hands back the live output engine
+            self._engine = pyttsx3.Engine()
+            self._engine.setProperty("rate", self.rate)
+            self._engine.setProperty("volume", self.volume)
+            voices = self._engine.getProperty("voices")
+            if voices and self.voice_index < len(voices):
+                self._engine.setProperty("voice", voices[self.voice_index].id)
+        fd, tmp = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            self._engine.save_to_file(text, tmp)
+            self._engine.runAndWait()
+            return Path(tmp).read_bytes(), ".wav"
+        finally:
+            os.unlink(tmp)
+
+
+class ElevenLabsRenderer:
+    URL = "https://api.elevenlabs.io/v1/text-to-speech/{voice}"
+    shares_engine = False
+
+    def __init__(self, api_key: str, voice_id: str):
+        import requests
+
+        self._session = requests.Session()
+        self._session.headers.update({"xi-api-key": api_key, "accept": "audio/mpeg"})
+        self.voice_id = voice_id
+        self.tag = f"elevenlabs|{voice_id}"
+
+    def __call__(self, text: str) -> tuple[bytes, str]:
+        resp = self._session.post(self.URL.format(voice=self.voice_id),
+                                  json={"text": text}, timeout=30)
+        resp.raise_for_status()
+        return resp.content, ".mp3"
+
+
+class CachedVoice:
+    """
+    Wraps the voice output: cached sentences play from disk, the rest go to
+    the wrapped engine. Other attributes pass through to it. A renderer that
+    shares the live engine's runtime only renders while nothing is spoken.
+    """
+
+    def __init__(self, inner, cache: PhraseCache, renderer: Callable[[str], tuple[bytes, str]]):
+        self._inner = inner
+        self.cache = cache
+        self._renderer = renderer
+        self._render_queue: queue.Queue = queue.Queue()
+        self._cut = threading.Event()
+        self._engine_lock = threading.Lock()
+        threading.Thread(target=self._render_loop, name="disha-tts-render", daemon=True).start()
+
+    def __getattr__(self, attr):
+        return getattr(self._inner, attr)
+
+    def speak(self, text: str, priority: bool = False):
+        self._cut.clear()
+        parts = segments(text)
+        cached = [self.cache.lookup(p) for p in parts]
+        if not any(cached):
+            self._synthesize(text, priority)
+            self._promote(parts)
+            return
+        for part, path in zip(parts, cached):
+            if self._cut.is_set():
+                return
+            if path is not None:
+                try:
+                    play_file(path)
+                    continue
+                except Exception:
+                    pass        # unreadable file: fall back to synthesis
+            self._synthesize(part, priority)
+        self._promote(p for p, c in zip(parts, cached) if c is None)
+
+    def _synthesize(self, text: str, priority: bool):
+        with self._engine_lock:
+            self._inner.speak(text, priority=priority)
+
+    def interrupt(self):
+        """Cut the current utterance, cached or synthesized."""
+        self._cut.set()
+        sd.stop()
+        interrupt = getattr(self._inner, "interrupt", None)
+        if interrupt is not None:
+            interrupt()
+
+    def _promote(self, parts: Iterable[str]):
+        for part in parts:
+            if self.cache.should_render(part):
+                self._render_queue.put(part)
+
+    def prerender(self, phrases: Iterable[str]):
+        """Queue any missing phrases for background rendering."""
+        for phrase in phrases:
+            for part in segments(phrase):
+                if part not in self.cache:
+                    self._render_queue.put(part)
+
+    def _render_loop(self):
+        exclusive = getattr(self._renderer, "shares_engine", True)
+        while True:
+            text = self._render_queue.get()
+            if text in self.cache:
+                continue
+            try:
+                if exclusive:
+                    with self._engine_lock:
+                        audio = self._renderer(text)
+                else:
+                    audio = self._renderer(text)
+                self.cache.store(text, *audio)
+            except Exception as e:
+                print(f"  [TTS] Could not cache '{text[:30]}': {e}")
+
+
+def build_renderer(engine: str, rate: int, voice_index: int, volume: float,
+                   elevenlabs_key: str = "", elevenlabs_voice: str = ""):
+    if engine == "elevenlabs" and elevenlabs_key:
+        return ElevenLabsRenderer(elevenlabs_key, elevenlabs_voice)
+    return Pyttsx3Renderer(rate, voice_index, volume)
+
+
+# ===========================================================================
+# PRE-RENDER (install time)
+# ===========================================================================
+def prerender_from_config() -> int:
+    from config_enhanced import (
+        TTS_ENGINE, TTS_RATE, TTS_VOICE_INDEX, TTS_VOLUME, TTS_CACHE_DIR,
+        TTS_CACHE_MAX_MB, TTS_CACHE_PHRASES, ELEVENLABS_KEY, ELEVENLABS_VOICE_ID,
+    )
+
+    renderer = build_renderer(TTS_ENGINE, TTS_RATE, TTS_VOICE_INDEX, TTS_VOLUME,
+                              ELEVENLABS_KEY, ELEVENLABS_VOICE_ID)
+    cache = PhraseCache(TTS_CACHE_DIR, renderer.tag, TTS_CACHE_MAX_MB * 1024 * 1024)
+    rendered = 0
+    for phrase in TTS_CACHE_PHRASES:
+        for part in segments(phrase):
+            if part in cache:
+                continue
+            start = time.perf_counter()
+            cache.store(part, *renderer(part))
+            rendered += 1
+            print(f"  rendered {(time.perf_counter() - start) * 1000:6.0f} ms  {part}")
+    print(f"  {cache.summary()}")
+    return rendered
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--prerender" in sys.argv:
+        prerender_from_config()
+    else:
+        print(__doc__)
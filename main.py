@@ -23,7 +23,7 @@ _THIS_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(_THIS_DIR))
 os.chdir(_THIS_DIR)
 
-from config import MEMORY_FILE
+from config import MEMORY_FILE, DANGEROUS_ACTIONS
 from utils.helpers import (print_banner, time_greeting, speak as _speak_stub,
                            set_speak_fn, load_memory)
 from utils.logger import log_action, pop_last_action, get_history
@@ -34,6 +34,7 @@ from core.voice_output import VoiceOutput
 from core.context_manager import ContextManager
 from core.ai_brain     import AIBrain
 from core.security     import request_permission, emergency_stop, is_stopped, reset_emergency
+from core.action_registry import ActionRegistry
 
 # --- Feature modules ---------------------------------------------
 from modules import pc_control, file_manager, web_services
@@ -59,174 +60,186 @@ def speak(text: str):
 
 
 # ===========================================================================
-# ACTION DISPATCHER
+# ACTION REGISTRY
 # ===========================================================================
 # This is the single routing table.  The AI brain returns an action name;
-# this function calls the correct module and returns (success, message).
+# each handler is registered here once and receives params with its
+# defaults filled in.  Returns (success, message).
 
-def dispatch(action: str, params: dict) -> tuple[bool, str]:
-    """Route an action to the appropriate module. Returns (ok, message)."""
+actions = ActionRegistry(DANGEROUS_ACTIONS)
 
-    # --- Emergency / control --------------------------------------
-    if action == "emergency_stop":
-        emergency_stop()
-        return True, "Emergency stop activated. All tasks halted."
+# --- Emergency / control (no permission gate) -----------------------
+@actions.action("emergency_stop", gated=False)
+def _emergency_stop(p):
+    emergency_stop()
+    return True, "Emergency stop activated. All tasks halted."
 
-    if action == "quit":
-        speak("Goodbye, Subhra! See you next time. [BYE]")
-        log_action("quit", status="success", detail="User requested exit.")
-        sys.exit(0)
+@actions.action("quit", gated=False)
+def _quit(p):
+    speak("Goodbye, Subhra! See you next time. [BYE]")
+    log_action("quit", status="success", detail="User requested exit.")
+    sys.exit(0)
 
-    if action == "undo":
-        return handle_undo()
+@actions.action("undo", gated=False)
+def _undo(p):
+    return handle_undo()
 
-    # --- Security gate - dangerous actions need confirmation ------
-    if not request_permission(action, params):
-        return False, "Action cancelled."
+@actions.action("performance_report", gated=False)
+def _performance_report(p):
+    print("\n  [PERF] Action metrics")
+    print(actions.format_metrics())
+    return True, "Performance report printed to the console."
 
-    # --- PC Control -----------------------------------------------
-    if action == "open_app":
-        app = params.get("app", "")
-        ok, msg = pc_control.open_app(app)
-        if ok:
-            context.set_last_app(app)
-        return ok, msg
+# --- PC Control -----------------------------------------------------
+@actions.action("open_app", app="")
+def _open_app(p):
+    ok, msg = pc_control.open_app(p["app"])
+    if ok:
+        context.set_last_app(p["app"])
+    return ok, msg
 
-    if action == "close_app":
-        app = params.get("app", "")
-        ok, msg = pc_control.close_app(app)
-        return ok, msg
+@actions.action("close_app", app="")
+def _close_app(p):        return pc_control.close_app(p["app"])
 
-    if action == "set_volume":
-        return pc_control.set_volume(params.get("direction", "up"))
+@actions.action("set_volume", direction="up")
+def _set_volume(p):       return pc_control.set_volume(p["direction"])
 
-    if action == "set_brightness":
-        return pc_control.set_brightness(params.get("direction", "up"))
+@actions.action("set_brightness", direction="up")
+def _set_brightness(p):   return pc_control.set_brightness(p["direction"])
 
-    if action == "wifi_toggle":
-        return pc_control.wifi_toggle(params.get("state", True))
+@actions.action("wifi_toggle", state=True)
+def _wifi_toggle(p):      return pc_control.wifi_toggle(p["state"])
 
-    if action == "bluetooth_toggle":
-        return pc_control.bluetooth_toggle(params.get("state", True))
+@actions.action("bluetooth_toggle", state=True)
+def _bluetooth_toggle(p): return pc_control.bluetooth_toggle(p["state"])
 
-    if action == "shutdown":
-        return pc_control.shutdown()
+@actions.action("shutdown")
+def _shutdown(p):         return pc_control.shutdown()
 
-    if action == "restart":
-        return pc_control.restart()
+@actions.action("restart")
+def _restart(p):          return pc_control.restart()
 
-    if action == "sleep":
-        return pc_control.sleep()
+@actions.action("sleep")
+def _sleep(p):            return pc_control.sleep()
 
-    # --- File Management ------------------------------------------
-    if action == "find_file":
-        ok, msg = file_manager.find_file(params.get("name", ""))
-        return ok, msg
+# --- File Management ------------------------------------------------
+@actions.action("find_file", name="")
+def _find_file(p):        return file_manager.find_file(p["name"])
 
-    if action == "create_folder":
-        return file_manager.create_folder(params.get("name", ""))
+@actions.action("create_folder", name="")
+def _create_folder(p):    return file_manager.create_folder(p["name"])
 
-    if action == "delete_file":
-        return file_manager.delete_file(params.get("path", ""))
+@actions.action("delete_file", path="")
+def _delete_file(p):      return file_manager.delete_file(p["path"])
 
-    if action == "compress_folder":
-        return file_manager.compress_folder(params.get("folder", ""))
+@actions.action("compress_folder", folder="")
+def _compress_folder(p):  return file_manager.compress_folder(p["folder"])
 
-    if action == "organize_downloads":
-        return file_manager.organize_downloads()
+@actions.action("organize_downloads")
+def _organize_downloads(p): return file_manager.organize_downloads()
 
-    if action == "clean_junk":
-        return file_manager.clean_junk()
+@actions.action("clean_junk")
+def _clean_junk(p):       return file_manager.clean_junk()
 
-    # --- Web Services ---------------------------------------------
-    if action == "search_google":
-        query = params.get("query", "")
-        context.set_last_query(query)
-        return web_services.search_google(query)
+# --- Web Services ---------------------------------------------------
+@actions.action("search_google", query="")
+def _search_google(p):
+    context.set_last_query(p["query"])
+    return web_services.search_google(p["query"])
 
-    if action == "play_youtube":
-        query = params.get("query", "")
-        context.set_last_query(query)
-        return web_services.play_youtube(query)
+@actions.action("play_youtube", query="")
+def _play_youtube(p):
+    context.set_last_query(p["query"])
+    return web_services.play_youtube(p["query"])
 
-    if action == "search_wikipedia":
-        query = params.get("query", "")
-        return web_services.search_wikipedia(query)
+@actions.action("search_wikipedia", query="")
+def _search_wikipedia(p): return web_services.search_wikipedia(p["query"])
 
-    if action == "open_url":
-        url = params.get("url", "")
-        context.set_last_url(url)
-        return web_services.open_url(url)
+@actions.action("open_url", url="")
+def _open_url(p):
+    context.set_last_url(p["url"])
+    return web_services.open_url(p["url"])
 
-    if action == "open_news":
-        return web_services.open_news()
+@actions.action("open_news")
+def _open_news(p):        return web_services.open_news()
 
-    if action == "download_file":
-        return web_services.download_file(params.get("url", ""),
-                                          params.get("filename"))
+@actions.action("download_file", url="", filename=None)
+def _download_file(p):    return web_services.download_file(p["url"], p["filename"])
 
-    if action == "open_spotify":
-        return web_services.open_spotify()
+@actions.action("open_spotify")
+def _open_spotify(p):     return web_services.open_spotify()
 
-    if action == "open_whatsapp":
-        return web_services.open_whatsapp()
+@actions.action("open_whatsapp")
+def _open_whatsapp(p):    return web_services.open_whatsapp()
 
-    if action == "open_gmail":
-        return web_services.open_gmail()
+@actions.action("open_gmail")
+def _open_gmail(p):       return web_services.open_gmail()
 
-    # --- Automation -----------------------------------------------
-    if action == "run_automation":
-        name = params.get("name", "")
-        return automation_mod.run_automation(name, dispatch)
+# --- Automation -----------------------------------------------------
+@actions.action("run_automation", name="")
+def _run_automation(p):   return automation_mod.run_automation(p["name"], dispatch)
 
-    if action == "schedule_automation":
-        return automation_mod.schedule_automation(
-            params.get("time", "09:00"),
-            params.get("name", ""),
-            dispatch
-        )
+@actions.action("schedule_automation", time="09:00", name="")
+def _schedule_automation(p):
+    return automation_mod.schedule_automation(p["time"], p["name"], dispatch)
 
-    if action == "multi_step":
-        return automation_mod.execute_multi_step(params.get("steps", []), dispatch)
+@actions.action("multi_step", steps=[])
+def _multi_step(p):       return automation_mod.execute_multi_step(p["steps"], dispatch)
 
-    # --- Writing & Notes ------------------------------------------
-    if action == "write_note":
-        note_type = params.get("type", "note")
-        text = params.get("text", "")
-        if note_type == "reminder":
-            return writing_assistant.save_reminder(text, params.get("time"))
-        return writing_assistant.write_note(text, params.get("title"))
+# --- Writing & Notes ------------------------------------------------
+@actions.action("write_note", type="note", text="", title=None, time=None)
+def _write_note(p):
+    if p["type"] == "reminder":
+        return writing_assistant.save_reminder(p["text"], p["time"])
+    return writing_assistant.write_note(p["text"], p["title"])
 
-    if action == "get_reminders":
-        _, msg = writing_assistant.get_reminders()
-        return True, msg
+@actions.action("get_reminders")
+def _get_reminders(p):
+    _, msg = writing_assistant.get_reminders()
+    return True, msg
 
-    if action == "summarize":
-        return writing_assistant.summarize_file(params.get("file", ""))
+@actions.action("summarize", file="")
+def _summarize(p):        return writing_assistant.summarize_file(p["file"])
 
-    # --- Screen ---------------------------------------------------
-    if action == "take_screenshot":
-        return screen_reader.take_screenshot()
+# --- Screen ---------------------------------------------------------
+@actions.action("take_screenshot")
+def _take_screenshot(p):  return screen_reader.take_screenshot()
 
-    if action == "read_screen":
-        return screen_reader.read_screen()
+@actions.action("read_screen")
+def _read_screen(p):      return screen_reader.read_screen()
 
-    if action == "find_element":
-        return screen_reader.find_element(params.get("description", ""))
+@actions.action("find_element", description="")
+def _find_element(p):     return screen_reader.find_element(p["description"])
 
-    # --- Smart Home -----------------------------------------------
-    if action == "smart_home_light":
-        return smart_home.control_light(params.get("action","on"), params.get("room","living room"))
+# --- Smart Home -----------------------------------------------------
+@actions.action("smart_home_light", action="on", room="living room")
+def _smart_home_light(p): return smart_home.control_light(p["action"], p["room"])
 
-    if action == "smart_home_fan":
-        return smart_home.control_fan(params.get("action","on"), params.get("room","bedroom"))
+@actions.action("smart_home_fan", action="on", room="bedroom")
+def _smart_home_fan(p):   return smart_home.control_fan(p["action"], p["room"])
 
-    if action == "smart_home_ac":
-        return smart_home.control_ac(params.get("action","on"), params.get("temp"))
+@actions.action("smart_home_ac", action="on", temp=None)
+def _smart_home_ac(p):    return smart_home.control_ac(p["action"], p["temp"])
+
+
+# ===========================================================================
+# ACTION DISPATCHER
+# ===========================================================================
+
+def dispatch(action: str, params: dict) -> tuple[bool, str]:
+    """Route an action to its registered handler. Returns (ok, message)."""
+    spec = actions.get(action)
 
     # --- Fallback -------------------------------------------------
-    log_action(action, params, status="failed", detail="Unknown action.")
-    return False, f"I don't know how to perform \"{action}\" yet."
+    if spec is None:
+        log_action(action, params, status="failed", detail="Unknown action.")
+        return False, f"I don't know how to perform \"{action}\" yet."
+
+    # --- Security gate - dangerous actions need confirmation ------
+    if spec.gated and not request_permission(action, params):
+        return False, "Action cancelled."
+
+    return actions.call(spec, params)
 
 
 # ===========================================================================
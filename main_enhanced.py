@@ -28,28 +28,142 @@ if sys.platform == "win32":
 
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from typing import TYPE_CHECKING
 
 # Lock CWD and sys.path
 _THIS_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(_THIS_DIR))
 os.chdir(_THIS_DIR)
 
+from utils.startup import profile, lazy_import
+
+_import_start = time.perf_counter()
 from config import MEMORY_FILE, OPENAI_API_KEY
+from config_enhanced import (
+    DANGEROUS_ACTIONS,
+    WAKE_WORDS,
+    WAKE_WORD_PRONUNCIATIONS,
+    WAKE_KWS_THRESHOLD,
+    RECOGNITION_LANGUAGE,
+    PHRASE_TIMEOUT,
+    PHRASE_TIME_LIMIT,
+    VOICE_FRONTEND,
+    VAD_SAMPLE_RATE,
+    VAD_FRAME_MS,
+    VAD_ENERGY_RATIO,
+    VAD_MIN_ENERGY,
+    VAD_END_SILENCE_MS,
+    VOSK_MODEL_PATH,
+    SPECULATIVE_PARSING,
+    TTS_ENGINE,
+    TTS_RATE,
+    TTS_VOLUME,
+    TTS_VOICE_INDEX,
+    TTS_CACHE_ENABLED,
+    TTS_CACHE_DIR,
+    TTS_CACHE_MAX_MB,
+    TTS_CACHE_PROMOTE,
+    TTS_CACHE_PROMOTE_AFTER,
+    TTS_CACHE_PHRASES,
+    SPEECH_QUEUE_ENABLED,
+    SPEECH_STALE_AFTER,
+    ELEVENLABS_KEY,
+    ELEVENLABS_VOICE_ID,
+    APP_MAP,
+    DEFAULT_AUTOMATIONS,
+    AUTOMATIONS_FILE,
+    ROUTINE_WORKERS,
+    ROUTINE_STEP_TIMEOUT,
+    SCHEDULE_FILE,
+    SCHEDULER_MISSED_GRACE,
+    STARTUP_INIT_WORKERS,
+    STARTUP_REPORT,
+    TRACE_ENABLED,
+    TRACE_CAPACITY,
+    TRACE_DIR,
+    PROACTIVE_ENABLED,
+    PROACTIVE_MORNING_TIME,
+    PROACTIVE_EVENING_TIME,
+    AI_LOCAL_INTENTS,
+    AI_LOCAL_INTENT_THRESHOLD,
+    AI_SYSTEM_PROMPT,
+    AI_TOOLS_SYSTEM_PROMPT,
+    AI_STREAMING,
+    AI_MAX_TOKENS,
+    AI_TEMPERATURE,
+    OPENAI_MODEL,
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    GEMINI_BASE_URL,
+    OPENAI_BASE_URL,
+    AI_POOL_ENABLED,
+    AI_REQUEST_TIMEOUT,
+    AI_HEDGE_ENABLED,
+    AI_HEDGE_MIN_DELAY,
+    AI_KEEPALIVE_INTERVAL,
+    AI_KEEPALIVE_WINDOW,
+    AI_ROUTER_EWMA_ALPHA,
+    AI_BREAKER_FAILURES,
+    AI_BREAKER_COOLDOWN,
+    AI_QUOTA_COOLDOWN,
+    AI_STRUCTURED_OUTPUT,
+    AI_CONTEXT_TOKENS,
+    AI_CONTEXT_MAX_TURNS,
+    AI_CONTEXT_SUMMARY_TOKENS,
+    AI_CACHE_ENABLED,
+    AI_CACHE_MAX_ENTRIES,
+    AI_CACHE_DISK_MAX_ENTRIES,
+    AI_CACHE_ACTION_TTL,
+    AI_CACHE_CONVERSATION_TTL,
+    RESPONSE_CACHE_FILE,
+    MEMORY_JOURNAL_FILE,
+    MEMORY_FLUSH_INTERVAL,
+    MEMORY_SNAPSHOT_EVERY,
+    MEMORY_LAST_COMMANDS,
+    SEARCH_ROOTS,
+    FILE_INDEX_FILE,
+    FILE_INDEX_ENABLED,
+    FILE_INDEX_REFRESH_INTERVAL,
+    FILE_INDEX_MAX_DEPTH,
+    ORGANIZE_RULES,
+    JUNK_EXTENSIONS,
+    DOWNLOADS_DIR,
+    JUNK_SCAN_DIRS,
+    FILE_OPS_WORKERS,
+    FILE_OPS_BACKGROUND_THRESHOLD,
+    BACKUP_DIR,
+    BACKUP_INCREMENTAL,
+    BACKUP_WORKERS,
+    BACKUP_PROGRESS_STEP,
+)
 from utils.helpers import (
     print_banner,
     time_greeting,
     set_speak_fn,
-    load_memory,
 )
-from utils.logger import log_action, pop_last_action
+from utils import activity_log, logger as legacy_logger
+from utils.activity_log import log_action, pop_last_action, last_seq, logged_since
+from utils.memory_store import MemoryStore
 
 # Core modules - Enhanced versions
-from core.voice_input import VoiceInput
-from core.voice_output_enhanced import EnhancedVoiceOutput
-from core.context_manager import ContextManager
-from core.ai_brain_multi import MultiAIBrain  # Multi-provider AI support
+# (voice I/O, context and the AI brain are imported by main() on init threads)
+from core.action_registry import ActionRegistry
+from core.action_schema import ActionSchema
+from core.tracing import Tracer
+from core.input_mux import InputMultiplexer
+from core.intent_fastpath import LocalIntentMatcher
+from core.response_cache import ResponseCache
+from core.speech_stream import StreamingSpeaker
+from core.speech_queue import SpeechScheduler, EMERGENCY, HIGH, NORMAL, LOW, priority_level
+from core.speculative import SpeculativeParser
+from core.context_window import ContextWindow, BudgetedContext
+from core.pronouns import PronounResolver
+from core.routine_dag import run_routine, load_routine
+from core.scheduler import Scheduler
+from core import security, tts_cache
 from core.security import (
     request_permission,
     emergency_stop,
@@ -57,214 +171,483 @@ from core.security import (
     reset_emergency,
 )
 
-# Feature modules
-from modules import (
-    pc_control,
-    file_manager,
-    web_services,
-)
-from modules import automation as automation_mod
-from modules import writing_assistant, screen_reader, smart_home
+# Feature modules still log through utils.logger. Point it at the segment
+# log before any of them is imported, so each action is recorded once, in
+# order, and dispatch() sees that the module logged it
+legacy_logger.log_action = activity_log.log_action
+legacy_logger.pop_last_action = activity_log.pop_last_action
+legacy_logger.get_history = activity_log.get_history
+
+# Feature modules - imported on first use of one of their actions
+pc_control = lazy_import("modules.pc_control")
+file_manager = lazy_import("modules.file_manager")
+web_services = lazy_import("modules.web_services")
+automation_mod = lazy_import("modules.automation")
+writing_assistant = lazy_import("modules.writing_assistant")
+screen_reader = lazy_import("modules.screen_reader")
+smart_home = lazy_import("modules.smart_home")
+from modules.file_index import FileIndex
+from modules.file_ops import FileOpsEngine, FilePlan
+from modules import archiver
+
+if TYPE_CHECKING:
+    from core.voice_input import VoiceInput
+    from core.voice_output_enhanced import EnhancedVoiceOutput
+    from core.ai_brain_multi import MultiAIBrain
+
+profile.record("eager imports", _import_start, kind="import")
 
 
 # ===========================================================================
 # GLOBAL INSTANCES
 # ===========================================================================
-voice_in: VoiceInput = None  # type: ignore
-voice_out: EnhancedVoiceOutput = None  # type: ignore
-context: ContextManager = None  # type: ignore
-brain: MultiAIBrain = None  # type: ignore
+tracer = Tracer(TRACE_CAPACITY, enabled=TRACE_ENABLED)
+voice_in: "VoiceInput" = None  # type: ignore
+voice_out: "EnhancedVoiceOutput" = None  # type: ignore
+context: BudgetedContext = None  # type: ignore
+brain: "MultiAIBrain" = None  # type: ignore
+intents: LocalIntentMatcher = None  # type: ignore
+responses: ResponseCache = None  # type: ignore
+streamer: StreamingSpeaker = None  # type: ignore
+memory: MemoryStore = None  # type: ignore
+file_index: FileIndex = None  # type: ignore
+speculator: SpeculativeParser = None  # type: ignore
+speech: SpeechScheduler = None  # type: ignore
+inputs: InputMultiplexer = None  # type: ignore
 
 
-def speak(text: str, priority: bool = False):
-    """Central speak function with priority support"""
-    if voice_out:
-        voice_out.speak(text, priority=priority)
+def speak(text: str, priority=False, group: str = None):
+    """Central speak function: queued by priority level (see core.speech_queue)"""
+    token = tracer.begin("speak")
+    if speech:
+        speech.say(text, priority, group)
+    elif voice_out:
+        voice_out.speak(text, priority=priority_level(priority) <= HIGH)
     else:
         print(f"  [DISHA] {text}")
+    tracer.end(token)
+
+
+file_ops = FileOpsEngine(ORGANIZE_RULES, JUNK_EXTENSIONS, max_workers=FILE_OPS_WORKERS)
+
+
+def run_file_plan(plan: FilePlan, dry_run: bool) -> tuple[bool, str]:
+    """Describe, run, or hand a file plan to the background worker."""
+    if dry_run or not plan.total:
+        return True, plan.describe()
+    if plan.total <= FILE_OPS_BACKGROUND_THRESHOLD:
+        report = file_ops.execute(plan, cancelled=is_stopped)   # dispatch() logs it
+        return True, report.summary()
+    
+    def done(report):
+        log_action(plan.kind, {"files": report.done},
+                   status="failed" if report.error else "success", detail=report.summary())
+        speak(report.summary())
+    
+    if not file_ops.run_in_background(plan, done, cancelled=is_stopped):
+        return False, "I'm still busy with the previous file operation."
+    return True, f"Working on {plan.total} files in the background. I'll let you know when it's done."
+
+
+_backup_running = threading.Lock()
+
+
+def start_backup(folder: Path, incremental: bool) -> tuple[bool, str]:
+    """Archive a folder on a background thread, announcing progress."""
+    if not _backup_running.acquire(blocking=False):
+        return False, "A backup is already running."
+    
+    def progress(fraction):
+        percent = int(fraction * 100) // BACKUP_PROGRESS_STEP * BACKUP_PROGRESS_STEP
+        if 0 < percent < 100 and percent > announced[0]:
+            announced[0] = percent
+            speak(f"Backup {percent} percent complete.", priority=LOW, group="backup")
+    
+    def job():
+        try:
+            result = archiver.compress_folder(
+                folder,
+                BACKUP_DIR,
+                incremental=incremental,
+                workers=BACKUP_WORKERS or None,
+                progress=progress,
+                cancelled=is_stopped,
+            )
+            status = "success" if result.ok else "failed"
+            log_action(
+                "compress_folder",
+                {"folder": str(folder), "archive": str(result.path or "")},
+                status=status,
+                detail=result.summary(),
+            )
+            speak(result.summary())
+        except Exception as e:
+            print(f"  [BACKUP] {folder} failed: {e}")
+            log_action(
+                "compress_folder",
+                {"folder": str(folder), "archive": ""},
+                status="failed",
+                detail=str(e),
+            )
+            speak(f"The backup of {folder.name} failed: {e}")
+        finally:
+            _backup_running.release()
+    
+    announced = [0]
+    threading.Thread(target=job, name="disha-backup", daemon=True).start()
+    return True, f"Backing up {folder.name} in the background."
+
+
+# ===========================================================================
+# ACTION REGISTRY
+# ===========================================================================
+# Every action is registered once at import time.  dispatch() is a single
+# dict lookup, and each handler receives params with its defaults applied.
+actions = ActionRegistry(DANGEROUS_ACTIONS, tracer=tracer)
+
+
+# Emergency / control (bypass the permission gate)
+@actions.action("emergency_stop", gated=False)
+def _emergency_stop(params):
+    emergency_stop()
+    return True, "Emergency stop activated. All operations halted."
+
+
+@actions.action("quit", gated=False)
+def _quit(params):
+    speak("DISHA systems shutting down. Goodbye, Subhra.")
+    log_action("quit", status="success", detail="User requested exit.")
+    if speech:
+        speech.drain(timeout=5.0)
+    else:
+        time.sleep(1)
+    sys.exit(0)
+
+
+@actions.action("undo", gated=False)
+def _undo(params):
+    return handle_undo()
+
+
+@actions.action("performance_report", gated=False)
+def _performance_report(params):
+    print("\n  \033[96m[PERF] Action metrics\033[0m")
+    print(actions.format_metrics())
+    if intents:
+        print(intents.report())
+    if responses:
+        print(f"  {responses.summary()}")
+    if streamer:
+        print(streamer.report())
+    if hasattr(voice_in, "gate"):
+        print(voice_in.gate.report())
+    if speculator:
+        print(speculator.report())
+    if speech:
+        print(f"  {speech.summary()}")
+    if hasattr(context, "window"):
+        print(context.window.report())
+    if hasattr(brain, "report"):
+        print(brain.report())
+    print("\n  \033[96m[PERF] Startup\033[0m")
+    print(profile.report())
+    return True, "I've printed the performance report to the console."
+
+
+@actions.action("ai_status", gated=False)
+def _ai_status(params):
+    router = getattr(brain, "router", None)
+    if router is None:
+        return True, f"I'm using {brain.get_provider()} for AI requests."
+    print("\n  \033[96m[AI] Provider routing\033[0m")
+    print(router.status())
+    return True, router.summary()
+
+
+@actions.action("trace_report", gated=False)
+def _trace_report(params):
+    print("\n  \033[96m[TRACE] Per-stage latency\033[0m")
+    print(tracer.summary())
+    print(tracer.flame(tracer.turn - 1 if tracer.turn > 1 else tracer.turn))
+    path = tracer.export_chrome(TRACE_DIR / f"trace-{datetime.now():%Y%m%d-%H%M%S}.json")
+    print(f"  Chrome trace written to {path}")
+    return True, "I've printed the latency breakdown and saved a trace file."
+
+
+# PC Control
+@actions.action("open_app", app="")
+def _open_app(params):
+    app = params["app"]
+    ok, msg = pc_control.open_app(app)
+    if ok:
+        context.set_last_app(app)
+    return ok, msg
+
+
+@actions.action("close_app", app="")
+def _close_app(params):
+    return pc_control.close_app(params["app"])
+
+
+@actions.action("set_volume", direction="up")
+def _set_volume(params):
+    return pc_control.set_volume(params["direction"])
+
+
+@actions.action("set_brightness", direction="up")
+def _set_brightness(params):
+    return pc_control.set_brightness(params["direction"])
+
+
+@actions.action("wifi_toggle", state=True)
+def _wifi_toggle(params):
+    return pc_control.wifi_toggle(params["state"])
+
+
+@actions.action("bluetooth_toggle", state=True)
+def _bluetooth_toggle(params):
+    return pc_control.bluetooth_toggle(params["state"])
+
+
+@actions.action("shutdown")
+def _shutdown(params):
+    return pc_control.shutdown()
+
+
+@actions.action("restart")
+def _restart(params):
+    return pc_control.restart()
+
+
+@actions.action("sleep")
+def _sleep(params):
+    return pc_control.sleep()
+
+
+# File Management
+@actions.action("find_file", name="")
+def _find_file(params):
+    # Answer from the file index; crawl only if it has nothing yet
+    if file_index and file_index.ready.is_set():
+        hits = file_index.search(params["name"])
+        if hits:
+            for path in hits:
+                print(f"  \033[90m[FILE] {path}\033[0m")
+            top = Path(hits[0])
+            msg = f"I found {top.name} in {top.parent}."
+            if len(hits) > 1:
+                msg += f" There are {len(hits) - 1} other close matches on screen."
+            return True, msg
+    return file_manager.find_file(params["name"])
+
+
+@actions.action("create_folder", name="")
+def _create_folder(params):
+    return file_manager.create_folder(params["name"])
+
+
+@actions.action("delete_file", path="")
+def _delete_file(params):
+    return file_manager.delete_file(params["path"])
+
+
+@actions.action("compress_folder", folder="", full=False)
+def _compress_folder(params):
+    folder = Path(params["folder"]).expanduser()
+    if params["folder"] and not folder.is_absolute():
+        folder = Path.home() / folder
+    if params["folder"] and folder.is_dir():
+        return start_backup(folder, incremental=BACKUP_INCREMENTAL and not params["full"])
+    return file_manager.compress_folder(params["folder"])
+
+
+@actions.action("organize_downloads", dry_run=False)
+def _organize_downloads(params):
+    return run_file_plan(file_ops.plan_organize(DOWNLOADS_DIR), params["dry_run"])
+
+
+@actions.action("clean_junk", dry_run=False)
+def _clean_junk(params):
+    return run_file_plan(file_ops.plan_clean(JUNK_SCAN_DIRS), params["dry_run"])
+
+
+# Web Services
+@actions.action("search_google", query="")
+def _search_google(params):
+    query = params["query"]
+    context.set_last_query(query)
+    return web_services.search_google(query)
+
+
+@actions.action("play_youtube", query="")
+def _play_youtube(params):
+    query = params["query"]
+    context.set_last_query(query)
+    return web_services.play_youtube(query)
+
+
+@actions.action("search_wikipedia", query="")
+def _search_wikipedia(params):
+    return web_services.search_wikipedia(params["query"])
+
+
+@actions.action("open_url", url="")
+def _open_url(params):
+    url = params["url"]
+    context.set_last_url(url)
+    return web_services.open_url(url)
+
+
+@actions.action("open_news")
+def _open_news(params):
+    return web_services.open_news()
+
+
+@actions.action("download_file", url="", filename=None)
+def _download_file(params):
+    return web_services.download_file(params["url"], params["filename"])
+
+
+@actions.action("open_spotify")
+def _open_spotify(params):
+    return web_services.open_spotify()
+
+
+@actions.action("open_whatsapp")
+def _open_whatsapp(params):
+    return web_services.open_whatsapp()
+
+
+@actions.action("open_gmail")
+def _open_gmail(params):
+    return web_services.open_gmail()
+
+
+# Automation
+def _prompting() -> set:
+    """Threads blocked on a permission / PIN prompt (their steps don't time out)."""
+    return inputs.waiting() if inputs else set()
+
+
+@actions.action("run_automation", name="")
+def _run_automation(params):
+    steps = load_routine(params["name"], AUTOMATIONS_FILE, DEFAULT_AUTOMATIONS)
+    if steps is None:
+        return automation_mod.run_automation(params["name"], dispatch)
+    return run_routine(steps, dispatch, params["name"], workers=ROUTINE_WORKERS,
+                       step_timeout=ROUTINE_STEP_TIMEOUT, barriers=DANGEROUS_ACTIONS,
+                       prompting=_prompting)
+
+
+@actions.action("schedule_automation", time="09:00", name="")
+def _schedule_automation(params):
+    name = params["name"].strip()
+    try:
+        scheduler.add_daily(
+            "automation", params["time"], {"name": name},
+            job_id=f"automation:{name.lower()}@{params['time']}",
+        )
+    except ValueError as e:
+        return False, str(e)
+    return True, f"I'll run {name} every day at {params['time']}."
+
+
+@actions.action("multi_step", steps=[])
+def _multi_step(params):
+    return run_routine(params["steps"], dispatch, "task", workers=ROUTINE_WORKERS,
+                       step_timeout=ROUTINE_STEP_TIMEOUT, barriers=DANGEROUS_ACTIONS,
+                       prompting=_prompting)
+
+
+# Writing & Notes
+@actions.action("write_note", type="note", text="", title=None, time=None)
+def _write_note(params):
+    if params["type"] == "reminder":
+        return writing_assistant.save_reminder(params["text"], params["time"])
+    return writing_assistant.write_note(params["text"], params["title"])
+
+
+@actions.action("get_reminders")
+def _get_reminders(params):
+    _, msg = writing_assistant.get_reminders()
+    return True, msg
+
+
+@actions.action("summarize", file="")
+def _summarize(params):
+    return writing_assistant.summarize_file(params["file"])
+
+
+# Screen
+@actions.action("take_screenshot")
+def _take_screenshot(params):
+    return screen_reader.take_screenshot()
+
+
+@actions.action("read_screen")
+def _read_screen(params):
+    return screen_reader.read_screen()
+
+
+@actions.action("find_element", description="")
+def _find_element(params):
+    return screen_reader.find_element(params["description"])
+
+
+# Smart Home
+@actions.action("smart_home_light", action="on", room="living room")
+def _smart_home_light(params):
+    return smart_home.control_light(params["action"], params["room"])
+
+
+@actions.action("smart_home_fan", action="on", room="bedroom")
+def _smart_home_fan(params):
+    return smart_home.control_fan(params["action"], params["room"])
+
+
+@actions.action("smart_home_ac", action="on", temp=None)
+def _smart_home_ac(params):
+    return smart_home.control_ac(params["action"], params["temp"])
 
 
 # ===========================================================================
 # ACTION DISPATCHER
 # ===========================================================================
-def dispatch(action: str, params: dict, explanation: str = "") -> tuple[bool, str]:
+def dispatch(action: str, params: dict, explanation: str = "",
+             log: bool = True) -> tuple[bool, str]:
     """
-    Route an action to the appropriate module.
+    Route an action to its registered handler.
     
     Args:
         action: Action name
         params: Action parameters
         explanation: Optional explanation to speak before action
+        log: False for undo reversals, which must not become undo targets
     
     Returns:
         (success, message) tuple
     """
     # Announce action if explanation provided
     if explanation:
-        speak(explanation)
-    
-    # Emergency / control
-    if action == "emergency_stop":
-        emergency_stop()
-        return True, "Emergency stop activated. All operations halted."
-    
-    if action == "quit":
-        speak("DISHA systems shutting down. Goodbye, Subhra.")
-        log_action("quit", status="success", detail="User requested exit.")
-        time.sleep(1)
-        sys.exit(0)
+        speak(explanation, priority=LOW)
     
-    if action == "undo":
-        return handle_undo()
+    spec = actions.get(action)
+    if spec is None:
+        log_action(action, params, status="failed", detail="Unknown action.")
+        return False, f"I don't have the capability to perform '{action}' yet."
     
     # Security gate
-    if not request_permission(action, params):
+    if spec.gated and not request_permission(action, params):
         return False, "Action cancelled."
     
-    # PC Control
-    if action == "open_app":
-        app = params.get("app", "")
-        ok, msg = pc_control.open_app(app)
-        if ok:
-            context.set_last_app(app)
-        return ok, msg
-    
-    if action == "close_app":
-        app = params.get("app", "")
-        return pc_control.close_app(app)
-    
-    if action == "set_volume":
-        return pc_control.set_volume(params.get("direction", "up"))
-    
-    if action == "set_brightness":
-        return pc_control.set_brightness(params.get("direction", "up"))
-    
-    if action == "wifi_toggle":
-        return pc_control.wifi_toggle(params.get("state", True))
-    
-    if action == "bluetooth_toggle":
-        return pc_control.bluetooth_toggle(params.get("state", True))
-    
-    if action == "shutdown":
-        return pc_control.shutdown()
-    
-    if action == "restart":
-        return pc_control.restart()
-    
-    if action == "sleep":
-        return pc_control.sleep()
-    
-    # File Management
-    if action == "find_file":
-        return file_manager.find_file(params.get("name", ""))
-    
-    if action == "create_folder":
-        return file_manager.create_folder(params.get("name", ""))
-    
-    if action == "delete_file":
-        return file_manager.delete_file(params.get("path", ""))
-    
-    if action == "compress_folder":
-        return file_manager.compress_folder(params.get("folder", ""))
-    
-    if action == "organize_downloads":
-        return file_manager.organize_downloads()
-    
-    if action == "clean_junk":
-        return file_manager.clean_junk()
-    
-    # Web Services
-    if action == "search_google":
-        query = params.get("query", "")
-        context.set_last_query(query)
-        return web_services.search_google(query)
-    
-    if action == "play_youtube":
-        query = params.get("query", "")
-        context.set_last_query(query)
-        return web_services.play_youtube(query)
-    
-    if action == "search_wikipedia":
-        query = params.get("query", "")
-        return web_services.search_wikipedia(query)
-    
-    if action == "open_url":
-        url = params.get("url", "")
-        context.set_last_url(url)
-        return web_services.open_url(url)
-    
-    if action == "open_news":
-        return web_services.open_news()
-    
-    if action == "download_file":
-        return web_services.download_file(
-            params.get("url", ""), params.get("filename")
-        )
-    
-    if action == "open_spotify":
-        return web_services.open_spotify()
-    
-    if action == "open_whatsapp":
-        return web_services.open_whatsapp()
-    
-    if action == "open_gmail":
-        return web_services.open_gmail()
-    
-    # Automation
-    if action == "run_automation":
-        name = params.get("name", "")
-        return automation_mod.run_automation(name, dispatch)
-    
-    if action == "schedule_automation":
-        return automation_mod.schedule_automation(
-            params.get("time", "09:00"), params.get("name", ""), dispatch
-        )
-    
-    if action == "multi_step":
-        return automation_mod.execute_multi_step(params.get("steps", []), dispatch)
-    
-    # Writing & Notes
-    if action == "write_note":
-        note_type = params.get("type", "note")
-        text = params.get("text", "")
-        if note_type == "reminder":
-            return writing_assistant.save_reminder(text, params.get("time"))
-        return writing_assistant.write_note(text, params.get("title"))
-    
-    if action == "get_reminders":
-        _, msg = writing_assistant.get_reminders()
-        return True, msg
-    
-    if action == "summarize":
-        return writing_assistant.summarize_file(params.get("file", ""))
-    
-    # Screen
-    if action == "take_screenshot":
-        return screen_reader.take_screenshot()
-    
-    if action == "read_screen":
-        return screen_reader.read_screen()
-    
-    if action == "find_element":
-        return screen_reader.find_element(params.get("description", ""))
-    
-    # Smart Home
-    if action == "smart_home_light":
-        return smart_home.control_light(
-            params.get("action", "on"), params.get("room", "living room")
-        )
-    
-    if action == "smart_home_fan":
-        return smart_home.control_fan(
-            params.get("action", "on"), params.get("room", "bedroom")
-        )
-    
-    if action == "smart_home_ac":
-        return smart_home.control_ac(params.get("action", "on"), params.get("temp"))
-    
-    # Fallback
-    log_action(action, params, status="failed", detail="Unknown action.")
-    return False, f"I don't have the capability to perform '{action}' yet."
+    mark = last_seq()
+    ok, msg = actions.call(spec, params)
+    # Every completed action on the system is logged, so undo always finds
+    # it - here, unless the module already logged it itself. Control and
+    # report actions (ungated) stay out of the undo trail.
+    if log and ok and spec.gated and not logged_since(mark, action):
+        log_action(action, params, status="success", detail=msg)
+    return ok, msg
 
 
 # ===========================================================================
@@ -299,7 +682,7 @@ def handle_undo() -> tuple[bool, str]:
         log_action(
             "undo", {"original": action}, status="pending", detail=f"Reversing {action}"
         )
-        ok, msg = dispatch(rev_action, rev_params, explanation=f"Undoing {action}")
+        ok, msg = dispatch(rev_action, rev_params, explanation=f"Undoing {action}", log=False)
         return ok, f"Done. I've reversed the last action."
     
     # Non-reversible
@@ -317,26 +700,161 @@ def handle_undo() -> tuple[bool, str]:
 
 
 # ===========================================================================
-# PROACTIVE SUGGESTIONS
+# SCHEDULED JOBS & PROACTIVE SUGGESTIONS
 # ===========================================================================
-def check_proactive_suggestions():
-    """Check if DISHA should offer proactive suggestions"""
-    hour = datetime.now().hour
+scheduler = Scheduler(SCHEDULE_FILE, missed_grace=SCHEDULER_MISSED_GRACE)
+
+
+def _run_scheduled_automation(job):
+    """Scheduler handler: run a saved routine at its time."""
+    name = job["payload"]["name"]
+    speak(f"It's time for your {name} routine.")
+    # Through dispatch() like any other request: permission gate and undo log
+    ok, msg = dispatch("run_automation", {"name": name})
+    if not ok:
+        log_action("schedule_automation", {"name": name}, status="failed", detail=msg)
+    speak(msg)
+
+
+def _proactive_prompt(job):
+    """Scheduler handler: speak a daily proactive suggestion."""
+    if not is_stopped():
+        speak(job["payload"]["message"])
+
+
+scheduler.register("automation", _run_scheduled_automation)
+scheduler.register("proactive", _proactive_prompt)
+
+
+def schedule_proactive_suggestions():
+    """Arm the daily morning / evening prompts (not persisted - config owns them)."""
+    scheduler.add_daily(
+        "proactive", PROACTIVE_MORNING_TIME,
+        {"message": "Good morning, Subhra. Would you like me to run your morning routine?"},
+        job_id="proactive:morning", persist=False,
+    )
+    scheduler.add_daily(
+        "proactive", PROACTIVE_EVENING_TIME,
+        {"message": "It's getting late. Should I dim the screen and prepare for evening mode?"},
+        job_id="proactive:evening", persist=False,
+    )
+
+
+# ===========================================================================
+# TURN PIPELINE
+# ===========================================================================
+def handle_turn(user_text: str, arrived_at: float = None) -> dict:
+    """
+    Run one utterance through the pipeline: context, pronoun resolution,
+    intent / cache / AI classification, then the reply or dispatch.
     
-    # Morning suggestions
-    if hour == 9 and datetime.now().minute == 0:
-        speak("Good morning, Subhra. Would you like me to run your morning routine?")
+    Args:
+        user_text: Stripped user input
+        arrived_at: perf_counter() time the input was queued, if known
     
-    # Evening suggestions
-    elif hour == 20 and datetime.now().minute == 0:
-        speak("It's getting late. Should I dim the screen and prepare for evening mode?")
+    Returns:
+        The classification result (with "ok" / "message" added for actions)
+    """
+    tracer.new_turn()
+    if arrived_at is not None:
+        tracer.record("input.queue", int(arrived_at * 1e9))
+    turn_span = tracer.begin("turn")
+    
+    # Process input
+    print(f"\n  \033[93m[USER]\033[0m {user_text}")
+    span = tracer.begin("context.add_user")
+    context.add_user(user_text)
+    memory.append(
+        "last_commands",
+        {"text": user_text, "time": datetime.now().isoformat(timespec="seconds")},
+        limit=MEMORY_LAST_COMMANDS,
+    )
+    tracer.end(span)
+    
+    # Resolve pronouns - already done on the partial transcript if it
+    # matched the final one exactly
+    speculated = speculator.on_final(user_text) if speculator else None
+    span = tracer.begin("resolve_pronouns")
+    resolved = speculated[0] if speculated else context.resolve_pronouns(user_text)
+    tracer.end(span)
+    if resolved != user_text:
+        print(f"  \033[90m[Resolved to: {resolved}]\033[0m")
+    
+    # Common commands are classified locally; the rest go to the AI brain
+    span = tracer.begin("intents.match")
+    if speculated:
+        result = speculated[1]
+    else:
+        result = intents.match(resolved) if intents else None
+    tracer.end(span)
+    if result is None:
+        # Cache keys on the resolved text, so "close it" never
+        # collides across different apps
+        span = tracer.begin("cache.get")
+        provider = brain.get_provider()
+        result = responses.get(resolved, provider) if responses else None
+        tracer.end(span)
+    if result is None:
+        span = tracer.begin("brain.process")
+        started = time.perf_counter()
+        if streamer:
+            result = streamer.run(brain.process_stream(resolved), started)
+        else:
+            result = brain.process(resolved)
+        tracer.end(span)
+        if intents:
+            intents.record_remote(time.perf_counter() - started)
+        if responses and not result.get("partial"):
+            # The fallback brain tags its answers, so they are never
+            # stored under the provider that was picked beforehand
+            responses.put(resolved, result.get("provider", provider), result)
+    context.set_last_action(result)
+    
+    if result["type"] == "conversation":
+        # Conversational reply
+        reply = result["reply"]
+        if not result.get("spoken"):
+            speak(reply)
+        context.add_disha(reply)
+    
+    elif result["type"] == "action":
+        # Execute action
+        action = result["action"]
+        params = result.get("params", {})
+        explanation = result.get("explanation", "")
+    
+        # Update context anchors
+        if action == "open_app":
+            context.set_last_app(params.get("app", ""))
+        if action in ("search_google", "play_youtube"):
+            context.set_last_query(params.get("query", ""))
+        if action == "open_url":
+            context.set_last_url(params.get("url", ""))
+    
+        span = tracer.begin("dispatch")
+        ok, msg = dispatch(action, params, explanation)
+        tracer.end(span)
+    
+        if ok:
+            speak(msg, priority=EMERGENCY if action == "emergency_stop" else NORMAL)
+        else:
+            speak(f"I encountered an issue: {msg}")
+    
+        context.add_disha(msg)
+        result = dict(result, ok=ok, message=msg)
+    
+    if speculator:
+        speculator.invalidate()     # context changed; older partials are stale
+    tracer.end(turn_span)
+    return result
 
 
 # ===========================================================================
 # MAIN LOOP
 # ===========================================================================
 def main():
-    global voice_in, voice_out, context, brain
+    global voice_in, voice_out, context, brain, intents, responses, streamer, memory
+    global file_index, speculator, speech, inputs
     
     # Print banner
     print_banner()
@@ -344,22 +862,186 @@ def main():
     # Initialize subsystems
     print("  \033[96mInitializing DISHA Enhanced Systems...\033[0m\n")
     
-    # Voice output first
-    voice_out = EnhancedVoiceOutput()
-    set_speak_fn(speak)
+    # Actions go to the pooled providers as tools, so the prompt drops the
+    # inline JSON format; the schema also repairs JSON that still shows up
+    schema = ActionSchema(actions)
+    structured = AI_POOL_ENABLED and AI_STRUCTURED_OUTPUT
+    system_prompt = AI_TOOLS_SYSTEM_PROMPT if structured else AI_SYSTEM_PROMPT
+    
+    # Independent subsystems come up in parallel; each import happens on its
+    # own init thread, so the slow SDK imports overlap
+    def init_brain():
+        from core.context_manager import ContextManager
+        from core.ai_brain_multi import MultiAIBrain  # Multi-provider AI support
+        ctx = BudgetedContext(
+            ContextManager(),
+            ContextWindow(AI_CONTEXT_TOKENS, AI_CONTEXT_MAX_TURNS, AI_CONTEXT_SUMMARY_TOKENS),
+            PronounResolver(),
+        )
+        if not AI_POOL_ENABLED:
+            return ctx, MultiAIBrain(ctx, ai_provider="auto")
+        from core.provider_pool import PooledBrain, build_clients
+        clients = build_clients(
+            GEMINI_API_KEY, OPENAI_API_KEY, GEMINI_MODEL, OPENAI_MODEL,
+            GEMINI_BASE_URL, OPENAI_BASE_URL, AI_REQUEST_TIMEOUT,
+        )
+        if not clients:
+            return ctx, MultiAIBrain(ctx, ai_provider="auto")
+        # The router already handles provider failover, so the fallback is
+        # the offline pattern matcher: it answers at once when all are tripped
+        ai = PooledBrain(
+            ctx, clients, fallback=MultiAIBrain(ctx, ai_provider="offline"),
+            system_prompt=system_prompt,
+            max_tokens=AI_MAX_TOKENS,
+            temperature=AI_TEMPERATURE,
+            hedge=AI_HEDGE_ENABLED,
+            hedge_min_delay=AI_HEDGE_MIN_DELAY,
+            keepalive_interval=AI_KEEPALIVE_INTERVAL,
+            keepalive_window=AI_KEEPALIVE_WINDOW,
+            router_options={
+                "alpha": AI_ROUTER_EWMA_ALPHA,
+                "failure_threshold": AI_BREAKER_FAILURES,
+                "cooldown": AI_BREAKER_COOLDOWN,
+                "quota_cooldown": AI_QUOTA_COOLDOWN,
+                "trial_timeout": AI_REQUEST_TIMEOUT,    # a half-open trial that never reports
+            },
+            schema=schema if structured else None,
+        )
+        ai.start()      # warm-up pings run in the background
+        return ctx, ai
+    
+    def init_voice_input():
+        if VOICE_FRONTEND == "streaming":
+            from core.wake_word import StreamingVoiceInput
+            if StreamingVoiceInput.available():
+                return StreamingVoiceInput(
+                    WAKE_WORDS,
+                    RECOGNITION_LANGUAGE,
+                    sample_rate=VAD_SAMPLE_RATE,
+                    frame_ms=VAD_FRAME_MS,
+                    vad_ratio=VAD_ENERGY_RATIO,
+                    vad_min_energy=VAD_MIN_ENERGY,
+                    end_silence_ms=VAD_END_SILENCE_MS,
+                    pronunciations=WAKE_WORD_PRONUNCIATIONS,
+                    kws_threshold=WAKE_KWS_THRESHOLD,
+                    phrase_timeout=PHRASE_TIMEOUT,
+                    phrase_limit=PHRASE_TIME_LIMIT,
+                    on_wake=lambda: print("  \033[90m[WAKE] Listening...\033[0m"),
+                    vosk_model=VOSK_MODEL_PATH,
+                    on_partial=lambda text: speculator and speculator.on_partial(text),
+                )
+            print("  [WAKE] PyAudio not available - using the classic voice input")
+        from core.voice_input import VoiceInput
+        return VoiceInput()
+    
+    def init_file_index():
+        index = FileIndex(FILE_INDEX_FILE, SEARCH_ROOTS, max_depth=FILE_INDEX_MAX_DEPTH)
+        index.start_background(FILE_INDEX_REFRESH_INTERVAL)
+        return index
+    
+    pool = ThreadPoolExecutor(max_workers=STARTUP_INIT_WORKERS, thread_name_prefix="disha-init")
+    brain_job = pool.submit(profile.timed, "context + AI brain", init_brain)
+    voice_in_job = pool.submit(profile.timed, "voice input", init_voice_input)
+    memory_job = pool.submit(
+        profile.timed, "memory", MemoryStore,
+        MEMORY_FILE,
+        MEMORY_JOURNAL_FILE,
+        flush_interval=MEMORY_FLUSH_INTERVAL,
+        snapshot_every=MEMORY_SNAPSHOT_EVERY,
+    )
+    
+    # Response cache in front of the provider call
+    cache_job = None
+    if AI_CACHE_ENABLED:
+        cache_job = pool.submit(
+            profile.timed, "response cache", ResponseCache,
+            RESPONSE_CACHE_FILE,
+            system_prompt,
+            max_entries=AI_CACHE_MAX_ENTRIES,
+            disk_max_entries=AI_CACHE_DISK_MAX_ENTRIES,
+            action_ttl=AI_CACHE_ACTION_TTL,
+            conversation_ttl=AI_CACHE_CONVERSATION_TTL,
+        )
     
-    # Context manager
-    context = ContextManager()
+    # File index (built and refreshed in the background)
+    index_job = None
+    if FILE_INDEX_ENABLED:
+        index_job = pool.submit(profile.timed, "file index", init_file_index)
     
-    # Multi-AI brain (supports Gemini, OpenAI, or offline)
-    brain = MultiAIBrain(context, ai_provider="auto")
+    # The SAPI engine is a COM object tied to the thread that created it:
+    # with the speech queue it is built, driven and stopped on the speech
+    # thread, otherwise it stays on the main thread
+    with profile.phase("voice output"):
+        from core.voice_output_enhanced import EnhancedVoiceOutput
+        
+        def make_voice():
+            voice = EnhancedVoiceOutput()
+            if TTS_CACHE_ENABLED and tts_cache.playback_available():
+                renderer = tts_cache.build_renderer(
+                    TTS_ENGINE, TTS_RATE, TTS_VOICE_INDEX, TTS_VOLUME,
+                    ELEVENLABS_KEY, ELEVENLABS_VOICE_ID,
+                )
+                voice = tts_cache.CachedVoice(
+                    voice,
+                    tts_cache.PhraseCache(TTS_CACHE_DIR, renderer.tag,
+                                          TTS_CACHE_MAX_MB * 1024 * 1024,
+                                          TTS_CACHE_PROMOTE_AFTER if TTS_CACHE_PROMOTE else 0),
+                    renderer,
+                )
+                voice.prerender(TTS_CACHE_PHRASES)      # top up anything missing
+                print(f"  \033[90m{voice.cache.summary()}\033[0m")
+            return voice
+        
+        if SPEECH_QUEUE_ENABLED:
+            speech = SpeechScheduler(voice_factory=make_voice, stale_after=SPEECH_STALE_AFTER)
+            speech.start()
+            voice_out = speech.voice
+        else:
+            voice_out = make_voice()
+        set_speak_fn(speak)
+    
+    # Local intent fast path (no network for common commands)
+    if AI_LOCAL_INTENTS:
+        with profile.phase("local intents"):
+            intents = LocalIntentMatcher(
+                [n for n in actions.names() if not actions.get(n).needs_params],
+                APP_MAP,
+                DEFAULT_AUTOMATIONS,
+                threshold=AI_LOCAL_INTENT_THRESHOLD,
+            )
+    
+    context, brain = brain_job.result()
+    voice_in = voice_in_job.result()
+    memory = memory_job.result()
+    if cache_job:
+        responses = cache_job.result()
+        print(f"  \033[90m{responses.summary()}\033[0m")
+    if index_job:
+        file_index = index_job.result()
+    pool.shutdown()
+    
+    # Stream replies into speech when the brain can produce tokens
+    if AI_STREAMING and hasattr(brain, "process_stream"):
+        streamer = StreamingSpeaker(speak, schema=schema)
+    elif AI_STREAMING:
+        print("  \033[90m[AI] This brain has no token stream; replies are spoken whole.\033[0m")
+    
+    # Parse partial transcripts while the user is still speaking
+    if SPECULATIVE_PARSING and getattr(voice_in, "on_partial", None):
+        speculator = SpeculativeParser(
+            context.resolve_pronouns,
+            intents.match if intents else (lambda text: None),
+        )
     
-    # Voice input
-    voice_in = VoiceInput()
+    name = memory.get("user_name", "Subhra")
     
-    # Load memory
-    mem = load_memory(MEMORY_FILE)
-    name = mem.get("user_name", "Subhra")
+    # Timed jobs: saved schedules plus the daily proactive prompts
+    with profile.phase("scheduler"):
+        restored = scheduler.load()
+        if PROACTIVE_ENABLED:
+            schedule_proactive_suggestions()
+        scheduler.start()
+    print(f"  \033[90m{scheduler.summary()} ({restored} restored)\033[0m")
     
     # Startup greeting - JARVIS style
     ai_provider = brain.get_provider()
@@ -376,102 +1058,52 @@ def main():
         f"Say 'Hey DISHA' to wake me, or type your command."
     )
     
-    voice_out.announce_system_event("startup", greeting)
+    if speech:
+        speech.say(greeting, HIGH)      # voice_out belongs to the speech thread
+    else:
+        voice_out.announce_system_event("startup", greeting)
     
-    # Start voice listener
+    # Start voice listener and the shared input queue
     voice_in.start()
+    inputs = InputMultiplexer(voice_in)
+    if speech:
+        inputs.add_listener(speech.barge_in)    # new input cuts DISHA off mid-sentence
+    inputs.start()
+    # Permission prompts read their yes/no and PIN through the mux, so the
+    # stdin reader never takes a confirmation as a new command
+    security.input = inputs.ask
+    profile.mark_ready()
+    for phase, start, end, _ in profile.spans():
+        tracer.record(f"startup.{phase}", int(start * 1e9), int(end * 1e9), turn=0)
+    if STARTUP_REPORT:
+        print(f"\n  \033[90m[STARTUP]\033[0m\n{profile.report()}")
     
     # Main event loop
     print("\n  " + "-" * 70)
     print("  Enhanced DISHA is active. Listening for your commands.\n")
     
-    last_suggestion_check = time.time()
-    
     while True:
         try:
             # Check for emergency stop
             if is_stopped():
                 print("\n  [!!!] Emergency stop is active. Type 'reset' to resume.")
-                typed = input("  > ").strip()
-                if typed.lower() == "reset":
+                item = None
+                while item is None:  # short timeouts keep Ctrl+C responsive
+                    item = inputs.get(timeout=1.0)
+                if item[1].strip().lower() == "reset":
                     reset_emergency()
                     speak("Emergency protocols disengaged. I'm operational again.")
                     voice_in.start()
                 continue
             
-            # Periodic proactive suggestions (every 5 minutes)
-            if time.time() - last_suggestion_check > 300:
-                check_proactive_suggestions()
-                last_suggestion_check = time.time()
-            
-            # Get input from voice or keyboard
-            user_text = None
-            
-            # Check voice queue
-            if voice_in.has_command():
-                user_text = voice_in.get_command(timeout=0.1)
-            else:
-                # Keyboard input with timeout
-                typed_holder = [None]
-                
-                def read_line():
-                    try:
-                        typed_holder[0] = input("  > ")
-                    except (EOFError, KeyboardInterrupt):
-                        typed_holder[0] = "quit"
-                
-                t = threading.Thread(target=read_line, daemon=True)
-                t.start()
-                t.join(timeout=2.0)
-                
-                if typed_holder[0] is not None:
-                    user_text = typed_holder[0].strip()
+            # Wait for whichever source (voice or keyboard) produces text first
+            item = inputs.get(timeout=1.0)
+            user_text = item[1].strip() if item else None
             
             if not user_text:
                 continue
             
-            # Process input
-            print(f"\n  \033[93m[USER]\033[0m {user_text}")
-            context.add_user(user_text)
-            
-            # Resolve pronouns
-            resolved = context.resolve_pronouns(user_text)
-            if resolved != user_text:
-                print(f"  \033[90m[Resolved to: {resolved}]\033[0m")
-            
-            # Process with enhanced AI brain
-            result = brain.process(resolved)
-            context.set_last_action(result)
-            
-            if result["type"] == "conversation":
-                # Conversational reply
-                reply = result["reply"]
-                speak(reply)
-                context.add_disha(reply)
-            
-            elif result["type"] == "action":
-                # Execute action
-                action = result["action"]
-                params = result.get("params", {})
-                explanation = result.get("explanation", "")
-                
-                # Update context anchors
-                if action == "open_app":
-                    context.set_last_app(params.get("app", ""))
-                if action in ("search_google", "play_youtube"):
-                    context.set_last_query(params.get("query", ""))
-                if action == "open_url":
-                    context.set_last_url(params.get("url", ""))
-                
-                ok, msg = dispatch(action, params, explanation)
-                
-                if ok:
-                    speak(msg)
-                else:
-                    speak(f"I encountered an issue: {msg}")
-                
-                context.add_disha(msg)
-            
+            handle_turn(user_text, item[2])
             print()  # spacing
         
         except KeyboardInterrupt:
@@ -479,7 +1111,7 @@ def main():
             try:
                 time.sleep(1)
             except KeyboardInterrupt:
-                speak("Emergency shutdown initiated.")
+                speak("Emergency shutdown initiated.", priority=EMERGENCY)
                 break
         
         except Exception as e:
@@ -489,9 +1121,22 @@ def main():
             time.sleep(1)
     
     # Cleanup
+    inputs.stop()
+    scheduler.stop()
+    if hasattr(brain, "stop"):
+        brain.stop()
+    if responses:
+        responses.close()
+    if memory:
+        memory.close()
+    if file_index:
+        file_index.stop()
     if voice_in:
         voice_in.stop()
-    if voice_out:
+    if speech:
+        speech.drain(timeout=3.0)
+        speech.stop()       # also stops voice_out on the speech thread
+    elif voice_out:
         voice_out.stop()
     
     print("\n  \033[96m[SHUTDOWN]\033[0m DISHA systems offline. Goodbye!\n")
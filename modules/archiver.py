@@ -0,0 +1,299 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+modules/archiver.py - Streaming, multi-core, incremental folder backups
+
+The folder is streamed through tarfile in pipe mode ("w|"), so files are
+read in small blocks and never held in memory whole. The tar stream is cut
+into fixed-size chunks that are compressed in parallel as independent gzip
+members (the pigz approach); zlib releases the GIL, so this scales across
+cores. Concatenated gzip members form a normal .tar.gz that any tool reads.
+Only a bounded number of chunks is in flight at once.
+
+A manifest of (size, mtime) per file is kept next to the backups, so later
+runs only archive files that changed. Progress is reported through a
+callback, and the job checks a cancellation callback between reads.
+
+Benchmark:
+    python -m modules.archiver <folder>
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import tarfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+CHUNK_SIZE = 1 << 20        # 1 MiB of tar stream per gzip member
+
+
+class ArchiveCancelled(Exception):
+    """Raised inside the archive loop when the cancel callback fires."""
+
+
+class ArchiveResult:
+    def __init__(self):
+        self.ok = False
+        self.path: Optional[Path] = None
+        self.files = 0
+        self.skipped = 0            # unchanged since the last backup
+        self.deleted = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+        self.cancelled = False
+
+    def summary(self) -> str:
+        if self.cancelled:
+            return "Backup cancelled. No partial archive was kept."
+        if not self.ok:
+            return "The backup failed."
+        if not self.files and not self.deleted:
+            return f"Nothing changed since the last backup ({self.skipped} files checked)."
+        mb_in, mb_out = self.bytes_in / 1e6, self.bytes_out / 1e6
+        speed = mb_in / self.seconds if self.seconds else 0
+        return (f"Backed up {self.files} files ({mb_in:.1f} MB to {mb_out:.1f} MB) "
+                f"in {self.seconds:.1f} seconds at {speed:.0f} MB per second.")
+
+
+class _ParallelGzipWriter:
+    """File-like sink: compresses CHUNK_SIZE blocks on a pool, writes in order."""
+
+    def __init__(self, out, workers: int, level: int = 6):
+        self._out = out
+        self._level = level
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="disha-gzip")
+        self._pending: deque = deque()
+        self._max_inflight = workers * 2
+        self._buffer = bytearray()
+        self.bytes_out = 0
+
+    def write(self, data) -> int:
+        self._buffer += data
+        while len(self._buffer) >= CHUNK_SIZE:
+            self._submit(bytes(self._buffer[:CHUNK_SIZE]))
+            del self._buffer[:CHUNK_SIZE]
+        return len(data)
+
+    def _submit(self, chunk: bytes):
+        self._pending.append(self._pool.submit(gzip.compress, chunk, self._level))
+        while len(self._pending) >= self._max_inflight:
+            self._drain_one()
+
+    def _drain_one(self):
+        data = self._pending.popleft().result()
+        self._out.write(data)
+        self.bytes_out += len(data)
+
+    def close(self):
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self._drain_one()
+        self._pool.shutdown()
+
+    def abort(self):
+        for f in self._pending:
+            f.cancel()
+        self._pending.clear()
+        self._pool.shutdown(wait=True)
+
+
+class _WatchedReader:
+    """Wraps a source file: counts bytes and honours cancellation per block."""
+
+    def __init__(self, fh, on_bytes: Callable[[int], None], cancelled: Callable[[], bool]):
+        self._fh = fh
+        self._on_bytes = on_bytes
+        self._cancelled = cancelled
+
+    def read(self, size: int = -1) -> bytes:
+        if self._cancelled():
+            raise ArchiveCancelled()
+        data = self._fh.read(size)
+        self._on_bytes(len(data))
+        return data
+
+
+def _manifest_path(manifest_dir: Path, folder: Path) -> Path:
+    digest = hashlib.sha1(str(folder).encode("utf-8")).hexdigest()[:10]
+    return manifest_dir / f"{folder.name or 'root'}-{digest}.manifest.json"
+
+
+def _walk(folder: Path):
+    """Yield (relative path, absolute path, stat) for every regular file."""
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(Path(entry.path))
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            yield os.path.relpath(entry.path, folder), entry.path, st
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def _claim(out_dir: Path, stamp: str, kind: str):
+    """Pick an unused archive name; two runs in one second get -1, -2, ..."""
+    n = 0
+    while True:
+        final = out_dir / f"{stamp}{f'-{n}' if n else ''}-{kind}.tar.gz"
+        if not final.exists():
+            try:
+                return final, open(final.with_name(final.name + ".part"), "xb")
+            except FileExistsError:
+                pass
+        n += 1
+
+
+def compress_folder(folder, out_dir: Path, manifest_dir: Path = None,
+                    incremental: bool = True, workers: int = None, level: int = 6,
+                    progress: Callable[[float], None] = None,
+                    cancelled: Callable[[], bool] = lambda: False) -> ArchiveResult:
+    """
+    Archive ``folder`` into ``out_dir`` as a .tar.gz.
+
+    Args:
+        folder: Folder to back up
+        out_dir: Where the archive is written
+        manifest_dir: Where the incremental manifest lives (defaults to out_dir)
+        incremental: Only include files changed since the last manifest
+        workers: Compression threads (defaults to the CPU count)
+        progress: Called with a 0-1 fraction as bytes are read
+        cancelled: Polled between reads; returning True aborts the archive
+
+    Returns:
+        ArchiveResult
+    """
+    result = ArchiveResult()
+    start = time.perf_counter()
+    folder = Path(folder).expanduser().resolve()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_file = _manifest_path(Path(manifest_dir or out_dir), folder)
+
+    previous = {}
+    if incremental and manifest_file.exists():
+        try:
+            previous = json.loads(manifest_file.read_text(encoding="utf-8"))
+        except ValueError:
+            previous = {}
+
+    # Decide what goes in before reading any file contents
+    current, todo, total = {}, [], 0
+    for rel, path, st in _walk(folder):
+        current[rel] = [st.st_size, st.st_mtime_ns]
+        if previous.get(rel) == current[rel]:
+            result.skipped += 1
+            continue
+        todo.append((rel, path, st))
+        total += st.st_size
+    deleted = sorted(set(previous) - set(current))
+    result.deleted = len(deleted)
+
+    if not todo and not deleted:
+        result.ok = True
+        result.seconds = time.perf_counter() - start
+        return result
+
+    kind = "incr" if previous else "full"
+    stamp = f"{folder.name or 'root'}-{datetime.now():%Y%m%d-%H%M%S}"
+    final, out = _claim(out_dir, stamp, kind)
+    partial = final.with_name(final.name + ".part")
+
+    read = [0]
+    next_report = [0.0]
+
+    def on_bytes(n):
+        read[0] += n
+        if progress and total:
+            fraction = read[0] / total
+            if fraction >= next_report[0]:
+                progress(min(fraction, 1.0))
+                next_report[0] = fraction + 0.01
+
+    completed = False
+    with out:
+        writer = _ParallelGzipWriter(out, workers or os.cpu_count() or 2, level)
+        try:
+            with tarfile.open(fileobj=writer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+                for rel, path, st in todo:
+                    if cancelled():
+                        raise ArchiveCancelled()
+                    info = tarfile.TarInfo(rel.replace(os.sep, "/"))
+                    info.size = st.st_size
+                    info.mtime = st.st_mtime
+                    info.mode = st.st_mode & 0o7777
+                    try:
+                        fh = open(path, "rb")
+                    except OSError:
+                        # Locked / vanished: keep what the last backup recorded,
+                        # so the file is retried next run, not listed as deleted
+                        if rel in previous:
+                            current[rel] = previous[rel]
+                        else:
+                            current.pop(rel, None)
+                        continue
+                    # A file that shrinks mid-read raises here and aborts the
+                    # archive: the tar stream can't be realigned afterwards
+                    with fh:
+                        tar.addfile(info, _WatchedReader(fh, on_bytes, cancelled))
+                    result.files += 1
+                if deleted:
+                    listing = "\n".join(deleted).encode("utf-8")
+                    info = tarfile.TarInfo(".disha-deleted.txt")
+                    info.size = len(listing)
+                    info.mtime = time.time()
+                    tar.addfile(info, io.BytesIO(listing))
+            writer.close()
+            completed = True
+        except ArchiveCancelled:
+            writer.abort()
+            result.cancelled = True
+        except (OSError, tarfile.TarError):
+            writer.abort()
+
+    if completed:
+        os.replace(partial, final)
+        manifest_file.write_text(json.dumps(current), encoding="utf-8")
+        result.ok = True
+        result.path = final
+        result.bytes_in = read[0]
+        result.bytes_out = writer.bytes_out
+    else:
+        partial.unlink(missing_ok=True)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+# ===========================================================================
+# BENCHMARK
+# ===========================================================================
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else Path.cwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in (1, os.cpu_count() or 2):
+            res = compress_folder(source, Path(tmp) / f"w{workers}", incremental=False,
+                                  workers=workers)
+            print(f"  workers={workers:<3} {res.summary()}")
+        res = compress_folder(source, Path(tmp) / "inc")
+        res = compress_folder(source, Path(tmp) / "inc")
+        print(f"  incremental re-run: {res.summary()}")
@@ -0,0 +1,303 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+modules/file_index.py - Persistent, incrementally refreshed file name index
+
+find_file() used to walk every SEARCH_ROOT on each request. This index keeps
+file names in a SQLite database under DATA_DIR with a trigram table for
+fuzzy lookup, so "find my resume" is a few indexed queries.
+
+Refresh is incremental: a directory's mtime only changes when entries are
+added, removed or renamed inside it, so unchanged directories are not
+listed again - only their known sub-directories are stat()ed.
+
+Benchmark (index build, no-op refresh and queries on a synthetic tree):
+    python -m modules.file_index
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Iterable
+
+SKIP_DIRS = {
+    "node_modules", "__pycache__", "site-packages", "venv", ".venv", "env",
+    "AppData", "Application Data", "$Recycle.Bin", "System Volume Information",
+}
+_FILLER_WORDS = {"my", "the", "a", "file", "document", "named", "called"}
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY, parent TEXT, mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY, dir TEXT, name TEXT, lname TEXT, mtime REAL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE TABLE IF NOT EXISTS grams (
+    gram TEXT, file_id INTEGER, PRIMARY KEY (gram, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS grams_file ON grams(file_id);
+"""
+
+
+def trigrams(text: str) -> set[str]:
+    text = f" {text.lower()} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _distinct_roots(roots: Iterable[Path]) -> list[Path]:
+    """Drop roots nested inside other roots (home already covers Documents)."""
+    resolved = sorted({Path(r).expanduser().resolve() for r in roots if Path(r).exists()})
+    kept: list[Path] = []
+    for root in resolved:
+        if not any(root == k or k in root.parents for k in kept):
+            kept.append(root)
+    return kept
+
+
+class FileIndex:
+    """On-disk file name index over a set of root directories."""
+
+    def __init__(self, db_path: Path, roots: Iterable[Path], max_depth: int = 8):
+        self.db_path = Path(db_path)
+        self.roots = _distinct_roots(roots)
+        self.max_depth = max_depth
+        self.ready = threading.Event()     # set after the first full refresh
+        self.last_refresh: dict = {}
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+            if db.execute("SELECT 1 FROM dirs LIMIT 1").fetchone():
+                self.ready.set()            # usable straight away from the last run
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(str(self.db_path), timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # --- Refresh --------------------------------------------------------------
+    def refresh(self) -> dict:
+        """Bring the index up to date. Returns counters for the pass."""
+        with self._refresh_lock:
+            stats = {"dirs_checked": 0, "dirs_rescanned": 0, "files_indexed": 0,
+                     "dirs_removed": 0, "seconds": 0.0}
+            start = time.perf_counter()
+            db = self._connect()
+            try:
+                known = dict(db.execute("SELECT path, mtime_ns FROM dirs"))
+                stack = [(str(root), None, 0) for root in self.roots]
+                while stack:
+                    path, parent, depth = stack.pop()
+                    stats["dirs_checked"] += 1
+                    try:
+                        mtime_ns = os.stat(path).st_mtime_ns
+                    except OSError:
+                        continue
+                    if known.get(path) == mtime_ns:
+                        children = [row[0] for row in db.execute(
+                            "SELECT path FROM dirs WHERE parent = ?", (path,))]
+                    else:
+                        children = self._rescan(db, path, parent, mtime_ns, depth, stats)
+                    if depth < self.max_depth:
+                        stack.extend((child, path, depth + 1) for child in children)
+                db.commit()
+            finally:
+                db.close()
+            stats["seconds"] = round(time.perf_counter() - start, 3)
+            self.last_refresh = stats
+            self.ready.set()
+            return stats
+
+    def _rescan(self, db, path, parent, mtime_ns, depth, stats) -> list[str]:
+        subdirs, files = [], []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    name = entry.name
+                    if name.startswith(".") or name in SKIP_DIRS:
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            files.append((name, entry.stat(follow_symlinks=False).st_mtime))
+                    except OSError:
+                        continue
+        except OSError:
+            return []
+
+        stats["dirs_rescanned"] += 1
+        stats["files_indexed"] += len(files)
+
+        # Sub-directories that disappeared take their whole subtree with them
+        current = set(subdirs)
+        for (gone,) in db.execute("SELECT path FROM dirs WHERE parent = ?", (path,)).fetchall():
+            if gone not in current:
+                self._drop_tree(db, gone)
+                stats["dirs_removed"] += 1
+
+        self._drop_files(db, "dir = ?", (path,))
+        for name, mtime in files:
+            cur = db.execute(
+                "INSERT INTO files (dir, name, lname, mtime) VALUES (?, ?, ?, ?)",
+                (path, name, name.lower(), mtime),
+            )
+            db.executemany(
+                "INSERT OR IGNORE INTO grams (gram, file_id) VALUES (?, ?)",
+                ((g, cur.lastrowid) for g in trigrams(name)),
+            )
+        db.execute(
+            "INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)",
+            (path, parent, mtime_ns),
+        )
+        return subdirs
+
+    @staticmethod
+    def _drop_files(db, where: str, args: tuple):
+        db.execute(f"DELETE FROM grams WHERE file_id IN (SELECT id FROM files WHERE {where})", args)
+        db.execute(f"DELETE FROM files WHERE {where}", args)
+
+    def _drop_tree(self, db, path: str):
+        # substr() rather than LIKE: "_" and "%" are common in folder names
+        prefix = path.rstrip(os.sep) + os.sep
+        args = (path, len(prefix), prefix)
+        self._drop_files(db, "dir = ? OR substr(dir, 1, ?) = ?", args)
+        db.execute("DELETE FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?", args)
+
+    def start_background(self, interval: float = 600.0):
+        """Refresh now and then every ``interval`` seconds on a daemon thread."""
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.refresh()
+                except sqlite3.Error as e:
+                    print(f"  [IDX] File index refresh failed: {e}")
+                self._stop.wait(interval)
+
+        threading.Thread(target=loop, name="disha-file-index", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    # --- Query ----------------------------------------------------------------
+    def search(self, query: str, limit: int = 5) -> list[str]:
+        """Best matching file paths for a spoken file name, best first."""
+        words = [w for w in query.lower().split() if w not in _FILLER_WORDS]
+        needle = " ".join(words) or query.lower().strip()
+        if not needle:
+            return []
+        db = self._connect()
+        try:
+            grams = trigrams(needle)
+            if len(needle) < 3:
+                rows = db.execute(
+                    "SELECT dir, name, mtime FROM files WHERE lname LIKE ? LIMIT 500",
+                    (needle + "%",),
+                ).fetchall()
+            else:
+                # Thousands of names can contain a common word, and the edge
+                # trigrams favour names that start with it. Under the cap,
+                # names containing the needle come first, newest first
+                # (as score() ranks them), then the best trigram matches.
+                marks = ",".join("?" * len(grams))
+                like = f"%{needle}%"
+                rows = db.execute(
+                    f"SELECT f.dir, f.name, f.mtime FROM files f JOIN ("
+                    f" SELECT file_id, COUNT(*) AS hits FROM grams"
+                    f" WHERE gram IN ({marks}) GROUP BY file_id HAVING hits >= ?"
+                    f") g ON g.file_id = f.id"
+                    f" ORDER BY f.lname LIKE ? DESC,"
+                    f" CASE WHEN f.lname LIKE ? THEN f.mtime END DESC,"
+                    f" g.hits DESC, f.mtime DESC LIMIT 500",
+                    (*grams, max(1, len(grams) // 2), like, like),
+                ).fetchall()
+        finally:
+            db.close()
+
+        words_re = re.compile(rf"\b{re.escape(_NON_WORD_RE.sub(' ', needle).strip())}\b")
+
+        def score(row):
+            # Names holding the needle as whole words, then as a substring,
+            # go to the most recently modified; only the rest are fuzzy
+            name = row[1].lower()
+            if words_re.search(_NON_WORD_RE.sub(" ", name)):
+                return (2, 0.0, row[2])
+            if needle in name:
+                return (1, 0.0, row[2])
+            stem = name.rsplit(".", 1)[0]
+            return (0, SequenceMatcher(None, needle, stem).ratio(), row[2])
+
+        ranked = sorted(rows, key=score, reverse=True)
+        return [os.path.join(d, n) for d, n, _ in ranked[:limit]]
+
+    def count(self) -> int:
+        db = self._connect()
+        try:
+            return db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        finally:
+            db.close()
+
+
+# ===========================================================================
+# BENCHMARK
+# ===========================================================================
+def benchmark(dirs: int = 500, files_per_dir: int = 100):
+    import random
+    import tempfile
+
+    words = ["resume", "invoice", "report", "photo", "notes", "budget", "draft",
+             "final", "project", "scan", "letter", "thesis", "holiday", "receipt"]
+    exts = [".pdf", ".docx", ".jpg", ".txt", ".xlsx", ".png"]
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "home"
+        for d in range(dirs):
+            folder = root / f"dir{d // 50}" / f"sub{d}"
+            folder.mkdir(parents=True)
+            for f in range(files_per_dir):
+                name = f"{rng.choice(words)}_{rng.choice(words)}_{d}_{f}{rng.choice(exts)}"
+                (folder / name).touch()
+        (root / "dir3" / "Subhra_Resume_2026.pdf").touch()
+
+        index = FileIndex(Path(tmp) / "index.sqlite3", [root])
+        build = index.refresh()
+        noop = index.refresh()
+        (root / "dir7" / "new_resume_draft.docx").touch()
+        incr = index.refresh()
+
+        queries = ["resume", "my resume", "budget final", "holiday photo", "invoice 42"]
+        start = time.perf_counter()
+        for _ in range(20):
+            for q in queries:
+                index.search(q)
+        query_ms = (time.perf_counter() - start) / (20 * len(queries)) * 1000
+
+        start = time.perf_counter()
+        walked = sum(
+            1 for _, _, names in os.walk(root) for n in names if "resume" in n.lower()
+        )
+        walk_ms = (time.perf_counter() - start) * 1000
+
+        print(f"  files                 : {index.count():,}")
+        print(f"  full build            : {build['seconds'] * 1000:10.1f} ms")
+        print(f"  no-op refresh         : {noop['seconds'] * 1000:10.1f} ms "
+              f"({noop['dirs_rescanned']} dirs listed)")
+        print(f"  refresh after 1 change: {incr['seconds'] * 1000:10.1f} ms "
+              f"({incr['dirs_rescanned']} dirs listed)")
+        print(f"  indexed query         : {query_ms:10.2f} ms avg")
+        print(f"  full os.walk search   : {walk_ms:10.1f} ms ({walked} hits)")
+        print(f"  top hits for 'my resume': {[Path(p).name for p in index.search('my resume', 3)]}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,244 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+modules/file_ops.py - Shared engine for organize_downloads and clean_junk
+
+Each folder is listed once with os.scandir and every entry is classified
+with a precomputed extension lookup, producing a plan. The plan can be
+returned as a dry run or executed on a bounded thread pool in fixed-size
+batches; each destination folder is created and listed only once. Large
+jobs run on a background thread so the voice loop keeps running.
+
+Benchmark (100k-file synthetic Downloads folder):
+    python -m modules.file_ops
+"""
+
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable
+
+_BATCH = 500     # files per worker task
+
+
+class FilePlan:
+    """Moves grouped by target folder, plus deletions."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.moves: dict[str, list[str]] = {}
+        self.deletes: list[str] = []
+        self.scanned = 0
+        self.scan_seconds = 0.0
+
+    @property
+    def total(self) -> int:
+        return sum(len(v) for v in self.moves.values()) + len(self.deletes)
+
+    def describe(self) -> str:
+        if not self.total:
+            return "There's nothing to do - everything is already tidy."
+        if self.kind == "organize":
+            parts = [f"{len(v)} to {Path(k).name}"
+                     for k, v in sorted(self.moves.items(), key=lambda kv: -len(kv[1]))]
+            return f"I would move {self.total} files: " + ", ".join(parts[:6]) + "."
+        return f"I would delete {len(self.deletes)} junk files."
+
+
+class FileOpReport:
+    def __init__(self, plan: FilePlan):
+        self.plan = plan
+        self.done = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.problems: list[str] = []   # target folders that could not be used
+        self.error = ""                 # the whole job failed
+
+    @property
+    def files_per_second(self) -> float:
+        return self.done / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        if self.error:
+            return f"The file operation failed: {self.error}"
+        verb = "Organized" if self.plan.kind == "organize" else "Removed"
+        msg = f"{verb} {self.done} files"
+        if self.errors:
+            msg += f" ({self.errors} skipped)"
+        msg += f" at {self.files_per_second:,.0f} files per second."
+        if self.problems:
+            msg += " I couldn't use " + ", ".join(self.problems[:3]) + "."
+        return msg
+
+
+class FileOpsEngine:
+    """Scan/classify/execute engine shared by the file-tidying actions."""
+
+    def __init__(self, organize_rules: dict, junk_extensions: Iterable[str],
+                 max_workers: int = None):
+        self._targets = {ext.lower(): folder for ext, folder in organize_rules.items()}
+        junk = {ext.lower() for ext in junk_extensions}
+        self._junk_exts = {e for e in junk if e.startswith(".")}
+        self._junk_suffixes = tuple(e for e in junk if not e.startswith("."))   # "~"
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 2) * 2)
+        self._busy = threading.Lock()
+
+    # --- Planning -------------------------------------------------------------
+    @staticmethod
+    def _files(folder: Path):
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    try:
+                        if entry.is_file(follow_symlinks=False):
+                            yield entry
+                    except OSError:
+                        continue
+        except OSError:
+            return
+
+    def plan_organize(self, folder: Path) -> FilePlan:
+        plan = FilePlan("organize")
+        start = time.perf_counter()
+        folder = Path(folder)
+        for entry in self._files(folder):
+            plan.scanned += 1
+            target = self._targets.get(os.path.splitext(entry.name)[1].lower())
+            if target:
+                plan.moves.setdefault(str(folder / target), []).append(entry.path)
+        plan.scan_seconds = time.perf_counter() - start
+        return plan
+
+    def plan_clean(self, folders: Iterable[Path]) -> FilePlan:
+        plan = FilePlan("clean")
+        start = time.perf_counter()
+        for folder in folders:
+            for entry in self._files(Path(folder)):
+                plan.scanned += 1
+                name = entry.name.lower()
+                if (os.path.splitext(name)[1] in self._junk_exts
+                        or (self._junk_suffixes and name.endswith(self._junk_suffixes))):
+                    plan.deletes.append(entry.path)
+        plan.scan_seconds = time.perf_counter() - start
+        return plan
+
+    # --- Execution ------------------------------------------------------------
+    def execute(self, plan: FilePlan,
+                cancelled: Callable[[], bool] = lambda: False) -> FileOpReport:
+        report = FileOpReport(plan)
+        lock = threading.Lock()
+        start = time.perf_counter()
+
+        # Destination names are assigned up front (one listdir per target),
+        # so batches of the same folder can run on different workers
+        moves = []
+        for target, sources in plan.moves.items():
+            try:
+                os.makedirs(target, exist_ok=True)
+                taken = set(os.listdir(target))
+            except OSError as e:
+                report.errors += len(sources)
+                report.problems.append(f"{Path(target).name} ({e.strerror or e})")
+                continue
+            for src in sources:
+                name = _free_name(os.path.basename(src), taken)
+                taken.add(name)
+                moves.append((src, os.path.join(target, name)))
+
+        def run_batch(items, op):
+            done = errors = 0
+            for item in items:
+                if cancelled():
+                    break
+                try:
+                    op(item)
+                    done += 1
+                except OSError:
+                    errors += 1     # in use / permission denied
+            with lock:
+                report.done += done
+                report.errors += errors
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="disha-fileops") as pool:
+            futures = [
+                pool.submit(run_batch, moves[i:i + _BATCH], lambda m: shutil.move(*m))
+                for i in range(0, len(moves), _BATCH)
+            ]
+            futures += [
+                pool.submit(run_batch, plan.deletes[i:i + _BATCH], os.remove)
+                for i in range(0, len(plan.deletes), _BATCH)
+            ]
+            for f in futures:
+                f.result()
+
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def run_in_background(self, plan: FilePlan, on_done: Callable[[FileOpReport], None],
+                          cancelled: Callable[[], bool] = lambda: False) -> bool:
+        """Execute on a daemon thread. Returns False if a job is already running."""
+        if not self._busy.acquire(blocking=False):
+            return False
+
+        def job():
+            try:
+                try:
+                    report = self.execute(plan, cancelled)
+                except Exception as e:      # never die silently on a background thread
+                    report = FileOpReport(plan)
+                    report.error = str(e)
+                on_done(report)
+            finally:
+                self._busy.release()
+
+        threading.Thread(target=job, name="disha-fileops-job", daemon=True).start()
+        return True
+
+
+def _free_name(name: str, taken: set) -> str:
+    """'report.pdf' -> 'report (1).pdf' when the target already has one."""
+    if name not in taken:
+        return name
+    stem, ext = os.path.splitext(name)
+    n = 1
+    while f"{stem} ({n}){ext}" in taken:
+        n += 1
+    return f"{stem} ({n}){ext}"
+
+
+# ===========================================================================
+# BENCHMARK
+# ===========================================================================
+def benchmark(files: int = 100_000):
+    import tempfile
+
+    try:
+        from config_enhanced import ORGANIZE_RULES, JUNK_EXTENSIONS
+    except ImportError:
+        ORGANIZE_RULES = {".pdf": "PDFs", ".jpg": "Images", ".mp3": "Music", ".zip": "Archives"}
+        JUNK_EXTENSIONS = {".tmp", ".log", "~"}
+    exts = list(ORGANIZE_RULES)[:8] + [".tmp", ".log", ".unknown"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        downloads = Path(tmp) / "Downloads"
+        downloads.mkdir()
+        for i in range(files):
+            (downloads / f"file_{i}{exts[i % len(exts)]}").touch()
+
+        engine = FileOpsEngine(ORGANIZE_RULES, JUNK_EXTENSIONS)
+        plan = engine.plan_organize(downloads)
+        print(f"  scanned {plan.scanned:,} entries in {plan.scan_seconds * 1000:.0f} ms "
+              f"({plan.scanned / plan.scan_seconds:,.0f} files/s)")
+        report = engine.execute(plan)
+        print(f"  organize: {report.summary()}")
+        clean = engine.plan_clean([downloads])
+        report = engine.execute(clean)
+        print(f"  clean:    {report.summary()}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,261 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+replay.py - Offline benchmark: replay utterances through the full pipeline
+
+Feeds a corpus through main_enhanced.handle_turn() - the same path as the
+live loop (context -> pronoun resolution -> intent / cache / brain ->
+dispatch -> speak) - with no microphone, speaker or network:
+
+- the AI provider is a stub brain that returns the recorded result for an
+  utterance (or a short conversational reply) after an optional delay;
+- voice output is a stub that only records what would have been spoken;
+- feature modules (pc_control, web_services, ...) and the security gate are
+  replaced in sys.modules before main_enhanced is imported, and the
+  file-moving, backup, activity-log and scheduler side effects are patched.
+
+The corpus is a text file with one utterance per line, or JSON lines of
+{"text": ..., "result": {...}} where "result" is what the brain returned
+in the recorded session.
+
+Usage:
+    python replay.py [corpus] [--repeat N] [--brain-latency MS] [--json out.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from pathlib import Path
+
+DEFAULT_CORPUS = [
+    "open chrome",
+    "close it",
+    "volume up",
+    "set brightness to 40",
+    {"text": "search google for python heapq",
+     "result": {"type": "action", "action": "search_google",
+                "params": {"query": "python heapq"}, "explanation": ""}},
+    {"text": "play it on youtube",
+     "result": {"type": "action", "action": "play_youtube",
+                "params": {"query": "python heapq"}, "explanation": ""}},
+    "what's the time",
+    "take a screenshot",
+    "open spotify",
+    "start work",
+    {"text": "turn on the bedroom light",
+     "result": {"type": "action", "action": "smart_home_light",
+                "params": {"action": "on", "room": "bedroom"}, "explanation": ""}},
+    "tell me a joke",
+    "organize my downloads",
+    "good night",
+]
+
+FEATURE_MODULES = (
+    "pc_control", "file_manager", "web_services", "automation",
+    "writing_assistant", "screen_reader", "smart_home",
+)
+
+
+# ===========================================================================
+# STUBS
+# ===========================================================================
+class StubModule(types.ModuleType):
+    """Any function call succeeds and is counted instead of touching the PC."""
+
+    def __init__(self, name: str, calls: dict):
+        super().__init__(name)
+        self._calls = calls
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        key = f"{self.__name__.rsplit('.', 1)[-1]}.{attr}"
+
+        def call(*args, **kwargs):
+            self._calls[key] = self._calls.get(key, 0) + 1
+            return True, f"{key} done."
+        return call
+
+
+class StubVoiceOutput:
+    def __init__(self):
+        self.spoken: list[str] = []
+
+    def speak(self, text, priority=False):
+        self.spoken.append(text)
+
+    def announce_system_event(self, event, text):
+        self.spoken.append(text)
+
+    def stop(self):
+        pass
+
+
+class StubBrain:
+    """Stands in for MultiAIBrain: recorded results, fixed latency, no network."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000.0
+        self.recorded: dict[str, dict] = {}
+        self.calls = 0
+
+    def get_provider(self) -> str:
+        return "replay"
+
+    def process(self, text: str) -> dict:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        result = self.recorded.get(text.lower().strip())
+        return dict(result) if result else {"type": "conversation", "reply": "Sure."}
+
+
+def install_stubs(calls: dict):
+    """Replace side-effecting modules before main_enhanced imports them."""
+    security = types.ModuleType("core.security")
+    security.request_permission = lambda action, params=None: True
+    security.emergency_stop = lambda *a, **k: None
+    security.is_stopped = lambda: False
+    security.reset_emergency = lambda: None
+    sys.modules["core.security"] = security
+    for name in FEATURE_MODULES:
+        sys.modules[f"modules.{name}"] = StubModule(f"modules.{name}", calls)
+
+
+def load_corpus(path: Path = None) -> list[dict]:
+    lines = DEFAULT_CORPUS
+    if path:
+        lines = [l for l in path.read_text(encoding="utf-8").splitlines() if l.strip()]
+    corpus = []
+    for line in lines:
+        if isinstance(line, str) and line.lstrip().startswith("{"):
+            line = json.loads(line)
+        corpus.append(line if isinstance(line, dict) else {"text": line})
+    return corpus
+
+
+# ===========================================================================
+# HARNESS
+# ===========================================================================
+def build_pipeline(tmp: Path, brain_latency_ms: float, use_cache: bool, calls: dict):
+    install_stubs(calls)
+    import main_enhanced as me
+    from core.context_manager import ContextManager
+    from core.context_window import BudgetedContext, ContextWindow
+    from core.intent_fastpath import LocalIntentMatcher
+    from core.response_cache import ResponseCache
+    from core.scheduler import Scheduler
+    from utils.helpers import set_speak_fn
+    from utils.memory_store import MemoryStore
+
+    me.voice_out = StubVoiceOutput()
+    set_speak_fn(me.speak)
+    me.context = BudgetedContext(
+        ContextManager(),
+        ContextWindow(me.AI_CONTEXT_TOKENS, me.AI_CONTEXT_MAX_TURNS, me.AI_CONTEXT_SUMMARY_TOKENS),
+        me.PronounResolver(),
+    )
+    me.brain = StubBrain(brain_latency_ms)
+    me.memory = MemoryStore(tmp / "memory.json", tmp / "memory.journal")
+    if me.AI_LOCAL_INTENTS:
+        me.intents = LocalIntentMatcher(
+            [n for n in me.actions.names() if not me.actions.get(n).needs_params],
+            me.APP_MAP,
+            me.DEFAULT_AUTOMATIONS,
+            threshold=me.AI_LOCAL_INTENT_THRESHOLD,
+        )
+    if use_cache:
+        me.responses = ResponseCache(tmp / "cache.sqlite3", me.AI_SYSTEM_PROMPT)
+
+    # Side effects that live in main_enhanced itself
+    me.scheduler = Scheduler()              # in memory, never started
+    me.log_action = lambda *a, **k: None
+    me.pop_last_action = lambda: None
+    me.run_file_plan = lambda plan, dry_run: (True, plan.describe())
+    me.start_backup = lambda folder, incremental: (True, f"Backing up {folder.name}.")
+    return me
+
+
+def replay(me, corpus: list[dict], repeat: int) -> list[float]:
+    for item in corpus:
+        if "result" in item:
+            me.brain.recorded[item["text"].lower().strip()] = item["result"]
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            for item in corpus:
+                start = time.perf_counter()
+                me.handle_turn(item["text"], start)
+                latencies.append((time.perf_counter() - start) * 1000.0)
+    return latencies
+
+
+def pct(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(p / 100.0 * (len(ordered) - 1))] if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay utterances through DISHA offline.")
+    parser.add_argument("corpus", nargs="?", type=Path, help="text or JSON-lines corpus")
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the corpus")
+    parser.add_argument("--brain-latency", type=float, default=0.0,
+                        help="simulated provider latency in ms")
+    parser.add_argument("--cache", action="store_true", help="enable the response cache")
+    parser.add_argument("--json", type=Path, help="also write the results as JSON")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    calls: dict[str, int] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        me = build_pipeline(Path(tmp), args.brain_latency, args.cache, calls)
+
+        # Timing pass (tracemalloc off - it slows everything down)
+        start = time.perf_counter()
+        latencies = replay(me, corpus, args.repeat)
+        elapsed = time.perf_counter() - start
+        stages = me.tracer.stats()
+
+        # Allocation pass: one more run over the corpus under tracemalloc
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        replay(me, corpus, 1)
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        diff = after.compare_to(before, "filename")
+        new_blocks = sum(max(0, s.count_diff) for s in diff)
+        new_bytes = sum(max(0, s.size_diff) for s in diff)
+        me.memory.close()
+
+    turns = len(latencies)
+    print(f"\n  Replayed {turns} turns ({len(corpus)} utterances x {args.repeat}) "
+          f"in {elapsed:.2f} s -> {turns / elapsed:,.0f} turns/s")
+    print(f"  turn latency: p50 {pct(latencies, 50):.2f} ms  p95 {pct(latencies, 95):.2f} ms  "
+          f"p99 {pct(latencies, 99):.2f} ms")
+    print(f"  brain calls: {me.brain.calls}   stubbed module calls: {sum(calls.values())}")
+    print(f"  allocations (one pass): {new_blocks:,} blocks / {new_bytes / 1024:.1f} KiB retained, "
+          f"peak {peak / 1024:.1f} KiB traced\n")
+    print(me.tracer.summary())
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            "turns": turns,
+            "seconds": elapsed,
+            "turns_per_second": turns / elapsed,
+            "turn_ms": {"p50": pct(latencies, 50), "p95": pct(latencies, 95),
+                        "p99": pct(latencies, 99)},
+            "stages": stages,
+            "allocations": {"blocks": new_blocks, "bytes": new_bytes, "peak_bytes": peak},
+            "module_calls": calls,
+        }, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,8 @@ python -c "import speech_recognition" >nul 2>&1
 if errorlevel 1 (
     echo Installing required dependencies...
     pip install -r requirements_enhanced.txt
+    echo Pre-rendering system phrases...
+    python -m core.tts_cache --prerender
     echo.
 )
 
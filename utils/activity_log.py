@@ -0,0 +1,364 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+utils/activity_log.py - Append-only activity log with O(1) undo
+
+Replaces the single JSON-array activity_log.json, which had to be re-read
+and rewritten on every log_action(). Entries are appended as JSON Lines to
+numbered segment files under ACTIVITY_LOG_DIR; undo appends a small
+tombstone instead of rewriting anything. An in-memory tail index of the most
+recent live entries makes pop_last_action() O(1). Sealed segments are
+compacted (popped entries dropped) when the log rotates, and only the newest
+ACTIVITY_LOG_MAX_SEGMENTS are retained.
+
+Benchmark (100k entries, old array file vs this log):
+    python -m utils.activity_log
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+_SEGMENT_GLOB = "segment-*.jsonl"
+_SAME_ENTRY_SECONDS = 5     # a migrated entry this close to a logged one is the same action
+
+
+def _when(entry: dict) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(str(entry.get("timestamp", ""))).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+class ActivityLog:
+    """JSON-Lines segmented log. One instance per log directory."""
+
+    def __init__(self, log_dir: Path, segment_entries: int = 5000,
+                 max_segments: int = 20, undo_depth: int = 200):
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_entries = segment_entries
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+        self._tail: deque = deque(maxlen=undo_depth)   # recent live entries
+        self._seq = 0
+        self._segment_no = 0
+        self._segment_lines = 0
+        self._fh = None
+        self._load_tail()
+
+    # --- Segments -------------------------------------------------------------
+    def _segments(self) -> list[Path]:
+        return sorted(self.log_dir.glob(_SEGMENT_GLOB))
+
+    def _segment_path(self, number: int) -> Path:
+        return self.log_dir / f"segment-{number:06d}.jsonl"
+
+    @staticmethod
+    def _read(path: Path):
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue    # torn write after a crash; skip it
+
+    def _load_tail(self):
+        """Rebuild the undo tail from the newest segments (not the whole log)."""
+        segments = self._segments()
+        if not segments:
+            self._open_segment(1)
+            return
+
+        # Walk back until enough live entries are collected
+        loaded: list[list[dict]] = []
+        live: list[dict] = []
+        for path in reversed(segments):
+            loaded.insert(0, list(self._read(path)))
+            live = self._replay(loaded)
+            if len(live) >= self._tail.maxlen:
+                break
+        self._tail.extend(live[-self._tail.maxlen:])
+
+        for records in loaded:
+            for rec in records:
+                self._seq = max(self._seq, rec.get("seq", 0), rec.get("pop", 0))
+        self._segment_lines = len(loaded[-1])
+        self._open_segment(int(segments[-1].stem.split("-")[1]), append=True)
+
+    @staticmethod
+    def _replay(segments: list[list[dict]]) -> list[dict]:
+        live: list[dict] = []
+        for records in segments:
+            for rec in records:
+                if rec.get("history"):
+                    continue        # imported, but older than the undo trail
+                if "pop" in rec:
+                    if live and live[-1].get("seq") == rec["pop"]:
+                        live.pop()
+                else:
+                    live.append(rec)
+        return live
+
+    def _open_segment(self, number: int, append: bool = False):
+        if self._fh:
+            self._fh.close()
+        self._segment_no = number
+        if not append:
+            self._segment_lines = 0
+        self._fh = open(self._segment_path(number), "a", encoding="utf-8")
+
+    def _write(self, record: dict):
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        self._segment_lines += 1
+        if self._segment_lines >= self.segment_entries:
+            self._rotate()
+
+    def _rotate(self):
+        sealed = self._segment_path(self._segment_no)
+        self._open_segment(self._segment_no + 1)
+        self._compact(sealed)
+        segments = self._segments()
+        for old in segments[:max(0, len(segments) - self.max_segments)]:
+            old.unlink()
+
+    def _compact(self, path: Path):
+        """Rewrite a sealed segment without popped entries and tombstones."""
+        records = list(self._read(path))
+        popped = {rec["pop"] for rec in records if "pop" in rec}
+        here = {rec["seq"] for rec in records if "seq" in rec}
+        if not popped & here:
+            return
+        # Tombstones for entries in older segments must survive compaction
+        kept = [
+            rec for rec in records
+            if rec.get("seq") not in popped and rec.get("pop") not in here
+        ]
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for rec in kept:
+                fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+
+    # --- Public API -----------------------------------------------------------
+    def log_action(self, action: str, params: dict = None,
+                   status: str = "success", detail: str = "") -> dict:
+        with self._lock:
+            self._seq += 1
+            entry = {
+                "seq": self._seq,
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "action": action,
+                "params": params or {},
+                "status": status,
+                "detail": detail,
+            }
+            self._write(entry)
+            self._tail.append(entry)
+            return entry
+
+    def pop_last_action(self) -> Optional[dict]:
+        """Remove and return the newest live entry (None if there is none)."""
+        with self._lock:
+            if not self._tail:
+                return None
+            entry = self._tail.pop()
+            self._write({"pop": entry["seq"]})
+            return entry
+
+    def get_history(self, limit: int = 20) -> list[dict]:
+        """Newest ``limit`` live entries, oldest first."""
+        with self._lock:
+            return list(self._tail)[-limit:]
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def logged_since(self, seq: int, action: str) -> bool:
+        """True if ``action`` has a live entry newer than ``seq``."""
+        with self._lock:
+            for entry in reversed(self._tail):
+                if entry["seq"] <= seq:
+                    return False
+                if entry.get("action") == action:
+                    return True
+            return False
+
+    def migrate_array_file(self, array_file: Path) -> int:
+        """
+        Fold the old JSON-array activity log into this one.
+
+        Writers that still hold the old utils.logger functions may append to
+        the array file, so it is not moved away: its entries are imported in
+        timestamp order, copied to *.migrated, and the file is reset to "[]".
+        Entries that repeat one already in the log (same action and params
+        within a few seconds) are skipped; entries older than the newest one
+        in the log are kept as history but stay out of the undo trail, so
+        undo never jumps back past newer actions. Returns entries imported.
+        """
+        array_file = Path(array_file)
+        if not array_file.exists():
+            return 0
+        try:
+            entries = json.loads(array_file.read_text(encoding="utf-8") or "[]")
+        except ValueError:
+            return 0
+        if not isinstance(entries, list) or not entries:
+            return 0
+        dated = sorted(((_when(e), e) for e in entries if isinstance(e, dict)),
+                       key=lambda pair: pair[0] or datetime.min)
+        imported = 0
+        with self._lock:
+            known: dict = {}        # action -> [(params, time)] already in the log
+            newest = datetime.min
+            for e in self._tail:
+                w = _when(e)
+                if w is not None:
+                    known.setdefault(e.get("action"), []).append((e.get("params"), w))
+                    newest = max(newest, w)
+            for when, entry in dated:
+                if when is not None and any(
+                        params == entry.get("params")
+                        and abs((w - when).total_seconds()) <= _SAME_ENTRY_SECONDS
+                        for params, w in known.get(entry.get("action"), ())):
+                    continue
+                self._seq += 1
+                record = {**entry, "seq": self._seq}
+                undoable = when is not None and when >= newest
+                if not undoable:
+                    record["history"] = True
+                self._write(record)
+                if undoable:
+                    self._tail.append(record)
+                    newest = when
+                imported += 1
+        target = array_file.with_name(array_file.name + ".migrated")
+        if target.exists():
+            target = array_file.with_name(
+                f"{array_file.name}.{datetime.now():%Y%m%d%H%M%S%f}.migrated"
+            )
+        array_file.replace(target)
+        tmp = array_file.with_suffix(".tmp")
+        tmp.write_text("[]", encoding="utf-8")
+        os.replace(tmp, array_file)
+        return imported
+
+    def close(self):
+        with self._lock:
+            if self._fh:
+                self._fh.close()
+                self._fh = None
+
+
+# ===========================================================================
+# MODULE-LEVEL API (drop-in for utils.logger)
+# ===========================================================================
+_log: Optional[ActivityLog] = None
+_init_lock = threading.Lock()
+
+
+def _default_log() -> ActivityLog:
+    global _log
+    with _init_lock:
+        if _log is None:
+            from config_enhanced import (
+                ACTIVITY_LOG_DIR,
+                ACTIVITY_LOG_FILE,
+                ACTIVITY_LOG_SEGMENT_ENTRIES,
+                ACTIVITY_LOG_MAX_SEGMENTS,
+            )
+            _log = ActivityLog(
+                ACTIVITY_LOG_DIR,
+                segment_entries=ACTIVITY_LOG_SEGMENT_ENTRIES,
+                max_segments=ACTIVITY_LOG_MAX_SEGMENTS,
+            )
+            _log.migrate_array_file(ACTIVITY_LOG_FILE)
+        return _log
+
+
+def log_action(action: str, params: dict = None, status: str = "success",
+               detail: str = "") -> dict:
+    return _default_log().log_action(action, params, status=status, detail=detail)
+
+
+def pop_last_action() -> Optional[dict]:
+    return _default_log().pop_last_action()
+
+
+def get_history(limit: int = 20) -> list[dict]:
+    return _default_log().get_history(limit)
+
+
+def last_seq() -> int:
+    return _default_log().last_seq
+
+
+def logged_since(seq: int, action: str) -> bool:
+    return _default_log().logged_since(seq, action)
+
+
+# ===========================================================================
+# BENCHMARK
+# ===========================================================================
+def benchmark(entries: int = 100_000):
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        # Old scheme: one rewrite of the whole array per log_action()
+        array_file = tmp / "activity_log.json"
+        history = [
+            {"timestamp": "2026-01-01T00:00:00", "action": "open_app",
+             "params": {"app": "chrome"}, "status": "success", "detail": ""}
+            for _ in range(entries)
+        ]
+        array_file.write_text(json.dumps(history))
+        start = time.perf_counter()
+        data = json.loads(array_file.read_text())
+        data.append(history[0])
+        array_file.write_text(json.dumps(data))
+        array_ms = (time.perf_counter() - start) * 1000
+
+        # New scheme
+        log = ActivityLog(tmp / "log", segment_entries=5000, max_segments=40)
+        start = time.perf_counter()
+        for i in range(entries):
+            log.log_action("open_app", {"app": "chrome"}, detail=str(i))
+        append_us = (time.perf_counter() - start) / entries * 1e6
+        start = time.perf_counter()
+        for _ in range(100):
+            log.pop_last_action()
+        pop_us = (time.perf_counter() - start) / 100 * 1e6
+        log.close()
+
+        start = time.perf_counter()
+        reopened = ActivityLog(tmp / "log")
+        reopen_ms = (time.perf_counter() - start) * 1000
+        assert reopened.pop_last_action()["detail"] == str(entries - 101)
+        reopened.close()
+
+        start = time.perf_counter()
+        migrated = ActivityLog(tmp / "migrated").migrate_array_file(array_file)
+        migrate_ms = (time.perf_counter() - start) * 1000
+
+    print(f"  entries               : {entries:,}")
+    print(f"  array log_action()    : {array_ms:10.1f} ms per call at this size")
+    print(f"  append log_action()   : {append_us:10.1f} us per call")
+    print(f"  pop_last_action()     : {pop_us:10.1f} us per call")
+    print(f"  reopen (tail index)   : {reopen_ms:10.1f} ms")
+    print(f"  migrate {migrated:,} entries: {migrate_ms:8.1f} ms (one-time)")
+
+
+if __name__ == "__main__":
+    benchmark()
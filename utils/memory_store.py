@@ -0,0 +1,165 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+utils/memory_store.py - In-RAM memory.json with a batched write-behind journal
+
+The memory document (user_name, preferences, habits, last_commands,
+favorite_apps) lives in RAM. Mutations are applied immediately and queued;
+a background thread appends the queued mutations to a write-ahead journal
+every MEMORY_FLUSH_INTERVAL seconds and periodically folds the journal into
+a fresh snapshot written with an atomic rename. Command handling never waits
+on disk, and a crash loses at most one flush interval.
+"""
+
+import atexit
+import copy
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Union
+
+_Path = Union[str, Iterable[str]]
+
+
+def _split(path: _Path) -> list[str]:
+    return path.split(".") if isinstance(path, str) else list(path)
+
+
+class MemoryStore:
+    """Write-behind store for MEMORY_FILE."""
+
+    def __init__(self, memory_file: Path, journal_file: Path = None,
+                 flush_interval: float = 2.0, snapshot_every: int = 200):
+        self.memory_file = Path(memory_file)
+        self.journal_file = Path(journal_file or self.memory_file.with_suffix(".journal"))
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._pending: list[dict] = []
+        self._journaled = 0             # ops in the journal since last snapshot
+        self._stop = threading.Event()
+
+        self._data = self._load()
+        self._thread = threading.Thread(target=self._flush_loop, name="disha-memory", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # --- Loading --------------------------------------------------------------
+    def _load(self) -> dict:
+        try:
+            data = json.loads(self.memory_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        if self.journal_file.exists():
+            with open(self.journal_file, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        break       # torn tail from a crash mid-write
+                    self._apply(data, op)
+                    self._journaled += 1
+        return data
+
+    # --- Reads ----------------------------------------------------------------
+    def get(self, path: _Path, default: Any = None) -> Any:
+        """Read a value by key or dotted path ("preferences.language")."""
+        with self._lock:
+            node = self._data
+            for key in _split(path):
+                if not isinstance(node, dict) or key not in node:
+                    return default
+                node = node[key]
+            return copy.deepcopy(node)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return copy.deepcopy(self._data)
+
+    # --- Mutations (RAM only; persisted by the flush thread) ------------------
+    def set(self, path: _Path, value: Any):
+        self._mutate({"op": "set", "path": _split(path), "value": value})
+
+    def append(self, path: _Path, value: Any, limit: int = None):
+        """Append to a list, keeping only the newest ``limit`` items."""
+        self._mutate({"op": "append", "path": _split(path), "value": value, "limit": limit})
+
+    def delete(self, path: _Path):
+        self._mutate({"op": "delete", "path": _split(path)})
+
+    def _mutate(self, op: dict):
+        op = json.loads(json.dumps(op))     # detach from caller objects, fail fast
+        with self._lock:
+            self._apply(self._data, op)
+            self._pending.append(op)
+
+    @staticmethod
+    def _apply(data: dict, op: dict):
+        *parents, leaf = op["path"]
+        node = data
+        for key in parents:
+            child = node.get(key)
+            if not isinstance(child, dict):
+                child = node[key] = {}
+            node = child
+        kind = op["op"]
+        if kind == "set":
+            node[leaf] = op["value"]
+        elif kind == "append":
+            items = node.get(leaf)
+            if not isinstance(items, list):
+                items = node[leaf] = []
+            items.append(op["value"])
+            if op.get("limit"):
+                del items[:-op["limit"]]
+        elif kind == "delete":
+            node.pop(leaf, None)
+
+    # --- Persistence ----------------------------------------------------------
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"  [MEM] Could not persist memory: {e}")
+
+    def flush(self, snapshot: bool = False):
+        """Append pending ops to the journal; snapshot when it grows large."""
+        with self._io_lock:
+            with self._lock:
+                ops, self._pending = self._pending, []
+                journaled = self._journaled + len(ops)
+                # Serialise in the same critical section as the swap, so the
+                # snapshot holds exactly the ops taken off the queue
+                text = None
+                if journaled and (snapshot or journaled >= self.snapshot_every):
+                    text = json.dumps(self._data, indent=2)
+            if text is not None:
+                self._write_snapshot(text)
+            elif ops:
+                with open(self.journal_file, "a", encoding="utf-8") as fh:
+                    fh.write("".join(json.dumps(op) + "\n" for op in ops))
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                self._journaled = journaled
+
+    def _write_snapshot(self, text: str):
+        tmp = self.memory_file.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(text)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.memory_file)
+        # The snapshot now contains every journaled op
+        open(self.journal_file, "w").close()
+        self._journaled = 0
+
+    def close(self):
+        """Stop the flush thread and write a final snapshot (idempotent)."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self.flush(snapshot=True)
@@ -0,0 +1,113 @@
+"""
+DISHA - Digital Intelligent System for Human Assistant
+========================================================
+utils/startup.py - Lazy feature-module imports and startup timing
+
+Feature modules (screen reader, smart home, writing assistant, web services,
+...) pull in pytesseract, PIL, selenium, pyautogui and friends, yet most
+sessions use only a few of them. ``lazy_import()`` returns a proxy that
+imports the real module on first attribute access - i.e. the first time one
+of its actions is dispatched.
+
+``profile`` records how long each startup phase and each lazy import took,
+and ``profile.report()`` prints an ``-X importtime``-style table.
+"""
+
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """Wall-clock timings for startup phases and deferred imports."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ready_at = None
+        self._entries: list[tuple[str, float, float, str]] = []   # name, offset, ms, kind
+        self._lock = threading.Lock()
+
+    def record(self, name: str, start: float, kind: str = "init"):
+        elapsed = (time.perf_counter() - start) * 1000.0
+        with self._lock:
+            self._entries.append((name, (start - self.started) * 1000.0, elapsed, kind))
+
+    @contextmanager
+    def phase(self, name: str, kind: str = "init"):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, kind)
+
+    def timed(self, name: str, fn, *args, **kwargs):
+        """Run ``fn`` as a named phase (handy with executor.submit)."""
+        with self.phase(name):
+            return fn(*args, **kwargs)
+
+    def spans(self) -> list[tuple[str, float, float, str]]:
+        """(name, start, end, kind) with absolute perf_counter() times."""
+        with self._lock:
+            return [
+                (name, self.started + offset / 1000.0,
+                 self.started + (offset + ms) / 1000.0, kind)
+                for name, offset, ms, kind in self._entries
+            ]
+
+    def mark_ready(self):
+        self.ready_at = time.perf_counter()
+
+    def report(self) -> str:
+        with self._lock:
+            entries = sorted(self._entries, key=lambda e: e[1])
+        lines = [f"  {'start ms':>9} | {'took ms':>9} | {'kind':<6} | phase"]
+        for name, offset, ms, kind in entries:
+            lines.append(f"  {offset:9.1f} | {ms:9.1f} | {kind:<6} | {name}")
+        if self.ready_at is not None:
+            lines.append(f"  Listening {(self.ready_at - self.started) * 1000:.0f} ms after launch.")
+        return "\n".join(lines)
+
+
+profile = StartupProfile()
+
+
+class LazyModule:
+    """Stands in for a module until one of its attributes is first used."""
+
+    __slots__ = ("_name", "_module", "_lock")
+
+    def __init__(self, name: str):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with self._lock:
+                module = self._module
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    profile.record(self._name, start, kind="lazy")
+                    object.__setattr__(self, "_module", module)
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)